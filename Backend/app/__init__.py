@@ -3,19 +3,67 @@ Application Factory
 """
 from flask import Flask
 from flask_cors import CORS
-from app.config import Config
+from app.config import config_for
 from app.extensions import db, jwt, migrate, bcrypt
+from app.utils.report_cache import report_cache
+from app.utils.identity_cache import identity_cache
+from app.utils.token_blocklist import token_blocklist
+from app.utils.db_pool import configure_pool, install_timeouts
+from app.utils.logs import configure_logging
+from app.utils.instrumentation import init_instrumentation
+from app.utils.json_provider import json_provider_class
+from app.utils.http_cache import init_http_cache
 
 
-def create_app(config_class=Config):
+def check_production_config(app):
+    """
+    Refuse to start a production profile with debug, SQL echo or an open /metrics
+    
+    Raises:
+        RuntimeError: If DEBUG, SQLALCHEMY_ECHO or SQLALCHEMY_RECORD_QUERIES is set,
+            or instrumentation is on without a METRICS_TOKEN
+    """
+    if not app.config.get('PRODUCTION'):
+        return
+    
+    enabled = [
+        key for key in ('DEBUG', 'SQLALCHEMY_ECHO', 'SQLALCHEMY_RECORD_QUERIES')
+        if app.config.get(key)
+    ]
+    if app.debug and 'DEBUG' not in enabled:
+        enabled.append('DEBUG')
+    
+    if enabled:
+        raise RuntimeError(
+            f'Refusing to start in production with {", ".join(enabled)} enabled '
+            f'(turn off, or set APP_CONFIG=development)'
+        )
+    
+    if app.config.get('PERF_INSTRUMENTATION', True) and not app.config.get('METRICS_TOKEN'):
+        raise RuntimeError(
+            'Refusing to start in production with /metrics open '
+            '(set METRICS_TOKEN, or PERF_INSTRUMENTATION=false)'
+        )
+
+
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.json = json_provider_class()(app)
+    app.config.from_object(config_class or config_for())
+    check_production_config(app)
+    configure_logging(app)
     
     # Initialize extensions
+    configure_pool(app)
     db.init_app(app)
+    with app.app_context():
+        install_timeouts(app, db.engines.values())
+    init_instrumentation(app, db)
+    init_http_cache(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
+    report_cache.max_entries = app.config['REPORT_CACHE_MAX_ENTRIES']
     
     # Enable CORS
     CORS(app, 
@@ -46,6 +94,19 @@ def create_app(config_class=Config):
     def missing_token_callback(error):
         return {'error': 'Authorization token is missing', 'message': str(error)}, 401
     
+    # Tokens of deleted, deactivated or changed users, PIN tokens of deactivated
+    # terminals and individually revoked tokens (logout) are rejected without a
+    # per-request database query
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(jwt_header, jwt_payload):
+        if not identity_cache.is_current(jwt_payload['sub'], jwt_payload.get('epoch'), jwt_payload.get('terminal_id')):
+            return True
+        return token_blocklist.is_revoked(jwt_payload.get('jti'))
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return {'error': 'Token has been revoked'}, 401
+    
     # Register blueprints
     from app.routes.auth_routes import auth_bp
     from app.routes.product_routes import product_bp
@@ -55,6 +116,8 @@ def create_app(config_class=Config):
     from app.routes.size_route import size_bp
     from app.routes.category_route import category_bp
     from app.routes.brand_route import brand_bp    
+    from app.routes.export_routes import export_bp
+    from app.routes.system_routes import system_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(product_bp, url_prefix='/api/products')
@@ -64,6 +127,14 @@ def create_app(config_class=Config):
     app.register_blueprint(size_bp, url_prefix='/api/sizes')
     app.register_blueprint(category_bp, url_prefix='/api/categories')
     app.register_blueprint(brand_bp, url_prefix='/api/brands')
+    app.register_blueprint(export_bp, url_prefix='/api/exports')
+    app.register_blueprint(system_bp, url_prefix='/api/system')
+    
+    # CLI commands
+    from app.commands import rollup_cli, report_cli, token_cli
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(report_cli)
+    app.cli.add_command(token_cli)
     
     # Error handlers
     @app.errorhandler(404)
@@ -0,0 +1,79 @@
+"""
+Flask CLI Commands
+"""
+import time
+from datetime import date, timedelta
+import click
+from flask.cli import AppGroup
+from app.extensions import db
+from app.services.rollup_service import RollupService
+from app.services.affinity_service import AffinityService
+from app.services.materialize_service import MaterializeService
+from app.utils.report_store import report_store
+from app.utils.reporting import today
+from app.utils.token_blocklist import token_blocklist
+
+rollup_cli = AppGroup('rollups', help='Maintain report rollup tables.')
+
+
+@rollup_cli.command('rebuild')
+@click.option('--days', default=30, show_default=True, help='Reporting days to rebuild, ending today.')
+def rebuild_rollups(days):
+    """Recompute rollups from sales (backfill or after a timezone change)"""
+    end_day = today()
+    start_day = end_day - timedelta(days=max(days, 1) - 1)
+    
+    written = RollupService.rebuild_daily(start_day, end_day)
+    report_store.clear()
+    click.echo(f'Daily rollups: {written} rows for {start_day} to {end_day}')
+
+
+@rollup_cli.command('affinity')
+@click.option('--rebuild', is_flag=True, help='Clear the counts and reprocess from the first sale.')
+def process_affinity(rebuild):
+    """Merge closed reporting days into the basket affinity counts"""
+    if rebuild:
+        days = AffinityService.rebuild()
+    else:
+        days = AffinityService.process()
+    click.echo(f'Basket affinity: {days} days merged')
+
+
+report_cli = AppGroup('reports', help='Materialize the standard report windows.')
+
+
+@report_cli.command('materialize')
+@click.option('--day', default=None, help='Closed reporting day (YYYY-MM-DD), default yesterday.')
+def materialize_reports(day):
+    """Pre-render day, week and month-to-date reports ending on a closed day"""
+    try:
+        day = date.fromisoformat(day) if day else None
+        written = MaterializeService.materialize(day)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--day')
+    click.echo(f'Materialized reports: {written} blobs')
+
+
+@report_cli.command('scheduler')
+def report_scheduler():
+    """Materialize reports each time a reporting day closes (runs until stopped)"""
+    while True:
+        try:
+            written = MaterializeService.materialize()
+            click.echo(f'Materialized reports for {today() - timedelta(days=1)}: {written} blobs')
+        except Exception as e:
+            click.echo(f'Report materialization failed: {str(e)}', err=True)
+        finally:
+            db.session.remove()
+        
+        time.sleep(MaterializeService.seconds_until_next_run())
+
+
+token_cli = AppGroup('tokens', help='Maintain the revoked token list.')
+
+
+@token_cli.command('prune')
+def prune_tokens():
+    """Delete revoked-token rows for tokens that have expired anyway"""
+    removed = token_blocklist.prune()
+    click.echo(f'Revoked tokens: {removed} expired rows removed')
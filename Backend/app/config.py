@@ -12,6 +12,17 @@ class Config:
     # Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
+    DEBUG = False
+    
+    # Logging (see app/utils/logs.py)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' or 'text'
+    
+    # Per-request timing, query counts and GET /metrics (see app/utils/instrumentation.py)
+    PERF_INSTRUMENTATION = os.getenv('PERF_INSTRUMENTATION', 'true').lower() == 'true'
+    PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', 'true').lower() == 'true'
+    PERF_N_PLUS_ONE_THRESHOLD = int(os.getenv('PERF_N_PLUS_ONE_THRESHOLD', 10))  # repeats of one statement
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # bearer token for /metrics; open when unset (required in production)
     
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv(
@@ -19,7 +30,27 @@ class Config:
         'postgresql://localhost/pos_db'
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ECHO = FLASK_ENV == 'development'
+    
+    # Connection pool, per engine and per app worker (see app/utils/db_pool.py).
+    # Peak connections = workers x engines x (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'  # behind pgbouncer in transaction mode
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000))  # 0 = none
+    REPORT_STATEMENT_TIMEOUT_MS = int(os.getenv('REPORT_STATEMENT_TIMEOUT_MS', 60000))
+    EXPORT_STATEMENT_TIMEOUT_MS = int(os.getenv('EXPORT_STATEMENT_TIMEOUT_MS', 300000))
+    
+    # Optional read replica for reports and listings (see app/utils/db_routing.py)
+    SQLALCHEMY_BINDS = (
+        {'replica': os.getenv('REPLICA_DATABASE_URL')}
+        if os.getenv('REPLICA_DATABASE_URL') else {}
+    )
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+    SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'false').lower() == 'true'
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
@@ -30,5 +61,105 @@ class Config:
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
     
+    # Cashier PIN quick-switch on registered terminals
+    PIN_HASH_KEY = os.getenv('PIN_HASH_KEY')  # defaults to SECRET_KEY
+    PIN_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('PIN_TOKEN_EXPIRES_MINUTES', 30)))
+    PIN_MAX_ATTEMPTS = int(os.getenv('PIN_MAX_ATTEMPTS', 5))
+    
+    # Seconds before a user change made in another worker revokes that user's tokens here
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 30))
+    
+    # Revoked tokens (logout): bloom filter sizing and cross-process sync
+    TOKEN_BLOCKLIST_CAPACITY = int(os.getenv('TOKEN_BLOCKLIST_CAPACITY', 100000))
+    TOKEN_BLOCKLIST_ERROR_RATE = float(os.getenv('TOKEN_BLOCKLIST_ERROR_RATE', 0.001))
+    TOKEN_BLOCKLIST_SYNC_INTERVAL = int(os.getenv('TOKEN_BLOCKLIST_SYNC_INTERVAL', 5))
+    TOKEN_BLOCKLIST_SYNC_LOOKBACK = int(os.getenv('TOKEN_BLOCKLIST_SYNC_LOOKBACK', 60))  # seconds; longer than a logout transaction plus clock skew
+    TOKEN_BLOCKLIST_REBUILD_INTERVAL = int(os.getenv('TOKEN_BLOCKLIST_REBUILD_INTERVAL', 600))
+    TOKEN_BLOCKLIST_LRU_SIZE = int(os.getenv('TOKEN_BLOCKLIST_LRU_SIZE', 4096))
+    
+    # Password hashing (see app/utils/passwords.py)
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))  # existing hashes are upgraded on login
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 2))  # hashes at once, across all workers on the host
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 4))  # logins waiting for a slot; more get 503
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 2))  # seconds
+    PASSWORD_HASH_LOCK_DIR = os.getenv('PASSWORD_HASH_LOCK_DIR')  # default: <instance>/password-slots
+    
+    # Reporting
+    STORE_TIMEZONE = os.getenv('STORE_TIMEZONE', 'UTC')
+    REPORTING_DAY_CUTOFF_HOUR = int(os.getenv('REPORTING_DAY_CUTOFF_HOUR', 0))  # store-local hour a reporting day starts
+    REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 30))  # seconds, current day only
+    REPORT_CLOSED_CACHE_TTL = int(os.getenv('REPORT_CLOSED_CACHE_TTL', 3600))  # seconds, closed days (picks up renames)
+    REPORT_GENERATION_SYNC_INTERVAL = int(os.getenv('REPORT_GENERATION_SYNC_INTERVAL', 5))  # seconds between rollup generation reads
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 256))
+    REPORT_STORE_DIR = os.getenv('REPORT_STORE_DIR')  # default: <instance>/reports
+    REPORT_STORE_RETENTION_DAYS = int(os.getenv('REPORT_STORE_RETENTION_DAYS', 90))
+    REPORT_MATERIALIZE_DELAY_MINUTES = int(os.getenv('REPORT_MATERIALIZE_DELAY_MINUTES', 15))  # after the day cutoff
+    REPORT_MATERIALIZE_TRAILING_DAYS = [  # ?days= windows whose closed days are stored (see ReportService)
+        int(days) for days in os.getenv('REPORT_MATERIALIZE_TRAILING_DAYS', '7,30,90').split(',')
+    ]
+    
+    # Ad-hoc analytics (POST /api/reports/query)
+    ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', 5000))
+    ANALYTICS_MAX_ROWS = int(os.getenv('ANALYTICS_MAX_ROWS', 500000))  # sale lines per query (bounds its run time)
+    
+    # Response compression (see app/utils/http_cache.py; brotli is used when installed)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    HTTP_CACHE_SETTLE_SECONDS = int(os.getenv('HTTP_CACHE_SETTLE_SECONDS', 30))  # longer than any writing transaction
+    
     # Pagination
-    ITEMS_PER_PAGE = 50
\ No newline at end of file
+    ITEMS_PER_PAGE = 50
+    
+    # Checkout pricing table refresh interval (seconds)
+    PRICING_CACHE_TTL = int(os.getenv('PRICING_CACHE_TTL', 60))
+    
+    # Bulk import
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 500))
+    
+    # Streaming export
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+
+class ProductionConfig(Config):
+    # Checked at startup: create_app refuses DEBUG, SQLALCHEMY_ECHO or an open /metrics here
+    DEBUG = False
+    PRODUCTION = True
+    PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', 'false').lower() == 'true'  # DB timings are for operators
+
+
+class BenchmarkConfig(ProductionConfig):
+    # Production settings with only warnings logged, for load tests
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING')
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'benchmark': BenchmarkConfig
+}
+
+
+def config_for(name=None):
+    """
+    Config class by name (default: APP_CONFIG, then FLASK_ENV, then 'production')
+    
+    A deployment that sets neither gets the production checks rather than
+    the debugger; local checkouts set FLASK_ENV=development in .env.
+    
+    Raises:
+        ValueError: If the name is not one of CONFIGS
+    """
+    name = (name or os.getenv('APP_CONFIG') or os.getenv('FLASK_ENV') or 'production').lower()
+    
+    if name not in CONFIGS:
+        raise ValueError(f'Unknown config {name!r}. Must be one of {list(CONFIGS)}')
+    
+    return CONFIGS[name]
\ No newline at end of file
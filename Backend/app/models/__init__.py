@@ -1,4 +1,8 @@
 from app.models.category import Category
 from app.models.brand import Brand
 from app.models.size import Size
-from app.models.product_variant import ProductVariant
\ No newline at end of file
+from app.models.product_variant import ProductVariant
+from app.models.sales_rollup import SalesDailyRollup, SalesVariantDailyRollup, SalesHourlyRollup, SalesRollupState
+from app.models.basket_affinity import BasketItemCount, BasketPairCount, BasketAffinityState
+from app.models.terminal import Terminal
+from app.models.revoked_token import RevokedToken
\ No newline at end of file
@@ -0,0 +1,64 @@
+# app/models/basket_affinity.py
+from datetime import datetime
+from app.extensions import db
+
+
+class BasketItemCount(db.Model):
+    """
+    Number of sales (baskets) containing an item, at product or variant level
+    Merged one reporting day at a time (see AffinityService)
+    """
+    __tablename__ = 'basket_item_counts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.String(10), nullable=False)  # 'product' or 'variant'
+    item_id = db.Column(db.Integer, nullable=False)
+    basket_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('level', 'item_id', name='unique_basket_item_count'),
+    )
+    
+    def __repr__(self):
+        return f'<BasketItemCount {self.level} {self.item_id}: {self.basket_count}>'
+
+
+class BasketPairCount(db.Model):
+    """
+    Number of sales containing both items of a pair (item_a < item_b)
+    Merged one reporting day at a time (see AffinityService)
+    """
+    __tablename__ = 'basket_pair_counts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    level = db.Column(db.String(10), nullable=False)  # 'product' or 'variant'
+    item_a = db.Column(db.Integer, nullable=False)
+    item_b = db.Column(db.Integer, nullable=False)
+    basket_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('level', 'item_a', 'item_b', name='unique_basket_pair_count'),
+        db.Index('ix_basket_pair_counts_level_item_b', 'level', 'item_b'),
+    )
+    
+    def __repr__(self):
+        return f'<BasketPairCount {self.level} {self.item_a}-{self.item_b}: {self.basket_count}>'
+
+
+class BasketAffinityState(db.Model):
+    """
+    Progress of the affinity job: reporting days merged so far and their basket total
+    """
+    __tablename__ = 'basket_affinity_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    timezone = db.Column(db.String(64), nullable=False)  # reporting_key() the days were cut with
+    first_day = db.Column(db.Date, nullable=False)
+    processed_through = db.Column(db.Date, nullable=False)
+    basket_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BasketAffinityState {self.first_day}..{self.processed_through}: {self.basket_count}>'
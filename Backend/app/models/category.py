@@ -11,6 +11,7 @@ class Category(db.Model):
     description = db.Column(db.String(255), nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # for list ETags
     
     # Relationships
     products = db.relationship('Product', backref='category', lazy=True)
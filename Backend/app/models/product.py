@@ -1,6 +1,7 @@
 # app/models/product.py (UPDATED)
 from datetime import datetime
 from app.extensions import db
+from app.utils.money import from_cents, money_property
 
 
 class Product(db.Model):
@@ -9,8 +10,12 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     sku = db.Column(db.String(50), unique=True, nullable=False, index=True)
     name = db.Column(db.String(200), nullable=False, index=True)
-    min_price = db.Column(db.Numeric(10, 2), nullable=False)
-    max_price = db.Column(db.Numeric(10, 2), nullable=False)
+    min_price_cents = db.Column(db.BigInteger, nullable=False)
+    max_price_cents = db.Column(db.BigInteger, nullable=False)
+    
+    # Decimal views over the cents columns (compatibility layer)
+    min_price = money_property('min_price_cents')
+    max_price = money_property('max_price_cents')
     
     # Foreign keys for category and brand
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
@@ -18,7 +23,7 @@ class Product(db.Model):
     
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships (variants backref defined in ProductVariant)
     
@@ -31,8 +36,8 @@ class Product(db.Model):
             'id': self.id,
             'sku': self.sku,
             'name': self.name,
-            'min_price': float(self.min_price),
-            'max_price': float(self.max_price),
+            'min_price': from_cents(self.min_price_cents),
+            'max_price': from_cents(self.max_price_cents),
             'category_id': self.category_id,
             'category': self.category.to_dict() if self.category else None,
             'brand_id': self.brand_id,
@@ -17,7 +17,7 @@ class ProductVariant(db.Model):
     sku_suffix = db.Column(db.String(20), nullable=True)  # Optional: e.g., "-SM" for small
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     product = db.relationship('Product', backref='variants')
@@ -0,0 +1,24 @@
+"""
+Revoked Token Model
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class RevokedToken(db.Model):
+    """
+    A single revoked JWT, by jti, kept until the token would have expired.
+    Whole-user revocation (role change, deactivation, deletion) uses
+    User.auth_epoch instead and never writes here.
+    """
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    token_type = db.Column(db.String(10), nullable=False)  # 'access' or 'refresh'
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
@@ -1,23 +1,27 @@
 # app/models/sale.py
 from datetime import datetime
 from app.extensions import db
+from app.utils.money import from_cents, money_property
 
 
 class Sale(db.Model):
     __tablename__ = 'sales'
     
     id = db.Column(db.Integer, primary_key=True)
-    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    total_amount_cents = db.Column(db.BigInteger, nullable=False)
     payment_method = db.Column(db.String(20), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     items = db.relationship('SaleItem', backref='sale', lazy=True, cascade='all, delete-orphan')
     
+    # Decimal view over the cents column (compatibility layer)
+    total_amount = money_property('total_amount_cents')
+    
     def to_dict(self, include_items=False):
         data = {
             'id': self.id,
-            'total_amount': float(self.total_amount),
+            'total_amount': from_cents(self.total_amount_cents),
             'payment_method': self.payment_method,
             'user_id': self.user_id,
             'cashier': self.user.username if self.user else None,
@@ -41,7 +45,10 @@ class SaleItem(db.Model):
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.id'), nullable=False)
     variant_id = db.Column(db.Integer, db.ForeignKey('product_variants.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    price_at_sale = db.Column(db.Numeric(10, 2), nullable=False)
+    price_at_sale_cents = db.Column(db.BigInteger, nullable=False)
+    
+    # Decimal view over the cents column (compatibility layer)
+    price_at_sale = money_property('price_at_sale_cents')
     
     def to_dict(self):
         return {
@@ -52,8 +59,8 @@ class SaleItem(db.Model):
             'product_name': self.variant.product.name if self.variant and self.variant.product else None,
             'size_name': self.variant.size.name if self.variant and self.variant.size else None,
             'quantity': self.quantity,
-            'price_at_sale': float(self.price_at_sale),
-            'subtotal': float(self.quantity * self.price_at_sale)
+            'price_at_sale': from_cents(self.price_at_sale_cents),
+            'subtotal': from_cents(self.quantity * self.price_at_sale_cents)
         }
     
     def __repr__(self):
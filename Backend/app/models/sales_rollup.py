@@ -0,0 +1,93 @@
+# app/models/sales_rollup.py
+from datetime import datetime
+from app.extensions import db
+
+
+class SalesDailyRollup(db.Model):
+    """
+    Sales totals per reporting day, store timezone, payment method and cashier
+    Maintained in the same transaction as each sale (see RollupService)
+    """
+    __tablename__ = 'sales_daily_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    timezone = db.Column(db.String(64), nullable=False)  # reporting_key(): timezone[@cutoff hour]
+    payment_method = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'timezone', 'payment_method', 'user_id', name='unique_sales_daily_rollup'),
+    )
+    
+    def __repr__(self):
+        return f'<SalesDailyRollup {self.day} {self.payment_method} user={self.user_id}>'
+
+
+class SalesVariantDailyRollup(db.Model):
+    """
+    Units and revenue per reporting day, store timezone and product variant
+    Maintained in the same transaction as each sale (see RollupService)
+    """
+    __tablename__ = 'sales_variant_daily_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    timezone = db.Column(db.String(64), nullable=False)  # reporting_key(): timezone[@cutoff hour]
+    variant_id = db.Column(db.Integer, db.ForeignKey('product_variants.id'), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'timezone', 'variant_id', name='unique_sales_variant_daily_rollup'),
+    )
+    
+    def __repr__(self):
+        return f'<SalesVariantDailyRollup {self.day} variant={self.variant_id}>'
+
+
+class SalesHourlyRollup(db.Model):
+    """
+    Sales per store-local hour, store timezone, payment method and cashier
+    Maintained in the same transaction as each sale (see RollupService)
+    """
+    __tablename__ = 'sales_hourly_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hour_start = db.Column(db.DateTime, nullable=False)  # Store-local, naive
+    timezone = db.Column(db.String(64), nullable=False)  # reporting_key(): timezone[@cutoff hour]
+    payment_method = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('hour_start', 'timezone', 'payment_method', 'user_id', name='unique_sales_hourly_rollup'),
+    )
+    
+    def __repr__(self):
+        return f'<SalesHourlyRollup {self.hour_start} {self.payment_method} user={self.user_id}>'
+
+
+class SalesRollupState(db.Model):
+    """
+    Rollup generation per store timezone, bumped by every rebuild
+
+    Part of the cache key of closed-day report sums, so a rebuild in one
+    process invalidates them in every other.
+    """
+    __tablename__ = 'sales_rollup_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    timezone = db.Column(db.String(64), unique=True, nullable=False)  # reporting_key()
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SalesRollupState {self.timezone} generation={self.generation}>'
@@ -0,0 +1,31 @@
+"""
+Terminal Model
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class Terminal(db.Model):
+    """
+    A registered till. The till holds a random key; only its SHA-256 is stored.
+    Cashier PIN quick-switch is only accepted from a registered, active terminal.
+    """
+    __tablename__ = 'terminals'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), unique=True, nullable=False)
+    key_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<Terminal {self.name}>'
@@ -2,7 +2,8 @@
 User Model
 """
 from datetime import datetime
-from app.extensions import db, bcrypt
+from app.extensions import db
+from app.utils.passwords import password_hasher
 
 
 class User(db.Model):
@@ -12,9 +13,12 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
+    pin_hash = db.Column(db.String(64), nullable=True)  # HMAC-SHA256, see AuthService.set_pin
+    pin_failed_attempts = db.Column(db.Integer, default=0, nullable=False)
     role = db.Column(db.String(20), nullable=False, default='cashier')  # 'admin' or 'cashier'
     is_active = db.Column(db.Boolean, default=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    auth_epoch = db.Column(db.Integer, default=0, nullable=False)  # bumped to revoke issued tokens
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     sales = db.relationship('Sale', backref='user', lazy=True)
@@ -26,10 +30,17 @@ class User(db.Model):
     
     @password.setter
     def password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def rehash_password_if_needed(self, password):
+        """Re-hash a just-verified password if the configured bcrypt cost changed"""
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.password_hash = password_hasher.hash(password)
+        return True
     
     def to_dict(self):
         return {
@@ -38,6 +49,7 @@ class User(db.Model):
             'email': self.email,
             'role': self.role,
             'is_active': self.is_active,
+            'has_pin': self.pin_hash is not None,
             'created_at': self.created_at.isoformat()
         }
     
@@ -4,7 +4,9 @@ Authentication Routes
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services.auth_service import AuthService
+from app.services.terminal_service import TerminalService
 from app.utils.permissions import require_role
+from app.utils.passwords import HasherBusyError, PasswordTooLongError
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -41,12 +43,38 @@ def login():
     try:
         result = AuthService.authenticate(username, password)
         return jsonify(result), 200
+    except PasswordTooLongError as e:
+        return jsonify({'error': str(e)}), 400
     except ValueError as e:
         return jsonify({'error': str(e)}), 401
+    except HasherBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': 'Authentication failed'}), 500
 
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """
+    Logout: revoke the current access token
+    
+    Request body (optional):
+        {
+            "refresh_token": "string" (also revoked)
+        }
+    """
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        AuthService.logout(get_jwt(), refresh_token=data.get('refresh_token'))
+        return jsonify({'message': 'Logged out successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Logout failed'}), 500
+
+
 @auth_bp.route('/register', methods=['POST'])
 @jwt_required()
 @require_role('admin')
@@ -103,9 +131,23 @@ def get_current_user():
     """
     Get current user info
     
+    Query params:
+        claims: bool (default false) - answer {id, username, role} from the
+                token claims without a database query; the token was already
+                checked against the user's current epoch and active flag
     """
     try:
         user_id = get_jwt_identity()
+        
+        if request.args.get('claims', 'false').lower() == 'true':
+            claims = get_jwt()
+            if 'username' in claims:
+                return jsonify({'user': {
+                    'id': user_id,
+                    'username': claims['username'],
+                    'role': claims['role']
+                }}), 200
+        
         user = AuthService.get_user_by_id(user_id)
         
         if not user:
@@ -158,7 +200,8 @@ def update_user(user_id):
         {
             "email": "string" (optional),
             "role": "admin" | "cashier" (optional),
-            "password": "string" (optional)
+            "password": "string" (optional),
+            "is_active": bool (optional)
         }
     
     Returns:
@@ -176,7 +219,8 @@ def update_user(user_id):
             user_id=user_id,
             email=data.get('email'),
             role=data.get('role'),
-            password=data.get('password')
+            password=data.get('password'),
+            is_active=data.get('is_active')
         )
         return jsonify({'user': user.to_dict()}), 200
         
@@ -212,3 +256,149 @@ def delete_user(user_id):
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Deletion failed: {str(e)}'}), 500
+
+
+@auth_bp.route('/pin', methods=['POST'])
+@jwt_required()
+def set_pin():
+    """
+    Set own quick-switch PIN (requires a password login, not a PIN session)
+    
+    Request body:
+        {
+            "pin": "string" (4-8 digits)
+        }
+    """
+    if get_jwt().get('pin'):
+        return jsonify({'error': 'Log in with your password to change your PIN'}), 403
+    
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        AuthService.set_pin(get_jwt_identity(), data.get('pin'))
+        return jsonify({'message': 'PIN updated successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to set PIN'}), 500
+
+
+@auth_bp.route('/users/<int:user_id>/pin', methods=['DELETE'])
+@jwt_required()
+@require_role('admin')
+def clear_pin(user_id):
+    """Remove a user's PIN and unlock quick-switch (Admin only)"""
+    try:
+        AuthService.clear_pin(user_id)
+        return jsonify({'message': 'PIN removed successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': 'Failed to remove PIN'}), 500
+
+
+@auth_bp.route('/switch', methods=['POST'])
+def switch_user():
+    """
+    Cashier quick-switch on a registered till
+    
+    Headers:
+        X-Terminal-Key: key returned when the terminal was registered
+    
+    Request body:
+        {
+            "username": "string",
+            "pin": "string"
+        }
+    
+    Returns:
+        {
+            "access_token": "string" (short-lived, cashier rights even for an admin,
+                                      no refresh token, void once the terminal is deactivated),
+            "expires_in": int,
+            "terminal": {object},
+            "user": {object}
+        }
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    username = data.get('username')
+    pin = data.get('pin')
+    
+    if not username or not pin:
+        return jsonify({'error': 'Username and PIN required'}), 400
+    
+    try:
+        result = AuthService.switch_user(request.headers.get('X-Terminal-Key'), username, pin)
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 401
+    except Exception as e:
+        return jsonify({'error': 'Switch failed'}), 500
+
+
+@auth_bp.route('/terminals', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def register_terminal():
+    """
+    Register a till (Admin only)
+    
+    Request body:
+        {
+            "name": "string"
+        }
+    
+    Returns:
+        {
+            "terminal": {object},
+            "terminal_key": "string" (shown once; configure it on the till)
+        }
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        terminal, key = TerminalService.register_terminal(
+            data.get('name'),
+            created_by=get_jwt_identity()
+        )
+        return jsonify({'terminal': terminal.to_dict(), 'terminal_key': key}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Terminal registration failed'}), 500
+
+
+@auth_bp.route('/terminals', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def get_terminals():
+    """Get all terminals (Admin only)"""
+    try:
+        terminals = TerminalService.get_all_terminals()
+        return jsonify({'terminals': [t.to_dict() for t in terminals]}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch terminals'}), 500
+
+
+@auth_bp.route('/terminals/<int:terminal_id>', methods=['DELETE'])
+@jwt_required()
+@require_role('admin')
+def deactivate_terminal(terminal_id):
+    """Deactivate a terminal, revoking its key (Admin only)"""
+    try:
+        TerminalService.deactivate_terminal(terminal_id)
+        return jsonify({'message': 'Terminal deactivated successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': 'Failed to deactivate terminal'}), 500
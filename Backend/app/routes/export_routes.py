@@ -0,0 +1,49 @@
+# app/routes/export_routes.py
+"""
+Export Routes
+"""
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from app.services.export_service import ExportService
+from app.utils.permissions import require_role
+
+export_bp = Blueprint('exports', __name__)
+
+
+@export_bp.route('/<dataset>', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def export_dataset(dataset):
+    """
+    Stream a catalog or inventory export (Admin only)
+    
+    URL params:
+        dataset: "products" | "variants" | "stock"
+    
+    Query params:
+        format: "csv" | "ndjson" | "columnar" (default csv)
+    
+    Returns:
+        Streamed file body. "columnar" streams one JSON row group per line:
+        {"columns": [...], "data": {"column": [values]}, "rows": int}
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    
+    try:
+        chunks = ExportService.stream(
+            dataset,
+            fmt,
+            batch_size=current_app.config.get('EXPORT_BATCH_SIZE')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    extension = 'csv' if fmt == 'csv' else 'ndjson'
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=ExportService.MIMETYPES[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename={dataset}.{extension}'
+        }
+    )
@@ -3,12 +3,23 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.inventory_service import InventoryService
 from app.utils.permissions import require_role
+from app.utils.db_routing import read_replica
+from app.models.stock_movement import StockMovement
+from app.models.user import User
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.size import Size
+from app.utils.http_cache import conditional
 
 inventory_bp = Blueprint('inventory', __name__)
 
 
 @inventory_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
+@conditional(ProductVariant, Product, Category, Brand, Size)
 def get_inventory():
     """
     Get all inventory levels (all product variants)
@@ -27,20 +38,9 @@ def get_inventory():
         }
     """
     try:
-        variants = InventoryService.get_all_inventory(active_products_only=True)
+        inventory = InventoryService.get_inventory_rows(active_products_only=True)
         
-        result = []
-        for variant in variants:
-            result.append({
-                'variant_id': variant.id,
-                'product': variant.product.to_dict(include_variants=False) if variant.product else None,
-                'size': variant.size.to_dict() if variant.size else None,
-                'quantity': variant.quantity,
-                'full_sku': variant.to_dict()['full_sku'],
-                'updated_at': variant.updated_at.isoformat() if variant.updated_at else None
-            })
-        
-        return jsonify({'inventory': result}), 200
+        return jsonify({'inventory': inventory}), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch inventory'}), 500
@@ -112,6 +112,8 @@ def adjust_inventory():
 @inventory_bp.route('/movements', methods=['GET'])
 @jwt_required()
 @require_role('admin')
+@read_replica
+@conditional(StockMovement, ProductVariant, Product, Size, User)
 def get_stock_movements():
     """
     Get stock movement history (Admin only)
@@ -131,15 +133,13 @@ def get_stock_movements():
         product_id = request.args.get('product_id', type=int)
         limit = request.args.get('limit', 100, type=int)
         
-        movements = InventoryService.get_stock_movements(
+        movements = InventoryService.get_stock_movement_rows(
             variant_id=variant_id,
             product_id=product_id,
             limit=limit
         )
         
-        return jsonify({
-            'movements': [m.to_dict() for m in movements]
-        }), 200
+        return jsonify({'movements': movements}), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch movements'}), 500
\ No newline at end of file
@@ -1,14 +1,22 @@
 # app/routes/product_routes.py
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.product_service import ProductService
+from app.services.import_service import ImportService
 from app.utils.permissions import require_role
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.size import Size
+from app.utils.http_cache import conditional
 
 product_bp = Blueprint('products', __name__)
 
 
 @product_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(Product, ProductVariant, Category, Brand, Size)
 def get_products():
     """
     Get all products with variants
@@ -25,19 +33,18 @@ def get_products():
         active_only_param = request.args.get('active_only', 'true')
         active_only = active_only_param.lower() in ['true', '1', 'yes']
         
-        products = ProductService.get_all_products(active_only=active_only)
+        products = ProductService.get_all_product_rows(active_only=active_only)
         
-        return jsonify({
-            'products': [p.to_dict(include_variants=True) for p in products]
-        }), 200
+        return jsonify({'products': products}), 200
         
     except Exception as e:
-        print(f"Error in get_products: {str(e)}")
+        current_app.logger.exception('Failed to fetch products')
         return jsonify({'error': 'Failed to fetch products'}), 500
 
 
 @product_bp.route('/search', methods=['GET'])
 @jwt_required()
+@conditional(Product, ProductVariant, Category, Brand, Size)
 def search_products():
     """
     Search products by name or SKU
@@ -58,11 +65,9 @@ def search_products():
     
     try:
         active_only = request.args.get('active_only', 'true').lower() == 'true'
-        products = ProductService.search_products(query, active_only=active_only)
+        products = ProductService.search_product_rows(query, active_only=active_only)
         
-        return jsonify({
-            'products': [p.to_dict(include_variants=True) for p in products]
-        }), 200
+        return jsonify({'products': products}), 200
         
     except Exception as e:
         return jsonify({'error': 'Search failed'}), 500
@@ -142,10 +147,54 @@ def create_product():
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print("CREATE PRODUCT ERROR:", str(e))
+        current_app.logger.exception('Product creation failed')
         return jsonify({'error': str(e)}), 500
 
 
+@product_bp.route('/import', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def import_products():
+    """
+    Bulk import products with variants from CSV or NDJSON (Admin only)
+    
+    Request:
+        multipart/form-data with a "file" field, or the raw file as the body
+    
+    Query params:
+        format: "csv" | "ndjson" (default: inferred from file name, else csv)
+    
+    Returns:
+        {
+            "processed": int,
+            "products_upserted": int,
+            "variants_upserted": int,
+            "errors": [{"line": int, "sku": "string", "error": "string"}, ...]
+        }
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    
+    fmt = request.args.get('format')
+    if not fmt:
+        filename = (upload.filename or '') if upload else ''
+        fmt = 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+    
+    try:
+        result = ImportService.import_products(
+            stream=stream,
+            fmt=fmt.lower(),
+            user_id=get_jwt_identity(),
+            chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE')
+        )
+        return jsonify(result), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Import failed: {str(e)}'}), 500
+
+
 @product_bp.route('/<int:product_id>', methods=['PUT'])
 @jwt_required()
 @require_role('admin')
@@ -183,13 +232,18 @@ def update_product(product_id):
         return jsonify({'error': 'No data provided'}), 400
     
     try:
-        product = ProductService.update_product(product_id, **data)
+        data.pop('user_id', None)
+        product = ProductService.update_product(
+            product_id,
+            user_id=get_jwt_identity(),
+            **data
+        )
         return jsonify({'product': product.to_dict(include_variants=True)}), 200
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print("UPDATE PRODUCT ERROR:", str(e))
+        current_app.logger.exception('Product update failed')
         return jsonify({'error': str(e)}), 500
 
 
@@ -1,27 +1,61 @@
 """
 Report Routes
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required
-from app.extensions import db
-from app.models.sale import Sale, SaleItem
-from app.models.product import Product
+from app.services.report_service import ReportService
+from app.services.analytics_service import AnalyticsService
+from app.services.affinity_service import AffinityService
+from app.services.rollup_service import RollupMissingError
 from app.utils.permissions import require_role
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from app.services.materialize_service import MaterializeService
+from app.utils.report_store import report_store
+from app.utils.reporting import resolve_range
+from app.utils.db_pool import statement_timeout
 
 report_bp = Blueprint('reports', __name__)
 
 
+def _report_response(name, params, start_day, end_day, compute):
+    """
+    Serve a report as JSON (default) or CSV (?format=csv)
+    
+    A blob pre-rendered by `flask reports materialize` for exactly this
+    window and parameters is sent as-is; otherwise the report is computed,
+    which for the ?days= windows ending today merges the stored closed-day
+    sums with today's rollups.
+    """
+    fmt = request.args.get('format', 'json').lower()
+    if fmt not in report_store.FORMATS:
+        raise ValueError(f'Invalid format. Must be one of {report_store.FORMATS}')
+    
+    blob = report_store.get(name, params, start_day, end_day, fmt)
+    if blob is not None:
+        response = Response(blob, mimetype=MaterializeService.MIMETYPES[fmt])
+        response.headers['X-Report-Source'] = 'materialized'
+        return response, 200
+    
+    body = compute()
+    if fmt == 'json':
+        response = jsonify(body)
+    else:
+        response = Response(MaterializeService.render(name, body, fmt), mimetype=MaterializeService.MIMETYPES[fmt])
+    response.headers['X-Report-Source'] = 'live'
+    return response, 200
+
+
 @report_bp.route('/daily', methods=['GET'])
 @jwt_required()
 @require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
 def daily_sales_report():
     """
     Get daily sales report
     
     Query params:
-        days: int (default 7) - number of days to include
+        days: int (default 7) - number of reporting days to include, ending today
+        start, end: YYYY-MM-DD (optional) - explicit reporting day range
+        format: "json" | "csv" (default json)
     
     Returns:
         {
@@ -39,48 +73,20 @@ def daily_sales_report():
         }
     """
     try:
-        days = request.args.get('days', 7, type=int)
-        
-        # Get date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Query sales grouped by date and payment method
-        results = db.session.query(
-            func.date(Sale.created_at).label('date'),
-            Sale.payment_method,
-            func.sum(Sale.total_amount).label('total'),
-            func.count(Sale.id).label('count')
-        ).filter(
-            Sale.created_at >= start_date
-        ).group_by(
-            func.date(Sale.created_at),
-            Sale.payment_method
-        ).all()
+        start_day, end_day = resolve_range(
+            days=request.args.get('days', 7, type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
         
-        # Organize by date
-        daily_data = {}
-        for row in results:
-            date_str = row.date.isoformat()
-            if date_str not in daily_data:
-                daily_data[date_str] = {
-                    'date': date_str,
-                    'total_sales': 0,
-                    'transaction_count': 0,
-                    'cash': 0,
-                    'card': 0,
-                    'mobile': 0
-                }
-            
-            daily_data[date_str]['total_sales'] += float(row.total)
-            daily_data[date_str]['transaction_count'] += row.count
-            daily_data[date_str][row.payment_method] = float(row.total)
-        
-        # Convert to list and sort by date
-        report = sorted(daily_data.values(), key=lambda x: x['date'], reverse=True)
-        
-        return jsonify({'report': report}), 200
+        return _report_response('daily', (), start_day, end_day, lambda: {
+            'report': ReportService.daily_sales(start_day, end_day)
+        })
         
+    except RollupMissingError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to generate report'}), 500
 
@@ -88,20 +94,24 @@ def daily_sales_report():
 @report_bp.route('/products', methods=['GET'])
 @jwt_required()
 @require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
 def product_performance_report():
     """
     Get product performance report - UPDATED FOR VARIANTS
     
     Query params:
-        days: int (default 30) - number of days to include
-        limit: int (default 20) - top N products
+        days: int (default 30) - number of reporting days to include, ending today
+        start, end: YYYY-MM-DD (optional) - explicit reporting day range
+        format: "json" | "csv" (default json)
+        limit: int (default 20) - top N rows by revenue
+        group_by: "product" | "variant" | "size" | "category" | "brand" (default product)
     
     Returns:
         {
             "report": [
                 {
-                    "product_id": int,
-                    "product_name": "string",
+                    "<group_by>_id": int,
+                    "<group_by>_name": "string",
                     "units_sold": int,
                     "revenue": number
                 },
@@ -110,61 +120,38 @@ def product_performance_report():
         }
     """
     try:
-        days = request.args.get('days', 30, type=int)
-        limit = request.args.get('limit', 20, type=int)
+        start_day, end_day = resolve_range(
+            days=request.args.get('days', 30, type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
         
-        # Get date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Import ProductVariant
-        from app.models.product_variant import ProductVariant
-        
-        # Query top selling products (aggregated across all variants)
-        results = db.session.query(
-            Product.id,
-            Product.name,
-            func.sum(SaleItem.quantity).label('units_sold'),
-            func.sum(SaleItem.quantity * SaleItem.price_at_sale).label('revenue')
-        ).join(
-            ProductVariant, Product.id == ProductVariant.product_id
-        ).join(
-            SaleItem, ProductVariant.id == SaleItem.variant_id  # CHANGED: variant_id instead of product_id
-        ).join(
-            Sale, SaleItem.sale_id == Sale.id
-        ).filter(
-            Sale.created_at >= start_date
-        ).group_by(
-            Product.id,
-            Product.name
-        ).order_by(
-            func.sum(SaleItem.quantity * SaleItem.price_at_sale).desc()
-        ).limit(limit).all()
-        
-        report = []
-        for row in results:
-            report.append({
-                'product_id': row.id,
-                'product_name': row.name,
-                'units_sold': int(row.units_sold),
-                'revenue': float(row.revenue)
-            })
+        group_by = request.args.get('group_by', 'product')
+        limit = request.args.get('limit', 20, type=int)
         
-        return jsonify({'report': report}), 200
+        return _report_response('products', (('group_by', group_by), ('limit', limit)), start_day, end_day, lambda: {
+            'report': ReportService.product_performance(start_day, end_day, group_by=group_by, limit=limit)
+        })
         
+    except RollupMissingError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Product performance report error: {str(e)}")  # For debugging
         return jsonify({'error': 'Failed to generate report'}), 500
 
 @report_bp.route('/payments', methods=['GET'])
 @jwt_required()
 @require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
 def payment_method_report():
     """
     Get payment method breakdown
     
     Query params:
-        days: int (default 30) - number of days to include
+        days: int (default 30) - number of reporting days to include, ending today
+        start, end: YYYY-MM-DD (optional) - explicit reporting day range
+        format: "json" | "csv" (default json)
     
     Returns:
         {
@@ -182,98 +169,226 @@ def payment_method_report():
         }
     """
     try:
-        days = request.args.get('days', 30, type=int)
-        
-        # Get date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Query payment methods
-        results = db.session.query(
-            Sale.payment_method,
-            func.sum(Sale.total_amount).label('total'),
-            func.count(Sale.id).label('count')
-        ).filter(
-            Sale.created_at >= start_date
-        ).group_by(
-            Sale.payment_method
-        ).all()
+        start_day, end_day = resolve_range(
+            days=request.args.get('days', 30, type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
         
-        # Calculate totals
-        grand_total = sum(float(row.total) for row in results)
-        total_transactions = sum(row.count for row in results)
-        
-        # Build report
-        report = {}
-        for row in results:
-            total_amount = float(row.total)
-            percentage = (total_amount / grand_total * 100) if grand_total > 0 else 0
-            
-            report[row.payment_method] = {
-                'total': total_amount,
-                'transaction_count': row.count,
-                'percentage': round(percentage, 2)
-            }
-        
-        return jsonify({
-            'report': report,
-            'total': grand_total,
-            'total_transactions': total_transactions
-        }), 200
+        return _report_response('payments', (), start_day, end_day, lambda: (
+            ReportService.payment_methods(start_day, end_day)
+        ))
         
+    except RollupMissingError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to generate report'}), 500
     
 @report_bp.route('/cashiers', methods=['GET'])
 @jwt_required()
 @require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
 def cashier_sales_report():
     """
-    Get sales report per cashier with payment breakdown
-    Query params: days (default 7)
+    Get sales report per cashier with payment breakdown and throughput
+    Query params: days (default 7), start/end (YYYY-MM-DD, optional), format (json | csv)
+    
+    Returns:
+        {
+            "report": [
+                {
+                    "cashier_id": int,
+                    "cashier_name": "string",
+                    "total_sales": number,
+                    "transaction_count": int,
+                    "cash": number,
+                    "card": number,
+                    "mobile": number,
+                    "items_sold": int,
+                    "active_hours": int,
+                    "transactions_per_hour": number,
+                    "avg_basket": number,
+                    "items_per_transaction": number
+                },
+                ...
+            ]
+        }
     """
     try:
-        days = request.args.get('days', 7, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        start_day, end_day = resolve_range(
+            days=request.args.get('days', 7, type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
+
+        return _report_response('cashiers', (), start_day, end_day, lambda: {
+            'report': ReportService.cashier_sales(start_day, end_day)
+        })
 
-        # Aggregate sales per cashier and payment method
-        results = db.session.query(
-            Sale.user_id,
-            Sale.payment_method,
-            func.sum(Sale.total_amount).label('total'),
-            func.count(Sale.id).label('count')
-        ).filter(
-            Sale.created_at >= start_date
-        ).group_by(
-            Sale.user_id,
-            Sale.payment_method
-        ).all()
+    except RollupMissingError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to generate cashier report: {str(e)}'}), 500
+
+
+@report_bp.route('/heatmap', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
+def sales_heatmap_report():
+    """
+    Get sales by weekday and hour of day (store-local), for till staffing
+    
+    Query params:
+        days: int (default 30) - number of reporting days to include, ending today
+        start, end: YYYY-MM-DD (optional) - explicit reporting day range
+        format: "json" | "csv" (default json)
+        interval: int (optional) - also return a series of buckets this many hours wide
+    
+    Returns:
+        {
+            "weekdays": ["monday", ..., "sunday"],
+            "hours": [0, ..., 23],
+            "transactions": [[int x 24] x 7],
+            "revenue": [[number x 24] x 7],
+            "items": [[int x 24] x 7],
+            "series": [{"start": "string", "transactions": int, "revenue": number, "items": int}]
+        }
+    """
+    try:
+        start_day, end_day = resolve_range(
+            days=request.args.get('days', 30, type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
+        
+        interval = request.args.get('interval', type=int)
+        params = (('interval', interval),) if interval else ()
+        
+        return _report_response('heatmap', params, start_day, end_day, lambda: (
+            ReportService.sales_heatmap(start_day, end_day, interval_hours=interval)
+        ))
+        
+    except RollupMissingError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate report'}), 500
 
-        # Build report
-        from app.models.user import User
-        cashier_data = {}
 
-        for row in results:
-            if row.user_id not in cashier_data:
-                user = db.session.query(User).filter_by(id=row.user_id).first()
-                cashier_data[row.user_id] = {
-                    'cashier_id': row.user_id,
-                    'cashier_name': user.username if user else 'Unknown',
-                    'total_sales': 0,
-                    'transaction_count': 0,
-                    'cash': 0,
-                    'card': 0,
-                    'mobile': 0
-                }
 
-            cashier_data[row.user_id]['total_sales'] += float(row.total)
-            cashier_data[row.user_id]['transaction_count'] += row.count
-            cashier_data[row.user_id][row.payment_method] = float(row.total)
+@report_bp.route('/query', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
+def analytics_query():
+    """
+    Ad-hoc sales analysis (pivots, margins, basket statistics)
+    
+    Request body:
+        {
+            "days": int (default 30) or "start"/"end": "YYYY-MM-DD",
+            "group_by": ["category" | "brand" | "size" | "product" | "variant" |
+                         "cashier" | "payment_method" | "hour" | "weekday" | "day", ...] (max 3),
+            "metrics": ["revenue" | "units" | "lines" | "transactions" | "avg_price" |
+                        "margin_over_min" | "discount_from_max" | "price_position" |
+                        "basket_value" | "basket_size", ...],
+            "filters": {"<dimension>": [value, ...]} (optional),
+            "order_by": "<metric>", "order": "asc" | "desc",
+            "limit": int (default 100, max 1000)
+        }
+    
+    Returns:
+        {
+            "start": "string",
+            "end": "string",
+            "group_by": [...],
+            "metrics": [...],
+            "group_count": int,
+            "rows": [{"<dimension>": ..., "<dimension>_name": "string", "<metric>": number, ...}],
+            "summary": {
+                "lines": int,
+                "transactions": int,
+                "revenue": number,
+                "units": int,
+                "basket": {"avg_value", "avg_size", "p50_value", "p90_value", "size_distribution"}
+            }
+        }
+    """
+    try:
+        data = request.get_json()
+        
+        if data is None:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        return jsonify(AnalyticsService.query(data)), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to run query'}), 500
 
-        report = sorted(cashier_data.values(), key=lambda x: x['total_sales'], reverse=True)
 
-        return jsonify({'report': report}), 200
 
+@report_bp.route('/affinity', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+@statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
+def basket_affinity_report():
+    """
+    Get items most often bought together with a product or variant
+    
+    Counts cover closed reporting days merged by `flask rollups affinity`.
+    
+    Query params:
+        product_id: int, or variant_id: int (one is required)
+        sort: "lift" | "confidence" | "count" (default lift)
+        limit: int (default 10)
+        min_count: int (default 2) - ignore pairs seen in fewer sales
+    
+    Returns:
+        {
+            "item_id": int,
+            "level": "product" | "variant",
+            "baskets": int,
+            "item_baskets": int,
+            "processed_through": "string",
+            "associations": [
+                {
+                    "item_id": int,
+                    "name": "string",
+                    "count": int,
+                    "support": number,
+                    "confidence": number,
+                    "lift": number
+                },
+                ...
+            ]
+        }
+    """
+    try:
+        product_id = request.args.get('product_id', type=int)
+        variant_id = request.args.get('variant_id', type=int)
+        
+        if (product_id is None) == (variant_id is None):
+            return jsonify({'error': 'Provide either product_id or variant_id'}), 400
+        
+        report = AffinityService.associations(
+            product_id if product_id is not None else variant_id,
+            level='product' if product_id is not None else 'variant',
+            sort=request.args.get('sort', 'lift'),
+            limit=min(request.args.get('limit', 10, type=int), 100),
+            min_count=request.args.get('min_count', 2, type=int)
+        )
+        
+        return jsonify(report), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Failed to generate cashier report: {str(e)}'}), 500
+        return jsonify({'error': 'Failed to generate report'}), 500
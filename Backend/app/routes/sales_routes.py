@@ -2,6 +2,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.sales_service import SalesService
+from app.utils.db_routing import read_replica
+from app.utils.http_cache import conditional
+from app.models.sale import Sale
+from app.models.user import User
 
 sales_bp = Blueprint('sales', __name__)
 
@@ -63,6 +67,8 @@ def create_sale():
 
 @sales_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
+@conditional(Sale, User)
 def get_sales():
     """
     Get all sales with pagination
@@ -81,10 +87,10 @@ def get_sales():
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        sales = SalesService.get_all_sales(limit=limit, offset=offset)
+        sales = SalesService.get_sale_rows(limit=limit, offset=offset)
         
         return jsonify({
-            'sales': [sale.to_dict() for sale in sales],
+            'sales': sales,
             'count': len(sales)
         }), 200
         
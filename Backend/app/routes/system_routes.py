@@ -0,0 +1,39 @@
+# app/routes/system_routes.py
+"""
+System Routes
+"""
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app.extensions import db
+from app.utils.db_pool import pool_stats
+from app.utils.permissions import require_role
+
+system_bp = Blueprint('system', __name__)
+
+
+@system_bp.route('/pool', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def get_pool_stats():
+    """
+    Database connection pool usage in this worker (Admin only)
+    
+    Returns:
+        {
+            "engines": {
+                "primary": {
+                    "pool": "string",
+                    "status": "string",
+                    "size": int,
+                    "checked_out": int,
+                    "checked_in": int,
+                    "overflow": int
+                },
+                "replica": {...} (when configured)
+            }
+        }
+    """
+    try:
+        return jsonify({'engines': pool_stats(db.engines)}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to read pool stats'}), 500
@@ -0,0 +1,277 @@
+# app/services/affinity_service.py
+from collections import Counter
+from datetime import timedelta
+from itertools import combinations, groupby
+from sqlalchemy import or_
+from app.extensions import db
+from app.models.sale import Sale, SaleItem
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.models.basket_affinity import BasketItemCount, BasketPairCount, BasketAffinityState
+from app.utils.bulk import dialect_insert
+from app.utils.db_routing import read_replica
+from app.utils.reporting import day_bounds, reporting_day, reporting_key, today
+
+
+class AffinityService:
+    """
+    Frequently-bought-together analysis
+
+    Baskets (sales) are read one closed reporting day at a time, item and
+    pair occurrences are counted in memory with hashed counters, and the
+    counts are merged into basket_item_counts / basket_pair_counts with
+    INSERT ... ON CONFLICT DO UPDATE. Each day is committed together with
+    the job state, so the job can be stopped and resumed at any point.
+    """
+
+    LEVELS = ['product', 'variant']
+
+    # Baskets with more distinct items still count towards item totals but
+    # are left out of pair counting (pairs grow quadratically)
+    MAX_PAIR_ITEMS = 50
+
+    UPSERT_BATCH_SIZE = 1000
+
+    SORT_KEYS = ['lift', 'confidence', 'count']
+
+    @staticmethod
+    def process(start_day=None, through_day=None):
+        """
+        Merge every closed reporting day not yet processed
+
+        Args:
+            start_day: First day to process when the job has never run
+                       (default: day of the first sale)
+            through_day: Last day to process (default: yesterday)
+
+        Returns:
+            int: Number of days merged
+
+        Raises:
+            ValueError: If the reporting timezone/cutoff changed since the job
+                        started (run rebuild instead)
+        """
+        key = reporting_key()
+        through_day = min(through_day or today() - timedelta(days=1), today() - timedelta(days=1))
+
+        state = db.session.query(BasketAffinityState).first()
+        if state is not None:
+            if state.timezone != key:
+                raise ValueError('Reporting timezone or cutoff changed; rebuild basket affinity')
+            day = state.processed_through + timedelta(days=1)
+        else:
+            day = start_day or AffinityService._first_sale_day()
+            if day is None:
+                return 0
+
+        processed = 0
+        while day <= through_day:
+            try:
+                AffinityService._merge_day(day, key)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise Exception(f'Failed to process basket affinity for {day}: {str(e)}')
+            processed += 1
+            day += timedelta(days=1)
+
+        return processed
+
+    @staticmethod
+    def rebuild(start_day=None, through_day=None):
+        """Clear all counts and reprocess from start_day (default: first sale)"""
+        try:
+            for model in [BasketPairCount, BasketItemCount, BasketAffinityState]:
+                db.session.query(model).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f'Failed to reset basket affinity: {str(e)}')
+
+        return AffinityService.process(start_day=start_day, through_day=through_day)
+
+    @staticmethod
+    def _first_sale_day():
+        first = db.session.query(db.func.min(Sale.created_at)).scalar()
+        return reporting_day(first) if first else None
+
+    @staticmethod
+    def _merge_day(day, key):
+        """Count one reporting day's baskets and merge them (caller commits)"""
+        start, end = day_bounds(day, day)
+
+        rows = db.session.query(
+            SaleItem.sale_id,
+            ProductVariant.product_id,
+            SaleItem.variant_id
+        ).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).join(
+            ProductVariant, SaleItem.variant_id == ProductVariant.id
+        ).filter(
+            Sale.created_at >= start,
+            Sale.created_at < end
+        ).order_by(
+            SaleItem.sale_id
+        ).execution_options(yield_per=AffinityService.UPSERT_BATCH_SIZE)
+
+        items = {level: Counter() for level in AffinityService.LEVELS}
+        pairs = {level: Counter() for level in AffinityService.LEVELS}
+        baskets = 0
+
+        for _, lines in groupby(rows, key=lambda row: row.sale_id):
+            lines = list(lines)
+            baskets += 1
+
+            basket = {
+                'product': sorted({line.product_id for line in lines}),
+                'variant': sorted({line.variant_id for line in lines})
+            }
+
+            for level, ids in basket.items():
+                items[level].update(ids)
+                if len(ids) <= AffinityService.MAX_PAIR_ITEMS:
+                    pairs[level].update(combinations(ids, 2))
+
+        for level in AffinityService.LEVELS:
+            AffinityService._upsert(BasketItemCount, ['level', 'item_id'], [
+                {'level': level, 'item_id': item_id, 'basket_count': count}
+                for item_id, count in items[level].items()
+            ])
+            AffinityService._upsert(BasketPairCount, ['level', 'item_a', 'item_b'], [
+                {'level': level, 'item_a': a, 'item_b': b, 'basket_count': count}
+                for (a, b), count in pairs[level].items()
+            ])
+
+        state = db.session.query(BasketAffinityState).first()
+        if state is None:
+            state = BasketAffinityState(timezone=key, first_day=day, processed_through=day, basket_count=0)
+            db.session.add(state)
+
+        state.processed_through = day
+        state.basket_count += baskets
+
+    @staticmethod
+    def _upsert(model, index_elements, rows):
+        """Add basket_count onto existing rows, in batches"""
+        for i in range(0, len(rows), AffinityService.UPSERT_BATCH_SIZE):
+            stmt = dialect_insert(model).values(rows[i:i + AffinityService.UPSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={
+                    'basket_count': model.basket_count + stmt.excluded.basket_count,
+                    'updated_at': db.func.now()
+                }
+            )
+            db.session.execute(stmt)
+
+    @staticmethod
+    @read_replica
+    def associations(item_id, level='product', sort='lift', limit=10, min_count=2):
+        """
+        Items most often bought together with item_id
+
+        For the pair (A = item_id, B):
+            support = baskets(A and B) / baskets
+            confidence = baskets(A and B) / baskets(A)
+            lift = confidence / (baskets(B) / baskets)
+
+        Args:
+            level: 'product' or 'variant'
+            sort: 'lift', 'confidence' or 'count'
+            min_count: Ignore pairs seen in fewer baskets than this
+
+        Returns:
+            dict: {'item_id', 'level', 'baskets', 'item_baskets', 'processed_through',
+                   'associations': [{'item_id', 'name', 'count', 'support', 'confidence', 'lift'}]}
+        """
+        if level not in AffinityService.LEVELS:
+            raise ValueError(f'Invalid level. Must be one of {AffinityService.LEVELS}')
+
+        if sort not in AffinityService.SORT_KEYS:
+            raise ValueError(f'Invalid sort. Must be one of {AffinityService.SORT_KEYS}')
+
+        state = db.session.query(BasketAffinityState).first()
+        baskets = state.basket_count if state else 0
+
+        item_baskets = db.session.query(BasketItemCount.basket_count).filter_by(
+            level=level, item_id=item_id
+        ).scalar() or 0
+
+        result = {
+            'item_id': item_id,
+            'level': level,
+            'baskets': baskets,
+            'item_baskets': item_baskets,
+            'processed_through': state.processed_through.isoformat() if state else None,
+            'associations': []
+        }
+
+        if not baskets or not item_baskets:
+            return result
+
+        pairs = db.session.query(
+            BasketPairCount.item_a,
+            BasketPairCount.item_b,
+            BasketPairCount.basket_count
+        ).filter(
+            BasketPairCount.level == level,
+            or_(BasketPairCount.item_a == item_id, BasketPairCount.item_b == item_id),
+            BasketPairCount.basket_count >= min_count
+        ).all()
+
+        together = {
+            (pair.item_b if pair.item_a == item_id else pair.item_a): pair.basket_count
+            for pair in pairs
+        }
+        if not together:
+            return result
+
+        other_baskets = dict(db.session.query(
+            BasketItemCount.item_id,
+            BasketItemCount.basket_count
+        ).filter(
+            BasketItemCount.level == level,
+            BasketItemCount.item_id.in_(together)
+        ).all())
+
+        associations = []
+        for other_id, count in together.items():
+            confidence = count / item_baskets
+            other_share = other_baskets.get(other_id, 0) / baskets
+            associations.append({
+                'item_id': other_id,
+                'count': count,
+                'support': round(count / baskets, 6),
+                'confidence': round(confidence, 4),
+                'lift': round(confidence / other_share, 4) if other_share else 0
+            })
+
+        associations.sort(key=lambda a: (a[sort], a['count']), reverse=True)
+        associations = associations[:limit]
+
+        names = AffinityService._names(level, [a['item_id'] for a in associations])
+        for association in associations:
+            association['name'] = names.get(association['item_id'])
+
+        result['associations'] = associations
+        return result
+
+    @staticmethod
+    def _names(level, ids):
+        if level == 'product':
+            return dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(ids)).all())
+
+        return {
+            row.id: f'{row.product_name} ({row.size_name})'
+            for row in db.session.query(
+                ProductVariant.id,
+                Product.name.label('product_name'),
+                Size.name.label('size_name')
+            ).join(
+                Product, ProductVariant.product_id == Product.id
+            ).join(
+                Size, ProductVariant.size_id == Size.id
+            ).filter(ProductVariant.id.in_(ids))
+        }
@@ -0,0 +1,530 @@
+# app/services/analytics_service.py
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, case, func
+from app.extensions import db
+from app.models.sale import Sale, SaleItem
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.user import User
+from app.utils.money import from_cents
+from app.utils.reporting import resolve_range, day_bounds, reporting_day, to_local
+from app.utils.db_routing import read_replica
+
+
+class AnalyticsService:
+    """
+    Ad-hoc sales analysis over columnar arrays
+
+    Sale lines for a reporting-day range are read from a server-side cursor in
+    batches of NumPy column arrays, ordered by sale so no sale spans two
+    batches. Each batch is reduced to per-group sums (np.unique / np.bincount)
+    and dropped, so a query holds one batch, the running group sums and one
+    value per sale (for the basket percentiles), whatever the line count.
+    No ORM objects are built.
+    """
+
+    PAYMENT_METHODS = ['cash', 'card', 'mobile']
+    WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+    # Dimensions backed by an extracted column (filtered in SQL) or derived from created_at
+    DIMENSIONS = ['category', 'brand', 'size', 'product', 'variant', 'cashier',
+                  'payment_method', 'hour', 'weekday', 'day']
+    DERIVED_DIMENSIONS = ['hour', 'weekday', 'day']
+
+    METRICS = ['revenue', 'units', 'lines', 'transactions', 'avg_price',
+               'margin_over_min', 'discount_from_max', 'price_position',
+               'basket_value', 'basket_size']
+    DEFAULT_METRICS = ['revenue', 'units', 'transactions']
+
+    MAX_GROUP_BY = 3
+    MAX_FILTER_VALUES = 100
+    MAX_LIMIT = 1000
+    DEFAULT_LIMIT = 100
+    MAX_RANGE_DAYS = 731
+
+    # Running per-group sums, one column each
+    SUMS = ['lines', 'units', 'revenue', 'margin_over_min', 'discount_from_max',
+            'position_units', 'transactions', 'basket_value', 'basket_units']
+
+    # Basket sizes are counted up to this many units ('10' = 10 or more)
+    MAX_BASKET_SIZE = 10
+
+    # Local time is resolved once per distinct 15-minute UTC slot (covers :30 and :45 offsets)
+    SLOT_SECONDS = 900
+
+    @staticmethod
+    def _columns():
+        """Extracted column name -> (SQL expression, NumPy dtype)"""
+        return {
+            'sale_id': (SaleItem.sale_id, np.int64),
+            'created_at': (Sale.created_at, 'datetime64[s]'),
+            'cashier': (Sale.user_id, np.int64),
+            'payment_method': (case(
+                *[(Sale.payment_method == method, code)
+                  for code, method in enumerate(AnalyticsService.PAYMENT_METHODS)],
+                else_=-1
+            ), np.int64),
+            'variant': (SaleItem.variant_id, np.int64),
+            'product': (ProductVariant.product_id, np.int64),
+            'size': (ProductVariant.size_id, np.int64),
+            'category': (func.coalesce(Product.category_id, -1), np.int64),
+            'brand': (func.coalesce(Product.brand_id, -1), np.int64),
+            'quantity': (SaleItem.quantity, np.int64),
+            'price_cents': (SaleItem.price_at_sale_cents, np.int64),
+            'min_price_cents': (Product.min_price_cents, np.int64),
+            'max_price_cents': (Product.max_price_cents, np.int64)
+        }
+
+    @staticmethod
+    def extract(start_day, end_day, filters=None, batch_size=None, max_rows=None):
+        """
+        Read sale lines for reporting days start_day..end_day as column-array batches
+
+        Lines come ordered by sale and the last sale of each fetch is held
+        back until its remaining lines arrive, so every sale sits in exactly
+        one batch.
+
+        Args:
+            filters: {column: [values]} applied in SQL (extracted columns only)
+            batch_size: Rows per cursor fetch
+            max_rows: Raise instead of reading more rows than this
+
+        Yields:
+            dict: {column: np.ndarray}, all of equal length
+
+        Raises:
+            ValueError: If the range holds more than max_rows lines
+        """
+        columns = AnalyticsService._columns()
+        batch_size = batch_size or current_app.config.get('ANALYTICS_BATCH_SIZE', 5000)
+        max_rows = max_rows or current_app.config.get('ANALYTICS_MAX_ROWS', 500000)
+
+        start, end = day_bounds(start_day, end_day)
+
+        stmt = select(
+            *[expression for expression, _ in columns.values()]
+        ).select_from(
+            SaleItem
+        ).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).join(
+            ProductVariant, SaleItem.variant_id == ProductVariant.id
+        ).join(
+            Product, ProductVariant.product_id == Product.id
+        ).where(
+            Sale.created_at >= start,
+            Sale.created_at < end
+        ).order_by(
+            SaleItem.sale_id
+        )
+
+        for name, values in (filters or {}).items():
+            stmt = stmt.where(columns[name][0].in_(values))
+
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+
+        carry = None
+        rows = 0
+        try:
+            for batch in result.partitions():
+                rows += len(batch)
+                if rows > max_rows:
+                    raise ValueError(f'Query covers more than {max_rows} sale lines; narrow the range or add filters')
+
+                data = {
+                    name: np.array(values, dtype=dtype)
+                    for (name, (_, dtype)), values in zip(columns.items(), zip(*batch))
+                }
+                if carry is not None:
+                    data = {name: np.concatenate([carry[name], values]) for name, values in data.items()}
+
+                complete = data['sale_id'] != data['sale_id'][-1]
+                carry = {name: values[~complete] for name, values in data.items()}
+                if complete.any():
+                    yield {name: values[complete] for name, values in data.items()}
+
+            if carry is not None:
+                yield carry
+        finally:
+            result.close()
+
+    @staticmethod
+    def _local_time(created_at):
+        """
+        Store-local hour, weekday and reporting day (ordinal) per line
+
+        Timezone conversion runs once per distinct 15-minute UTC slot and is
+        broadcast back to the lines with the inverse index.
+        """
+        slots, inverse = np.unique(
+            created_at.astype(np.int64) // AnalyticsService.SLOT_SECONDS,
+            return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+
+        hours = np.empty(len(slots), dtype=np.int64)
+        weekdays = np.empty(len(slots), dtype=np.int64)
+        days = np.empty(len(slots), dtype=np.int64)
+
+        for i, slot in enumerate(slots.tolist()):
+            utc_dt = datetime(1970, 1, 1) + timedelta(seconds=slot * AnalyticsService.SLOT_SECONDS)
+            local = to_local(utc_dt)
+            hours[i] = local.hour
+            weekdays[i] = local.weekday()
+            days[i] = reporting_day(utc_dt).toordinal()
+
+        return {
+            'hour': hours[inverse],
+            'weekday': weekdays[inverse],
+            'day': days[inverse]
+        }
+
+    @staticmethod
+    def parse_query(spec):
+        """
+        Validate a query spec against the bounded grammar
+
+        {
+            "days": int (default 30) | "start", "end": "YYYY-MM-DD",
+            "group_by": [dimension, ...] (at most 3),
+            "metrics": [metric, ...] (default revenue, units, transactions),
+            "filters": {dimension: [value, ...]} (not "day"; hour 0-23, weekday 0-6 Monday first,
+                                                 payment_method names, ids otherwise),
+            "order_by": metric (default first metric), "order": "asc" | "desc" (default desc),
+            "limit": int (default 100, at most 1000)
+        }
+
+        Raises:
+            ValueError: If the spec is outside the grammar
+        """
+        if not isinstance(spec, dict):
+            raise ValueError('Query must be a JSON object')
+
+        unknown = set(spec) - {'days', 'start', 'end', 'group_by', 'metrics',
+                               'filters', 'order_by', 'order', 'limit'}
+        if unknown:
+            raise ValueError(f'Unknown query fields: {sorted(unknown)}')
+
+        days = spec.get('days', 30)
+        if not isinstance(days, int) or isinstance(days, bool):
+            raise ValueError('days must be an integer')
+
+        start_day, end_day = resolve_range(days=days, start=spec.get('start'), end=spec.get('end'))
+        if (end_day - start_day).days + 1 > AnalyticsService.MAX_RANGE_DAYS:
+            raise ValueError(f'Range cannot exceed {AnalyticsService.MAX_RANGE_DAYS} days')
+
+        group_by = spec.get('group_by') or []
+        if not isinstance(group_by, list) or len(group_by) > AnalyticsService.MAX_GROUP_BY:
+            raise ValueError(f'group_by must be a list of at most {AnalyticsService.MAX_GROUP_BY} dimensions')
+        for dimension in group_by:
+            if dimension not in AnalyticsService.DIMENSIONS:
+                raise ValueError(f'Invalid dimension {dimension}. Must be one of {AnalyticsService.DIMENSIONS}')
+        if len(set(group_by)) != len(group_by):
+            raise ValueError('group_by dimensions must be unique')
+
+        metrics = spec.get('metrics') or AnalyticsService.DEFAULT_METRICS
+        if not isinstance(metrics, list):
+            raise ValueError('metrics must be a list')
+        for metric in metrics:
+            if metric not in AnalyticsService.METRICS:
+                raise ValueError(f'Invalid metric {metric}. Must be one of {AnalyticsService.METRICS}')
+
+        filters = {}
+        raw_filters = spec.get('filters') or {}
+        if not isinstance(raw_filters, dict):
+            raise ValueError('filters must be an object')
+        for dimension, values in raw_filters.items():
+            if dimension not in AnalyticsService.DIMENSIONS or dimension == 'day':
+                raise ValueError(f'Cannot filter on {dimension}')
+            if not isinstance(values, list) or not 0 < len(values) <= AnalyticsService.MAX_FILTER_VALUES:
+                raise ValueError(f'filters.{dimension} must be a list of 1 to {AnalyticsService.MAX_FILTER_VALUES} values')
+
+            if dimension == 'payment_method':
+                if any(value not in AnalyticsService.PAYMENT_METHODS for value in values):
+                    raise ValueError(f'Invalid payment method. Must be one of {AnalyticsService.PAYMENT_METHODS}')
+                values = [AnalyticsService.PAYMENT_METHODS.index(value) for value in values]
+            elif any(not isinstance(value, int) or isinstance(value, bool) for value in values):
+                raise ValueError(f'filters.{dimension} values must be integers')
+
+            filters[dimension] = values
+
+        order_by = spec.get('order_by', metrics[0])
+        if order_by not in metrics:
+            raise ValueError('order_by must be one of the requested metrics')
+
+        order = spec.get('order', 'desc')
+        if order not in ['asc', 'desc']:
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        limit = spec.get('limit', AnalyticsService.DEFAULT_LIMIT)
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 0 < limit <= AnalyticsService.MAX_LIMIT:
+            raise ValueError(f'limit must be between 1 and {AnalyticsService.MAX_LIMIT}')
+
+        return {
+            'start_day': start_day,
+            'end_day': end_day,
+            'group_by': group_by,
+            'metrics': metrics,
+            'filters': filters,
+            'order_by': order_by,
+            'order': order,
+            'limit': limit
+        }
+
+    @staticmethod
+    @read_replica
+    def query(spec):
+        """
+        Run a query spec (see parse_query)
+
+        Margins are measured against the products' current price ranges.
+        basket_value / basket_size are the average value / units of the sales
+        containing each group, counting only lines that match the filters.
+
+        Returns:
+            dict: {'start', 'end', 'group_by', 'metrics', 'group_count',
+                   'rows': [{<dimension>, <dimension>_name, <metric>, ...}],
+                   'summary': {'lines', 'transactions', 'revenue', 'units', 'basket': {...}}}
+        """
+        query = AnalyticsService.parse_query(spec)
+
+        sql_filters = {
+            dimension: values for dimension, values in query['filters'].items()
+            if dimension not in AnalyticsService.DERIVED_DIMENSIONS
+        }
+        needs_local = bool((set(query['group_by']) | set(query['filters'])) & set(AnalyticsService.DERIVED_DIMENSIONS))
+
+        keys = np.empty((0, max(len(query['group_by']), 1)), dtype=np.int64)
+        sums = np.zeros((0, len(AnalyticsService.SUMS)))
+        sale_values = []
+        basket_sizes = np.zeros(AnalyticsService.MAX_BASKET_SIZE + 1, dtype=np.int64)
+
+        for data in AnalyticsService.extract(query['start_day'], query['end_day'], filters=sql_filters):
+            if needs_local:
+                data.update(AnalyticsService._local_time(data['created_at']))
+
+            # Derived-dimension filters run on the arrays
+            mask = None
+            for dimension in AnalyticsService.DERIVED_DIMENSIONS:
+                if dimension in query['filters']:
+                    selected = np.isin(data[dimension], query['filters'][dimension])
+                    mask = selected if mask is None else mask & selected
+            if mask is not None:
+                data = {name: values[mask] for name, values in data.items()}
+            if not len(data['sale_id']):
+                continue
+
+            batch_keys, batch_sums, sale_value, sale_units = AnalyticsService._batch_sums(query['group_by'], data)
+            keys, sums = AnalyticsService._merge(keys, sums, batch_keys, batch_sums)
+
+            sale_values.append(sale_value)
+            basket_sizes += np.bincount(
+                np.minimum(sale_units.astype(np.int64), AnalyticsService.MAX_BASKET_SIZE),
+                minlength=len(basket_sizes)
+            )
+
+        groups = len(keys)
+        totals = dict(zip(AnalyticsService.SUMS, sums.sum(axis=0)))
+        values = AnalyticsService._metrics(query['metrics'], sums)
+
+        # Order and cut on the raw (cents) values
+        order = np.argsort(values[query['order_by']], kind='stable')
+        if query['order'] == 'desc':
+            order = order[::-1]
+        order = order[:query['limit']]
+
+        labels = AnalyticsService._labels(query['group_by'], keys[order])
+
+        rows = []
+        for position, index in enumerate(order.tolist()):
+            row = {}
+            for dimension in query['group_by']:
+                row.update(labels[dimension][position])
+            for metric in query['metrics']:
+                row[metric] = AnalyticsService._present(metric, values[metric][index])
+            rows.append(row)
+
+        sale_values = np.concatenate(sale_values) if sale_values else np.empty(0)
+
+        return {
+            'start': query['start_day'].isoformat(),
+            'end': query['end_day'].isoformat(),
+            'group_by': query['group_by'],
+            'metrics': query['metrics'],
+            'group_count': groups,
+            'rows': rows,
+            'summary': {
+                'lines': int(totals['lines']),
+                'transactions': len(sale_values),
+                'revenue': from_cents(int(round(totals['revenue']))),
+                'units': int(totals['units']),
+                'basket': AnalyticsService._basket_summary(sale_values, basket_sizes, totals['units'])
+            }
+        }
+
+    @staticmethod
+    def _batch_sums(group_by, data):
+        """
+        One batch's group keys and per-group SUMS, plus each sale's value and units
+
+        Returns:
+            tuple: (keys, sums, sale_value, sale_units)
+        """
+        quantity = data['quantity']
+        revenue = quantity * data['price_cents']
+
+        sale_ids, sale_index = np.unique(data['sale_id'], return_inverse=True)
+        sale_index = sale_index.reshape(-1)
+        sale_value = np.bincount(sale_index, weights=revenue, minlength=len(sale_ids))
+        sale_units = np.bincount(sale_index, weights=quantity, minlength=len(sale_ids))
+
+        key_columns = [data[dimension] for dimension in group_by] or [np.zeros(len(quantity), dtype=np.int64)]
+        keys, group_index = np.unique(np.stack(key_columns, axis=1), axis=0, return_inverse=True)
+        group_index = group_index.reshape(-1)
+        groups = len(keys)
+
+        def total(index, weights=None):
+            return np.bincount(index, weights=weights, minlength=groups)
+
+        # Where in [min, max] each unit sold: 0 = at minimum, 1 = at maximum
+        spread = data['max_price_cents'] - data['min_price_cents']
+        position = np.divide(
+            data['price_cents'] - data['min_price_cents'], spread,
+            out=np.zeros(len(spread)), where=spread > 0
+        )
+
+        # Each (group, sale) once: transactions and the baskets they came in
+        pairs = np.unique(np.stack([group_index, sale_index], axis=1), axis=0)
+
+        sums = np.column_stack([
+            total(group_index),
+            total(group_index, quantity),
+            total(group_index, revenue),
+            total(group_index, revenue - quantity * data['min_price_cents']),
+            total(group_index, quantity * data['max_price_cents'] - revenue),
+            total(group_index, quantity * position),
+            total(pairs[:, 0]),
+            total(pairs[:, 0], sale_value[pairs[:, 1]]),
+            total(pairs[:, 0], sale_units[pairs[:, 1]])
+        ])
+
+        return keys, sums, sale_value, sale_units
+
+    @staticmethod
+    def _merge(keys, sums, batch_keys, batch_sums):
+        """Add a batch's per-group sums onto the running ones"""
+        merged, index = np.unique(np.concatenate([keys, batch_keys]), axis=0, return_inverse=True)
+        totals = np.zeros((len(merged), sums.shape[1]))
+        np.add.at(totals, index.reshape(-1), np.concatenate([sums, batch_sums]))
+        return merged, totals
+
+    @staticmethod
+    def _metrics(metrics, sums):
+        """Per-group metric values from the merged SUMS (money in cents)"""
+        column = dict(zip(AnalyticsService.SUMS, sums.T))
+
+        def ratio(numerator, denominator):
+            return np.divide(numerator, denominator, out=np.zeros(len(denominator)), where=denominator > 0)
+
+        derived = {
+            'avg_price': ('revenue', 'units'),
+            'price_position': ('position_units', 'units'),
+            'basket_value': ('basket_value', 'transactions'),
+            'basket_size': ('basket_units', 'transactions')
+        }
+
+        computed = {}
+        for metric in metrics:
+            if metric in derived:
+                numerator, denominator = derived[metric]
+                computed[metric] = ratio(column[numerator], column[denominator])
+            else:
+                computed[metric] = column[metric]
+
+        return computed
+
+    @staticmethod
+    def _present(metric, value):
+        """JSON value for a metric (money back to currency units)"""
+        if metric in ['revenue', 'avg_price', 'margin_over_min', 'discount_from_max', 'basket_value']:
+            return from_cents(int(round(float(value))))
+        if metric in ['price_position', 'basket_size']:
+            return round(float(value), 4)
+        return int(round(float(value)))
+
+    @staticmethod
+    def _basket_summary(sale_values, basket_sizes, units):
+        if not len(sale_values):
+            return {'avg_value': 0, 'avg_size': 0, 'p50_value': 0, 'p90_value': 0, 'size_distribution': {}}
+
+        p50, p90 = np.percentile(sale_values, [50, 90])
+
+        return {
+            'avg_value': from_cents(int(round(sale_values.mean()))),
+            'avg_size': round(float(units) / len(sale_values), 2),
+            'p50_value': from_cents(int(round(p50))),
+            'p90_value': from_cents(int(round(p90))),
+            # Number of sales by units in the basket ('10' = 10 or more)
+            'size_distribution': {str(size): int(count) for size, count in enumerate(basket_sizes.tolist()) if count}
+        }
+
+    @staticmethod
+    def _labels(group_by, keys):
+        """Per dimension, a list of {dimension: value, dimension_name: ...} for each key row"""
+        lookups = {
+            'category': Category,
+            'brand': Brand,
+            'size': Size
+        }
+
+        labels = {}
+        for column, dimension in enumerate(group_by):
+            ids = keys[:, column].tolist()
+
+            if dimension in lookups:
+                model = lookups[dimension]
+                names = dict(db.session.query(model.id, model.name).filter(model.id.in_(ids)).all())
+                labels[dimension] = [
+                    {dimension: value if value >= 0 else None, f'{dimension}_name': names.get(value)}
+                    for value in ids
+                ]
+            elif dimension == 'product':
+                names = dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(ids)).all())
+                labels[dimension] = [{'product': value, 'product_name': names.get(value)} for value in ids]
+            elif dimension == 'variant':
+                names = {
+                    row.id: f'{row.product_name} ({row.size_name})'
+                    for row in db.session.query(
+                        ProductVariant.id,
+                        Product.name.label('product_name'),
+                        Size.name.label('size_name')
+                    ).join(
+                        Product, ProductVariant.product_id == Product.id
+                    ).join(
+                        Size, ProductVariant.size_id == Size.id
+                    ).filter(ProductVariant.id.in_(ids))
+                }
+                labels[dimension] = [{'variant': value, 'variant_name': names.get(value)} for value in ids]
+            elif dimension == 'cashier':
+                names = dict(db.session.query(User.id, User.username).filter(User.id.in_(ids)).all())
+                labels[dimension] = [{'cashier': value, 'cashier_name': names.get(value)} for value in ids]
+            elif dimension == 'payment_method':
+                labels[dimension] = [
+                    {'payment_method': AnalyticsService.PAYMENT_METHODS[value] if value >= 0 else None}
+                    for value in ids
+                ]
+            elif dimension == 'weekday':
+                labels[dimension] = [
+                    {'weekday': value, 'weekday_name': AnalyticsService.WEEKDAYS[value]} for value in ids
+                ]
+            elif dimension == 'day':
+                labels[dimension] = [{'day': datetime.fromordinal(value).date().isoformat()} for value in ids]
+            else:
+                labels[dimension] = [{dimension: value} for value in ids]
+
+        return labels
@@ -1,13 +1,41 @@
 """
 Authentication Service
 """
+import hashlib
+import hmac
+import re
 from app.extensions import db
 from app.models.user import User
-from flask_jwt_extended import create_access_token, create_refresh_token
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from app.utils.passwords import HasherBusyError
+from app.utils.identity_cache import identity_cache
+from app.utils.token_blocklist import token_blocklist
+from app.services.terminal_service import TerminalService
+from sqlalchemy import update
 
 
 class AuthService:
     
+    PIN_PATTERN = re.compile(r'^[0-9]{4,8}$')
+    
+    @staticmethod
+    def token_claims(user, **extra):
+        """
+        Claims carried by every token, so hot paths never load the user
+        
+        epoch is the user's auth_epoch when the token was issued; tokens
+        from an older epoch are rejected (see identity_cache). Only values
+        that cannot change without bumping the epoch belong here (email can).
+        """
+        claims = {
+            'role': user.role,
+            'username': user.username,
+            'epoch': user.auth_epoch or 0
+        }
+        claims.update(extra)
+        return claims
+    
     @staticmethod
     def authenticate(username, password):
         """
@@ -18,6 +46,8 @@ class AuthService:
         
         Raises:
             ValueError: If authentication fails
+            PasswordTooLongError: If the password is over 72 bytes (a ValueError)
+            HasherBusyError: If too many password checks are already queued
         """
         user = db.session.query(User).filter_by(username=username).first()
         
@@ -30,12 +60,30 @@ class AuthService:
         if not user.check_password(password):
             raise ValueError('Invalid username or password')
         
+        # A password login unlocks PIN quick-switch
+        if user.pin_failed_attempts:
+            user.pin_failed_attempts = 0
+            db.session.commit()
+        
+        # Upgrade the stored hash when BCRYPT_LOG_ROUNDS changed; never fail the login over it
+        try:
+            if user.rehash_password_if_needed(password):
+                db.session.commit()
+        except HasherBusyError:
+            pass
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning('Password rehash failed for user %s: %s', user.id, e)
+        
         # Create tokens
         access_token = create_access_token(
             identity=user.id,
-            additional_claims={'role': user.role}
+            additional_claims=AuthService.token_claims(user)
+        )
+        refresh_token = create_refresh_token(
+            identity=user.id,
+            additional_claims=AuthService.token_claims(user)
         )
-        refresh_token = create_refresh_token(identity=user.id)
         
         return {
             'access_token': access_token,
@@ -43,6 +91,136 @@ class AuthService:
             'user': user.to_dict()
         }
     
+    @staticmethod
+    def logout(jwt_payload, refresh_token=None):
+        """
+        Revoke the presented access token, and its refresh token if given
+        
+        Args:
+            jwt_payload: Decoded access token of the current request
+            refresh_token: Encoded refresh token from the same login (optional)
+        
+        Raises:
+            ValueError: If refresh_token is invalid or belongs to another user
+        """
+        refresh_payload = None
+        if refresh_token:
+            try:
+                refresh_payload = decode_token(refresh_token, allow_expired=True)
+            except Exception:
+                raise ValueError('Invalid refresh token')
+            
+            if refresh_payload.get('type') != 'refresh' or str(refresh_payload.get('sub')) != str(jwt_payload['sub']):
+                raise ValueError('Invalid refresh token')
+        
+        token_blocklist.revoke(jwt_payload)
+        if refresh_payload is not None:
+            token_blocklist.revoke(refresh_payload)
+    
+    @staticmethod
+    def _pin_digest(user_id, pin):
+        """Keyed hash of a PIN: HMAC-SHA256 under PIN_HASH_KEY, salted with the user id"""
+        key = current_app.config.get('PIN_HASH_KEY') or current_app.config['SECRET_KEY']
+        return hmac.new(
+            key.encode('utf-8'),
+            f'{user_id}:{pin}'.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+    
+    @staticmethod
+    def set_pin(user_id, pin):
+        """
+        Set (or replace) a user's quick-switch PIN
+        
+        Raises:
+            ValueError: If the user is not found or the PIN is not 4-8 digits
+        """
+        if not isinstance(pin, str) or not AuthService.PIN_PATTERN.match(pin):
+            raise ValueError('PIN must be 4 to 8 digits')
+        
+        user = db.session.query(User).filter_by(id=user_id).first()
+        if not user:
+            raise ValueError('User not found')
+        
+        user.pin_hash = AuthService._pin_digest(user.id, pin)
+        user.pin_failed_attempts = 0
+        db.session.commit()
+        
+        return user
+    
+    @staticmethod
+    def clear_pin(user_id):
+        """Remove a user's PIN (admin only)"""
+        user = db.session.query(User).filter_by(id=user_id).first()
+        if not user:
+            raise ValueError('User not found')
+        
+        user.pin_hash = None
+        user.pin_failed_attempts = 0
+        db.session.commit()
+        
+        return user
+    
+    @staticmethod
+    def switch_user(terminal_key, username, pin):
+        """
+        Quick-switch the cashier on a registered till with a PIN
+        
+        Issues a short-lived access token (PIN_TOKEN_EXPIRES) bound to the
+        terminal, with no refresh token. The token stops working as soon as
+        the terminal is deactivated. It carries cashier rights only, even for
+        an admin: a PIN is weaker than a password, so admin work needs a
+        password login. After PIN_MAX_ATTEMPTS wrong PINs the user must log
+        in with their password.
+        
+        Returns:
+            dict: {'access_token': str, 'expires_in': int, 'terminal': dict, 'user': dict}
+        
+        Raises:
+            ValueError: If the terminal, user or PIN is not accepted
+        """
+        terminal = TerminalService.resolve(terminal_key)
+        if not terminal:
+            raise ValueError('Unknown or inactive terminal')
+        
+        user = db.session.query(User).filter_by(username=username).first()
+        if not user or not user.is_active or user.pin_hash is None:
+            raise ValueError('Invalid username or PIN')
+        
+        if user.pin_failed_attempts >= current_app.config.get('PIN_MAX_ATTEMPTS', 5):
+            raise ValueError('PIN locked, log in with your password')
+        
+        if not isinstance(pin, str) or not hmac.compare_digest(
+            user.pin_hash, AuthService._pin_digest(user.id, pin)
+        ):
+            db.session.execute(
+                update(User).where(User.id == user.id).values(
+                    pin_failed_attempts=User.pin_failed_attempts + 1
+                )
+            )
+            db.session.commit()
+            raise ValueError('Invalid username or PIN')
+        
+        if user.pin_failed_attempts:
+            user.pin_failed_attempts = 0
+            db.session.commit()
+        
+        expires = current_app.config['PIN_TOKEN_EXPIRES']
+        access_token = create_access_token(
+            identity=user.id,
+            additional_claims=AuthService.token_claims(
+                user, role='cashier', terminal_id=terminal.id, pin=True
+            ),
+            expires_delta=expires
+        )
+        
+        return {
+            'access_token': access_token,
+            'expires_in': int(expires.total_seconds()),
+            'terminal': terminal.to_dict(),
+            'user': user.to_dict()
+        }
+    
     @staticmethod
     def create_user(username, email, password, role='cashier', created_by_admin=False):
         """
@@ -87,6 +265,7 @@ class AuthService:
         
         db.session.add(user)
         db.session.commit()
+        identity_cache.invalidate()
         
         return user
     
@@ -106,15 +285,19 @@ class AuthService:
         return db.session.query(User).all()
 
     @staticmethod
-    def update_user(user_id, email=None, role=None, password=None):
+    def update_user(user_id, email=None, role=None, password=None, is_active=None):
         """
         Update user information (admin only)
         
+        Changing the role, password or active flag revokes the user's
+        issued tokens (auth_epoch is bumped).
+        
         Args:
             user_id: ID of user to update
             email: New email (optional)
             role: New role (optional)
             password: New password (optional)
+            is_active: Activate / deactivate the account (optional)
         
         Returns:
             User object
@@ -138,10 +321,13 @@ class AuthService:
                 raise ValueError('Email already exists')
             user.email = email
         
+        revoke = False
+        
         # Update role if provided
         if role is not None:
             if role not in ['admin', 'cashier']:
                 raise ValueError('Role must be "admin" or "cashier"')
+            revoke = revoke or role != user.role
             user.role = role
         
         # Update password if provided
@@ -149,8 +335,17 @@ class AuthService:
             if len(password) < 8:
                 raise ValueError('Password must be at least 8 characters')
             user.password = password  # Setter will hash it
+            revoke = True
+        
+        if is_active is not None:
+            revoke = revoke or bool(is_active) != user.is_active
+            user.is_active = bool(is_active)
+        
+        if revoke:
+            user.auth_epoch = (user.auth_epoch or 0) + 1
         
         db.session.commit()
+        identity_cache.invalidate()
         return user
 
     @staticmethod
@@ -178,5 +373,6 @@ class AuthService:
         
         db.session.delete(user)
         db.session.commit()
+        identity_cache.invalidate()
         
         return True
\ No newline at end of file
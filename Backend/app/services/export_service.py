@@ -0,0 +1,165 @@
+# app/services/export_service.py
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import select
+from app.extensions import db
+from app.utils.db_pool import statement_timeout
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.models.category import Category
+from app.models.brand import Brand
+
+
+class ExportService:
+
+    SUPPORTED_FORMATS = ['csv', 'ndjson', 'columnar']
+    DEFAULT_BATCH_SIZE = 1000
+
+    MIMETYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+        'columnar': 'application/x-ndjson'
+    }
+
+    @staticmethod
+    def _datasets():
+        """Column-level SELECTs for each dataset (no ORM objects are built)"""
+        full_sku = Product.sku + db.func.coalesce(ProductVariant.sku_suffix, '')
+
+        return {
+            'products': select(
+                Product.id,
+                Product.sku,
+                Product.name,
+                Product.min_price.label('min_price'),
+                Product.max_price.label('max_price'),
+                Category.name.label('category'),
+                Brand.name.label('brand'),
+                Product.is_active,
+                Product.created_at,
+                Product.updated_at
+            ).outerjoin(
+                Category, Product.category_id == Category.id
+            ).outerjoin(
+                Brand, Product.brand_id == Brand.id
+            ).order_by(Product.id),
+
+            'variants': select(
+                ProductVariant.id.label('variant_id'),
+                ProductVariant.product_id,
+                full_sku.label('full_sku'),
+                Size.name.label('size'),
+                ProductVariant.sku_suffix,
+                ProductVariant.quantity,
+                ProductVariant.created_at,
+                ProductVariant.updated_at
+            ).join(
+                Product, ProductVariant.product_id == Product.id
+            ).join(
+                Size, ProductVariant.size_id == Size.id
+            ).order_by(ProductVariant.id),
+
+            'stock': select(
+                ProductVariant.id.label('variant_id'),
+                ProductVariant.product_id,
+                full_sku.label('full_sku'),
+                Product.name.label('product_name'),
+                Size.name.label('size_name'),
+                ProductVariant.quantity,
+                ProductVariant.updated_at
+            ).join(
+                Product, ProductVariant.product_id == Product.id
+            ).join(
+                Size, ProductVariant.size_id == Size.id
+            ).where(
+                Product.is_active == True
+            ).order_by(ProductVariant.product_id, ProductVariant.size_id)
+        }
+
+    @staticmethod
+    def stream(dataset, fmt, batch_size=None):
+        """
+        Stream a dataset as CSV, NDJSON or columnar row groups
+
+        Rows are fetched from a server-side cursor in fixed-size batches and
+        each batch is rendered and yielded before the next is fetched, so
+        memory use does not grow with catalog size.
+
+        Args:
+            dataset: 'products', 'variants' or 'stock'
+            fmt: 'csv', 'ndjson' or 'columnar'
+                 (columnar emits one JSON row group per batch:
+                  {"columns": [...], "data": {"col": [...]}, "rows": int})
+            batch_size: Rows per fetch
+
+        Returns:
+            Generator of str chunks
+        """
+        datasets = ExportService._datasets()
+
+        if dataset not in datasets:
+            raise ValueError(f'Invalid dataset. Must be one of {list(datasets)}')
+
+        if fmt not in ExportService.SUPPORTED_FORMATS:
+            raise ValueError(f'Invalid format. Must be one of {ExportService.SUPPORTED_FORMATS}')
+
+        stmt = datasets[dataset].execution_options(
+            yield_per=batch_size or ExportService.DEFAULT_BATCH_SIZE
+        )
+
+        return ExportService._render(stmt, fmt)
+
+    @staticmethod
+    @statement_timeout('EXPORT_STATEMENT_TIMEOUT_MS')
+    def _render(stmt, fmt):
+        result = db.session.execute(stmt)
+        columns = list(result.keys())
+
+        try:
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+
+            for batch in result.partitions():
+                if fmt == 'csv':
+                    writer.writerows(
+                        [ExportService._plain(value) for value in row] for row in batch
+                    )
+                    chunk = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+                elif fmt == 'ndjson':
+                    chunk = ''.join(
+                        json.dumps(dict(zip(columns, row)), default=ExportService._plain) + '\n'
+                        for row in batch
+                    )
+
+                else:
+                    data = {column: values for column, values in zip(columns, zip(*batch))}
+                    chunk = json.dumps({
+                        'columns': columns,
+                        'data': data,
+                        'rows': len(batch)
+                    }, default=ExportService._plain) + '\n'
+
+                yield chunk
+
+            if fmt == 'csv' and buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            result.close()
+
+    @staticmethod
+    def _plain(value):
+        """Convert database values to plain JSON/CSV values"""
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
@@ -0,0 +1,350 @@
+# app/services/import_service.py
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import groupby, islice
+from app.extensions import db
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.stock_movement import StockMovement
+from app.utils.bulk import dialect_insert
+from app.utils.money import to_cents
+from app.utils.pricing_cache import pricing_table
+
+
+class ImportService:
+
+    SUPPORTED_FORMATS = ['csv', 'ndjson']
+    DEFAULT_CHUNK_SIZE = 500
+
+    @staticmethod
+    def import_products(stream, fmt, user_id, chunk_size=None):
+        """
+        Import products with variants from a CSV or NDJSON stream
+
+        CSV: one line per variant, consecutive lines with the same SKU form one product
+            sku,name,min_price,max_price,category_id,brand_id,size_id,quantity,sku_suffix
+
+        NDJSON: one product per line
+            {"sku": "...", "name": "...", "min_price": 10, "max_price": 20,
+             "variants": [{"size_id": 1, "quantity": 3, "sku_suffix": "-SM"}]}
+
+        Products are upserted on SKU and variants on (product_id, size_id).
+        Quantity is only applied to newly created variants (recorded as a
+        'restock' stock movement); existing stock is never overwritten.
+
+        Args:
+            stream: Binary or text file-like object
+            fmt: 'csv' or 'ndjson'
+            user_id: ID of user running the import (stock movement attribution)
+            chunk_size: Products per database round trip
+
+        Returns:
+            dict: {'processed': int, 'products_upserted': int,
+                   'variants_upserted': int, 'errors': [{'line': int, 'sku': str, 'error': str}]}
+        """
+        if fmt not in ImportService.SUPPORTED_FORMATS:
+            raise ValueError(f'Invalid format. Must be one of {ImportService.SUPPORTED_FORMATS}')
+
+        chunk_size = chunk_size or ImportService.DEFAULT_CHUNK_SIZE
+
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+        records = (
+            ImportService._read_csv(stream) if fmt == 'csv'
+            else ImportService._read_ndjson(stream)
+        )
+
+        # Preload lookup sets once instead of querying per row
+        lookups = {
+            'size_ids': {row[0] for row in db.session.query(Size.id)},
+            'category_ids': {row[0] for row in db.session.query(Category.id)},
+            'brand_ids': {row[0] for row in db.session.query(Brand.id)},
+            'seen_skus': set()
+        }
+
+        summary = {
+            'processed': 0,
+            'products_upserted': 0,
+            'variants_upserted': 0,
+            'errors': []
+        }
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            valid = []
+            for record in chunk:
+                summary['processed'] += 1
+                try:
+                    valid.append(ImportService._validate(record, lookups))
+                except ValueError as e:
+                    summary['errors'].append({
+                        'line': record['line'],
+                        'sku': record.get('sku'),
+                        'error': str(e)
+                    })
+
+            if not valid:
+                continue
+
+            try:
+                products, variants = ImportService._write_chunk(valid, user_id)
+                db.session.commit()
+                pricing_table.invalidate()
+                summary['products_upserted'] += products
+                summary['variants_upserted'] += variants
+            except Exception as e:
+                db.session.rollback()
+                for product in valid:
+                    summary['errors'].append({
+                        'line': product['line'],
+                        'sku': product['sku'],
+                        'error': f'Failed to write batch: {str(e)}'
+                    })
+
+        return summary
+
+    @staticmethod
+    def _read_csv(stream):
+        """Yield one product record per group of consecutive rows sharing a SKU"""
+        reader = csv.DictReader(stream)
+        rows = ((reader.line_num, row) for row in reader)
+
+        for sku, group in groupby(rows, key=lambda item: (item[1].get('sku') or '').strip()):
+            group = list(group)
+            line, first = group[0]
+
+            record = {
+                'line': line,
+                'sku': sku,
+                'name': first.get('name'),
+                'min_price': first.get('min_price'),
+                'max_price': first.get('max_price'),
+                'category_id': first.get('category_id') or None,
+                'brand_id': first.get('brand_id') or None,
+                'variants': []
+            }
+
+            for _, row in group:
+                if row.get('size_id'):
+                    record['variants'].append({
+                        'size_id': row.get('size_id'),
+                        'quantity': row.get('quantity') or 0,
+                        'sku_suffix': row.get('sku_suffix') or None
+                    })
+
+            yield record
+
+    @staticmethod
+    def _read_ndjson(stream):
+        """Yield one product record per non-empty line"""
+        for line_num, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError('Expected a JSON object')
+            except ValueError as e:
+                yield {'line': line_num, 'sku': None, 'parse_error': f'Invalid JSON: {str(e)}'}
+                continue
+
+            yield {
+                'line': line_num,
+                'sku': data.get('sku'),
+                'name': data.get('name'),
+                'min_price': data.get('min_price'),
+                'max_price': data.get('max_price'),
+                'category_id': data.get('category_id'),
+                'brand_id': data.get('brand_id'),
+                'variants': data.get('variants') or []
+            }
+
+    @staticmethod
+    def _validate(record, lookups):
+        """
+        Validate and normalize one product record against the preloaded sets
+
+        Raises:
+            ValueError: If the record cannot be imported
+        """
+        if 'parse_error' in record:
+            raise ValueError(record['parse_error'])
+
+        sku = str(record.get('sku') or '').strip()
+        name = str(record.get('name') or '').strip()
+
+        if not sku or not name:
+            raise ValueError('SKU and name are required')
+
+        if sku in lookups['seen_skus']:
+            raise ValueError(f'Duplicate SKU {sku} in import file')
+
+        try:
+            min_price = Decimal(str(record.get('min_price')))
+            max_price = Decimal(str(record.get('max_price')))
+        except (InvalidOperation, ValueError):
+            raise ValueError('min_price and max_price must be numbers')
+
+        if min_price < 0 or max_price < 0:
+            raise ValueError('Prices cannot be negative')
+
+        if min_price > max_price:
+            raise ValueError('Minimum price cannot be greater than maximum price')
+
+        category_id = ImportService._to_int(record.get('category_id'), 'category_id')
+        if category_id is not None and category_id not in lookups['category_ids']:
+            raise ValueError(f'Category {category_id} not found')
+
+        brand_id = ImportService._to_int(record.get('brand_id'), 'brand_id')
+        if brand_id is not None and brand_id not in lookups['brand_ids']:
+            raise ValueError(f'Brand {brand_id} not found')
+
+        variants = []
+        size_ids = set()
+        for variant_data in record.get('variants'):
+            size_id = ImportService._to_int(variant_data.get('size_id'), 'size_id')
+            quantity = ImportService._to_int(variant_data.get('quantity'), 'quantity') or 0
+
+            if size_id is None:
+                raise ValueError('size_id is required for each variant')
+
+            if size_id not in lookups['size_ids']:
+                raise ValueError(f'Size {size_id} not found')
+
+            if size_id in size_ids:
+                raise ValueError(f'Duplicate size_id {size_id} for this product')
+
+            if quantity < 0:
+                raise ValueError('Quantity cannot be negative')
+
+            size_ids.add(size_id)
+            variants.append({
+                'size_id': size_id,
+                'quantity': quantity,
+                'sku_suffix': variant_data.get('sku_suffix') or None
+            })
+
+        lookups['seen_skus'].add(sku)
+
+        return {
+            'line': record['line'],
+            'sku': sku,
+            'name': name,
+            'min_price': min_price,
+            'max_price': max_price,
+            'category_id': category_id,
+            'brand_id': brand_id,
+            'variants': variants
+        }
+
+    @staticmethod
+    def _to_int(value, field):
+        if value is None or value == '':
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{field} must be an integer')
+
+    @staticmethod
+    def _write_chunk(products, user_id):
+        """
+        Upsert one chunk of validated products and their variants
+
+        Returns:
+            tuple: (products upserted, variants upserted)
+        """
+        now = datetime.utcnow()
+
+        # Upsert products on SKU
+        stmt = dialect_insert(Product).values([{
+            'sku': p['sku'],
+            'name': p['name'],
+            'min_price_cents': to_cents(p['min_price']),
+            'max_price_cents': to_cents(p['max_price']),
+            'category_id': p['category_id'],
+            'brand_id': p['brand_id'],
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now
+        } for p in products])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sku'],
+            set_={
+                'name': stmt.excluded.name,
+                'min_price_cents': stmt.excluded.min_price_cents,
+                'max_price_cents': stmt.excluded.max_price_cents,
+                'category_id': stmt.excluded.category_id,
+                'brand_id': stmt.excluded.brand_id,
+                'is_active': True,
+                'updated_at': now
+            }
+        ).returning(Product.id, Product.sku)
+
+        product_ids = {row.sku: row.id for row in db.session.execute(stmt)}
+
+        variant_rows = []
+        for p in products:
+            for v in p['variants']:
+                variant_rows.append({
+                    'product_id': product_ids[p['sku']],
+                    'size_id': v['size_id'],
+                    'quantity': v['quantity'],
+                    'sku_suffix': v['sku_suffix'],
+                    'created_at': now,
+                    'updated_at': now
+                })
+
+        if not variant_rows:
+            return len(products), 0
+
+        # Variants that already exist keep their stock
+        existing = set(db.session.query(
+            ProductVariant.product_id,
+            ProductVariant.size_id
+        ).filter(
+            ProductVariant.product_id.in_(product_ids.values())
+        ).all())
+
+        # Upsert variants on (product_id, size_id)
+        stmt = dialect_insert(ProductVariant).values(variant_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['product_id', 'size_id'],
+            set_={
+                'sku_suffix': stmt.excluded.sku_suffix,
+                'updated_at': now
+            }
+        ).returning(ProductVariant.id, ProductVariant.product_id, ProductVariant.size_id)
+
+        variant_ids = {
+            (row.product_id, row.size_id): row.id
+            for row in db.session.execute(stmt)
+        }
+
+        # Opening stock for new variants goes through the stock ledger
+        movements = [{
+            'variant_id': variant_ids[(v['product_id'], v['size_id'])],
+            'change': v['quantity'],
+            'reason': 'restock',
+            'user_id': user_id,
+            'notes': 'Catalog import',
+            'created_at': now
+        } for v in variant_rows
+            if v['quantity'] > 0 and (v['product_id'], v['size_id']) not in existing]
+
+        if movements:
+            db.session.execute(StockMovement.__table__.insert(), movements)
+
+        return len(products), len(variant_rows)
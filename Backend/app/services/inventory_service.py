@@ -3,11 +3,19 @@ from app.extensions import db
 from app.models.product_variant import ProductVariant
 from app.models.stock_movement import StockMovement
 from app.models.product import Product
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.size import Size
+from app.models.user import User
+from app.utils.db_routing import read_replica
+from app.utils.serializers import RowSchema, SIZE, product_fields, variant_fields
+from sqlalchemy import func, select
 
 
 class InventoryService:
     
     @staticmethod
+    @read_replica
     def get_all_inventory(active_products_only=True):
         """
         Get all inventory (all variants)
@@ -27,6 +35,43 @@ class InventoryService:
             ProductVariant.size_id
         ).all()
     
+    @staticmethod
+    @read_replica
+    def get_inventory_rows(active_products_only=True):
+        """
+        get_all_inventory() serialized for GET /api/inventory in one query
+        
+        Returns:
+            list of {"variant_id", "product" (without variants), "size",
+                     "quantity", "full_sku", "updated_at"}
+        """
+        stock = select(
+            ProductVariant.product_id,
+            func.sum(ProductVariant.quantity).label('stock')
+        ).group_by(ProductVariant.product_id).subquery()
+        
+        schema = RowSchema(
+            variant_id=ProductVariant.id,
+            product=RowSchema(**product_fields(), stock=func.coalesce(stock.c.stock, 0)),
+            size=SIZE,
+            quantity=ProductVariant.quantity,
+            full_sku=variant_fields()['full_sku'],
+            updated_at=ProductVariant.updated_at
+        )
+        
+        def refine(stmt):
+            stmt = (stmt.select_from(ProductVariant)
+                .join(Product, ProductVariant.product_id == Product.id)
+                .outerjoin(Category, Product.category_id == Category.id)
+                .outerjoin(Brand, Product.brand_id == Brand.id)
+                .outerjoin(Size, ProductVariant.size_id == Size.id)
+                .outerjoin(stock, stock.c.product_id == Product.id))
+            if active_products_only:
+                stmt = stmt.where(Product.is_active == True)
+            return stmt.order_by(ProductVariant.product_id, ProductVariant.size_id)
+        
+        return schema.all(refine)
+    
     @staticmethod
     def adjust_variant_inventory(variant_id, change, reason, user_id, notes=None):
         """
@@ -84,6 +129,7 @@ class InventoryService:
             raise Exception(f'Inventory adjustment failed: {str(e)}')
     
     @staticmethod
+    @read_replica
     def get_stock_movements(variant_id=None, product_id=None, limit=100):
         """
         Get stock movement history
@@ -107,4 +153,37 @@ class InventoryService:
         
         return query.order_by(
             StockMovement.created_at.desc()
-        ).limit(limit).all()
\ No newline at end of file
+        ).limit(limit).all()
+    
+    @staticmethod
+    @read_replica
+    def get_stock_movement_rows(variant_id=None, product_id=None, limit=100):
+        """get_stock_movements() shaped like StockMovement.to_dict(), in one query"""
+        schema = RowSchema(
+            id=StockMovement.id,
+            variant_id=StockMovement.variant_id,
+            variant=RowSchema(present=ProductVariant.id, **variant_fields()),
+            product_name=Product.name,
+            size_name=Size.name,
+            change=StockMovement.change,
+            reason=StockMovement.reason,
+            reference_id=StockMovement.reference_id,
+            user_id=StockMovement.user_id,
+            username=User.username,
+            notes=StockMovement.notes,
+            created_at=StockMovement.created_at
+        )
+        
+        def refine(stmt):
+            stmt = (stmt.select_from(StockMovement)
+                .outerjoin(ProductVariant, StockMovement.variant_id == ProductVariant.id)
+                .outerjoin(Product, ProductVariant.product_id == Product.id)
+                .outerjoin(Size, ProductVariant.size_id == Size.id)
+                .outerjoin(User, StockMovement.user_id == User.id))
+            if variant_id:
+                stmt = stmt.where(StockMovement.variant_id == variant_id)
+            elif product_id:
+                stmt = stmt.where(ProductVariant.product_id == product_id)
+            return stmt.order_by(StockMovement.created_at.desc(), StockMovement.id.desc()).limit(limit)
+        
+        return schema.all(refine)
@@ -0,0 +1,137 @@
+# app/services/materialize_service.py
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from app.services.report_service import ReportService
+from app.utils.report_store import report_store
+from app.utils.reporting import today, day_start, to_utc, window
+
+
+class MaterializeService:
+    """
+    Pre-computes the standard report windows once a reporting day closes
+
+    For each closed day D the day (D), week (D-6..D) and month-to-date
+    (1st of D's month..D) windows of every report are rendered to JSON and
+    CSV and stored in the report store; the report routes serve those blobs
+    when a request asks for exactly that window. Right after D closes, the
+    closed days of the ?days= windows ending today are stored as per-group
+    sums too (see ReportService), so the default windows only compute today
+    live.
+    """
+
+    # name -> (default parameters, compute(start_day, end_day) -> response body)
+    REPORTS = {
+        'daily': ((), lambda start_day, end_day: {
+            'report': ReportService.daily_sales(start_day, end_day)
+        }),
+        'payments': ((), lambda start_day, end_day: ReportService.payment_methods(start_day, end_day)),
+        'cashiers': ((), lambda start_day, end_day: {
+            'report': ReportService.cashier_sales(start_day, end_day)
+        }),
+        'products': ((('group_by', 'product'), ('limit', 20)), lambda start_day, end_day: {
+            'report': ReportService.product_performance(start_day, end_day, group_by='product', limit=20)
+        }),
+        'heatmap': ((), lambda start_day, end_day: ReportService.sales_heatmap(start_day, end_day))
+    }
+
+    MIMETYPES = {
+        'json': 'application/json',
+        'csv': 'text/csv'
+    }
+
+    @staticmethod
+    def windows(day):
+        """Standard (start_day, end_day) windows ending on closed day `day`"""
+        return {
+            'day': (day, day),
+            'week': (day - timedelta(days=6), day),
+            'month': (day.replace(day=1), day)
+        }
+
+    @staticmethod
+    def materialize(day=None):
+        """
+        Render and store every report for the windows ending on `day`
+
+        Args:
+            day: Closed reporting day (default: yesterday)
+
+        Returns:
+            int: Number of rendered blobs written plus trailing windows stored
+
+        Raises:
+            ValueError: If day has not closed yet
+        """
+        day = day or today() - timedelta(days=1)
+        if day >= today():
+            raise ValueError('Only closed reporting days can be materialized')
+
+        written = 0
+        for name, (params, compute) in MaterializeService.REPORTS.items():
+            for start_day, end_day in MaterializeService.windows(day).values():
+                body = compute(start_day, end_day)
+                for fmt in report_store.FORMATS:
+                    report_store.put(
+                        name, params, start_day, end_day, fmt,
+                        MaterializeService.render(name, body, fmt)
+                    )
+                    written += 1
+
+        if day == today() - timedelta(days=1):
+            for name, (params, compute) in MaterializeService.REPORTS.items():
+                for days in current_app.config.get('REPORT_MATERIALIZE_TRAILING_DAYS', []):
+                    if days > 1:
+                        compute(*window(days))
+                        written += 1
+
+        retention = current_app.config.get('REPORT_STORE_RETENTION_DAYS', 90)
+        report_store.prune(day - timedelta(days=retention))
+
+        return written
+
+    @staticmethod
+    def render(name, body, fmt):
+        """Serialize a report response body as JSON or CSV text"""
+        if fmt == 'json':
+            return json.dumps(body, sort_keys=True)
+
+        rows = MaterializeService._rows(name, body)
+        fieldnames = []
+        for row in rows:
+            fieldnames.extend(key for key in row if key not in fieldnames)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _rows(name, body):
+        """Flat CSV rows for a report body"""
+        if name == 'payments':
+            return [
+                {'payment_method': method, **values}
+                for method, values in body['report'].items()
+            ]
+
+        if name == 'heatmap':
+            return [{
+                'weekday': weekday,
+                'hour': hour,
+                'transactions': body['transactions'][row][hour],
+                'revenue': body['revenue'][row][hour],
+                'items': body['items'][row][hour]
+            } for row, weekday in enumerate(body['weekdays']) for hour in body['hours']]
+
+        return body['report']
+
+    @staticmethod
+    def seconds_until_next_run():
+        """Seconds until the current reporting day closes, plus REPORT_MATERIALIZE_DELAY_MINUTES"""
+        delay = current_app.config.get('REPORT_MATERIALIZE_DELAY_MINUTES', 15)
+        run_at = to_utc(day_start(today() + timedelta(days=1))) + timedelta(minutes=delay)
+        return max((run_at - datetime.utcnow()).total_seconds(), 0)
@@ -1,8 +1,18 @@
 # app/services/product_service.py
+from datetime import datetime
 from app.extensions import db
 from app.models.product import Product
 from app.models.product_variant import ProductVariant
-from sqlalchemy import or_
+from app.models.sale import SaleItem
+from app.models.sales_rollup import SalesVariantDailyRollup
+from app.models.stock_movement import StockMovement
+from app.utils.money import to_cents
+from app.utils.pricing_cache import pricing_table
+from app.utils.serializers import PRODUCT, VARIANT, group_rows
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.size import Size
+from sqlalchemy import or_, insert, update, delete, select, union
 
 
 class ProductService:
@@ -28,7 +38,10 @@ class ProductService:
         if min_price < 0 or max_price < 0:
             raise ValueError('Prices cannot be negative')
         
-        if min_price > max_price:
+        min_price_cents = to_cents(min_price)
+        max_price_cents = to_cents(max_price)
+        
+        if min_price_cents > max_price_cents:
             raise ValueError('Minimum price cannot be greater than maximum price')
         
         # Check if SKU exists
@@ -40,8 +53,8 @@ class ProductService:
             product = Product(
                 sku=sku,
                 name=name,
-                min_price=min_price,
-                max_price=max_price,
+                min_price_cents=min_price_cents,
+                max_price_cents=max_price_cents,
                 category_id=category_id,
                 brand_id=brand_id
             )
@@ -76,6 +89,7 @@ class ProductService:
                     db.session.add(variant)
             
             db.session.commit()
+            pricing_table.invalidate()
             return product
             
         except Exception as e:
@@ -83,92 +97,203 @@ class ProductService:
             raise Exception(f'Failed to create product: {str(e)}')
     
     @staticmethod
-    def update_product(product_id, **kwargs):
+    def update_product(product_id, user_id=None, **kwargs):
         """
         Update product details and variants
         
         Allowed fields: name, sku, min_price, max_price, category_id, brand_id, is_active, variants
         
         variants format: [{'size_id': int, 'quantity': int, 'sku_suffix': str}]
+        
+        Variants are diffed against their current state: only rows that actually
+        change are written, as one bulk INSERT, UPDATE and DELETE each. Quantity
+        changes are recorded as 'adjustment' stock movements attributed to user_id.
+        Variants with stock movements or sales cannot be removed (ValueError).
+        Nothing is written (and updated_at is untouched) when nothing changed.
         """
         product = db.session.query(Product).filter_by(id=product_id).first()
         if not product:
             raise ValueError('Product not found')
         
-        allowed_fields = ['name', 'sku', 'min_price', 'max_price', 'category_id', 'brand_id', 'is_active']
+        allowed_fields = ['name', 'sku', 'category_id', 'brand_id', 'is_active']
+        
+        # Prices are validated and compared as integer cents
+        prices = {}
+        for field in ['min_price', 'max_price']:
+            if field in kwargs:
+                if kwargs[field] < 0:
+                    raise ValueError('Price cannot be negative')
+                prices[f'{field}_cents'] = to_cents(kwargs[field])
         
         # Validate price range
-        if 'min_price' in kwargs and 'max_price' in kwargs:
-            if kwargs['min_price'] > kwargs['max_price']:
+        min_price_cents = prices.get('min_price_cents', product.min_price_cents)
+        max_price_cents = prices.get('max_price_cents', product.max_price_cents)
+        if min_price_cents > max_price_cents:
+            if 'min_price' in kwargs:
                 raise ValueError('Minimum price cannot be greater than maximum price')
-        elif 'min_price' in kwargs:
-            if kwargs['min_price'] > product.max_price:
-                raise ValueError('Minimum price cannot be greater than maximum price')
-        elif 'max_price' in kwargs:
-            if product.min_price > kwargs['max_price']:
-                raise ValueError('Maximum price cannot be less than minimum price')
+            raise ValueError('Maximum price cannot be less than minimum price')
         
         try:
-            # Update basic fields
-            for field, value in kwargs.items():
-                if field not in allowed_fields and field != 'variants':
+            changed = False
+            
+            # Update basic fields that differ from the stored values
+            fields = {k: v for k, v in kwargs.items() if k in allowed_fields}
+            fields.update(prices)
+            
+            for field, value in fields.items():
+                if getattr(product, field) == value:
                     continue
                 
-                if field == 'sku' and value != product.sku:
+                if field == 'sku':
                     if db.session.query(Product).filter_by(sku=value).first():
                         raise ValueError('SKU already exists')
                 
-                if field in ['min_price', 'max_price'] and value < 0:
-                    raise ValueError('Price cannot be negative')
-                
-                if field in allowed_fields:
-                    setattr(product, field, value)
+                setattr(product, field, value)
+                changed = True
             
-            # Update variants if provided
-            if 'variants' in kwargs:
-                variants_data = kwargs['variants']
-                
-                # Get existing variants
-                existing_variants = {v.size_id: v for v in product.variants}
-                provided_size_ids = set()
-                
-                for variant_data in variants_data:
-                    size_id = variant_data.get('size_id')
-                    quantity = variant_data.get('quantity', 0)
-                    sku_suffix = variant_data.get('sku_suffix')
-                    
-                    if not size_id:
-                        continue
-                    
-                    provided_size_ids.add(size_id)
-                    
-                    if size_id in existing_variants:
-                        # Update existing variant
-                        variant = existing_variants[size_id]
-                        variant.quantity = max(0, quantity)
-                        variant.sku_suffix = sku_suffix
-                    else:
-                        # Create new variant
-                        variant = ProductVariant(
-                            product_id=product.id,
-                            size_id=size_id,
-                            quantity=max(0, quantity),
-                            sku_suffix=sku_suffix
-                        )
-                        db.session.add(variant)
-                
-                # Remove variants not in the provided list
-                for size_id, variant in existing_variants.items():
-                    if size_id not in provided_size_ids:
-                        db.session.delete(variant)
+            # Update variants if provided; the product's updated_at covers them (list ETags)
+            if 'variants' in kwargs and ProductService._sync_variants(product.id, kwargs['variants'], user_id):
+                product.updated_at = datetime.utcnow()
+                changed = True
+            
+            if changed:
+                db.session.commit()
+                pricing_table.invalidate()
+            else:
+                db.session.rollback()
             
-            db.session.commit()
             return product
             
+        except ValueError:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             raise Exception(f'Failed to update product: {str(e)}')
     
+    @staticmethod
+    def _sync_variants(product_id, variants_data, user_id):
+        """
+        Diff provided variants against the stored ones and apply the changes in bulk
+        
+        Returns:
+            bool: True if any variant row was inserted, updated or deleted
+        
+        Raises:
+            ValueError: If a removed variant has stock movements or sales
+        """
+        # Lock current variants so the stock deltas are computed against committed values
+        current = {
+            row.size_id: row
+            for row in db.session.query(
+                ProductVariant.id,
+                ProductVariant.size_id,
+                ProductVariant.quantity,
+                ProductVariant.sku_suffix
+            ).filter_by(product_id=product_id).with_for_update()
+        }
+        
+        now = datetime.utcnow()
+        inserts = []
+        updates = []
+        movements = []
+        provided_size_ids = set()
+        
+        for variant_data in variants_data:
+            size_id = variant_data.get('size_id')
+            quantity = max(0, variant_data.get('quantity', 0))
+            sku_suffix = variant_data.get('sku_suffix')
+            
+            if not size_id or size_id in provided_size_ids:
+                continue
+            
+            provided_size_ids.add(size_id)
+            
+            existing = current.get(size_id)
+            if existing is None:
+                inserts.append({
+                    'product_id': product_id,
+                    'size_id': size_id,
+                    'quantity': quantity,
+                    'sku_suffix': sku_suffix,
+                    'created_at': now,
+                    'updated_at': now
+                })
+                continue
+            
+            delta = quantity - existing.quantity
+            if delta == 0 and sku_suffix == existing.sku_suffix:
+                continue
+            
+            updates.append({
+                'id': existing.id,
+                'quantity': quantity,
+                'sku_suffix': sku_suffix,
+                'updated_at': now
+            })
+            if delta:
+                movements.append({'variant_id': existing.id, 'change': delta})
+        
+        deleted_ids = [
+            row.id for size_id, row in current.items()
+            if size_id not in provided_size_ids
+        ]
+        
+        # Variants with history stay; the ledger and past sales point at them
+        if deleted_ids:
+            referenced = db.session.execute(
+                union(
+                    select(StockMovement.variant_id).where(StockMovement.variant_id.in_(deleted_ids)),
+                    select(SaleItem.variant_id).where(SaleItem.variant_id.in_(deleted_ids)),
+                    select(SalesVariantDailyRollup.variant_id).where(SalesVariantDailyRollup.variant_id.in_(deleted_ids))
+                )
+            ).scalars().all()
+            if referenced:
+                referenced = set(referenced)
+                size_ids = sorted(size_id for size_id, row in current.items() if row.id in referenced)
+                raise ValueError(
+                    f'Cannot remove variants with stock history or sales (size_id {", ".join(map(str, size_ids))}); '
+                    f'set their quantity to 0 instead'
+                )
+        
+        if inserts:
+            created = db.session.execute(
+                insert(ProductVariant).returning(
+                    ProductVariant.id, ProductVariant.quantity
+                ),
+                inserts
+            )
+            movements.extend(
+                {'variant_id': row.id, 'change': row.quantity}
+                for row in created if row.quantity
+            )
+        
+        if updates:
+            db.session.execute(update(ProductVariant), updates)
+        
+        if deleted_ids:
+            db.session.execute(
+                delete(ProductVariant).where(
+                    ProductVariant.id.in_(deleted_ids)
+                ).execution_options(synchronize_session=False)
+            )
+        
+        # Stock changes go through the ledger
+        if movements:
+            if not user_id:
+                raise ValueError('user_id is required to change variant stock')
+            
+            db.session.execute(insert(StockMovement), [{
+                'variant_id': movement['variant_id'],
+                'change': movement['change'],
+                'reason': 'adjustment',
+                'user_id': user_id,
+                'notes': 'Product edit',
+                'created_at': now
+            } for movement in movements])
+        
+        return bool(inserts or updates or deleted_ids)
+    
     @staticmethod
     def delete_product(product_id):
         """Soft delete product"""
@@ -178,6 +303,7 @@ class ProductService:
         
         product.is_active = False
         db.session.commit()
+        pricing_table.invalidate()
         return True
     
     @staticmethod
@@ -206,4 +332,58 @@ class ProductService:
             Product.sku.ilike(f'%{query_string}%')
         )
         
-        return query.filter(search_filter).limit(20).all()
\ No newline at end of file
+        return query.filter(search_filter).limit(20).all()
+    
+    @staticmethod
+    def product_rows(refine):
+        """
+        Products shaped like Product.to_dict(include_variants=True), in two queries
+        
+        Args:
+            refine: Function applying filters, ordering and limits to the
+                    product select (see RowSchema.all)
+        
+        Returns:
+            list of dict
+        """
+        products = PRODUCT.all(lambda stmt: refine(
+            stmt.select_from(Product)
+            .outerjoin(Category, Product.category_id == Category.id)
+            .outerjoin(Brand, Product.brand_id == Brand.id)
+        ))
+        if not products:
+            return products
+        
+        variants = group_rows(VARIANT.all(lambda stmt: stmt.select_from(ProductVariant)
+            .join(Product, ProductVariant.product_id == Product.id)
+            .outerjoin(Size, ProductVariant.size_id == Size.id)
+            .where(ProductVariant.product_id.in_([p['id'] for p in products]))
+            .order_by(ProductVariant.id)
+        ), 'product_id')
+        
+        for product in products:
+            product['variants'] = variants.get(product['id'], [])
+            product['stock'] = sum(v['quantity'] for v in product['variants'])
+        
+        return products
+    
+    @staticmethod
+    def get_all_product_rows(active_only=True):
+        """Serialized get_all_products()"""
+        def refine(stmt):
+            if active_only:
+                stmt = stmt.where(Product.is_active == True)
+            return stmt.order_by(Product.name)
+        return ProductService.product_rows(refine)
+    
+    @staticmethod
+    def search_product_rows(query_string, active_only=True):
+        """Serialized search_products()"""
+        def refine(stmt):
+            if active_only:
+                stmt = stmt.where(Product.is_active == True)
+            return stmt.where(or_(
+                Product.name.ilike(f'%{query_string}%'),
+                Product.sku.ilike(f'%{query_string}%')
+            )).limit(20)
+        return ProductService.product_rows(refine)
\ No newline at end of file
@@ -0,0 +1,435 @@
+# app/services/report_service.py
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import func, case, distinct
+from app.extensions import db
+from app.models.sales_rollup import SalesDailyRollup, SalesVariantDailyRollup, SalesHourlyRollup
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.models.category import Category
+from app.models.brand import Brand
+from app.models.user import User
+from app.utils.money import from_cents
+from app.utils.report_cache import report_cache
+from app.utils.report_store import report_store
+from app.utils.db_routing import read_replica
+from app.utils.reporting import reporting_key, today, day_start
+from app.services.rollup_service import RollupService
+
+
+class ReportService:
+    """
+    Sales reports served from the daily and hourly rollups (see RollupService)
+
+    Each report is computed as mergeable per-group sums. The closed days of a
+    window (before today) only change when the rollups are rebuilt, so their
+    sums are cached for REPORT_CLOSED_CACHE_TTL seconds under the current
+    rollup generation; today's sums are cached for REPORT_CACHE_TTL seconds
+    and dropped whenever a sale is recorded in this worker. For the standard
+    ?days= windows (REPORT_MATERIALIZE_TRAILING_DAYS) the closed sums are
+    also kept in the report store, where `flask reports scheduler` writes
+    them after each cutoff, so every worker merges them with the live day.
+    """
+
+    PERFORMANCE_DIMENSIONS = ['product', 'variant', 'size', 'category', 'brand']
+    WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    MAX_INTERVAL_HOURS = 24 * 7
+
+    @staticmethod
+    def _aggregate(name, params, start_day, end_day, fetch):
+        """
+        Sum fetch() results over start_day..end_day, split into closed and open buckets
+
+        Args:
+            name: Report name (cache key)
+            params: Hashable normalized report parameters (cache key)
+            fetch: fetch(start_day, end_day) -> {group key: (sum, ...)}
+
+        Returns:
+            dict: {group key: [sum, ...]}
+
+        Raises:
+            RollupMissingError: If a bucket has sales but no rollup rows
+        """
+        current_day = today()
+        key = reporting_key()
+        buckets = []
+
+        closed_end = min(end_day, current_day - timedelta(days=1))
+        if start_day <= closed_end:
+            ttl = current_app.config.get('REPORT_CLOSED_CACHE_TTL', 3600)
+            buckets.append((start_day, closed_end, RollupService.generation(), ttl, False))
+
+        if start_day <= current_day <= end_day:
+            ttl = current_app.config.get('REPORT_CACHE_TTL', 30)
+            buckets.append((current_day, current_day, None, ttl, True))
+
+        stored = ReportService._stored_window(start_day, end_day, current_day)
+
+        def compute(bucket_start, bucket_end, generation):
+            store_params = (('params', ','.join(map(str, params))), ('generation', generation))
+            if stored and generation is not None:
+                part = report_store.get_sums(name, store_params, bucket_start, bucket_end)
+                if part is not None:
+                    return part
+
+            part = fetch(bucket_start, bucket_end)
+            if not part:
+                RollupService.require_rollups(bucket_start, bucket_end)
+
+            if stored and generation is not None:
+                try:
+                    report_store.put_sums(name, store_params, bucket_start, bucket_end, part)
+                except OSError as e:
+                    current_app.logger.warning('Could not store %s report sums: %s', name, e)
+            return part
+
+        totals = {}
+        for bucket_start, bucket_end, generation, ttl, open_bucket in buckets:
+            part = report_cache.get_or_compute(
+                (name, params, key, bucket_start, bucket_end, generation),
+                lambda: compute(bucket_start, bucket_end, generation),
+                ttl=ttl,
+                open_bucket=open_bucket
+            )
+            for group, sums in part.items():
+                if group in totals:
+                    totals[group] = [a + b for a, b in zip(totals[group], sums)]
+                else:
+                    totals[group] = list(sums)
+
+        return totals
+
+    @staticmethod
+    def _stored_window(start_day, end_day, current_day):
+        """Whether start_day..end_day is a standard ?days= window ending today"""
+        days = (current_day - start_day).days + 1
+        return end_day == current_day and days in current_app.config.get('REPORT_MATERIALIZE_TRAILING_DAYS', [])
+
+    @staticmethod
+    def _sales_sums(*group_by):
+        """fetch() over the daily sales rollup: {group key: (total_cents, transaction_count)}"""
+        def fetch(start_day, end_day):
+            results = db.session.query(
+                *group_by,
+                func.sum(SalesDailyRollup.total_cents),
+                func.sum(SalesDailyRollup.transaction_count)
+            ).filter(
+                SalesDailyRollup.timezone == reporting_key(),
+                SalesDailyRollup.day >= start_day,
+                SalesDailyRollup.day <= end_day
+            ).group_by(
+                *group_by
+            ).all()
+
+            return {
+                tuple(row[:-2]): (int(row[-2]), int(row[-1]))
+                for row in results
+            }
+        return fetch
+
+    @staticmethod
+    @read_replica
+    def daily_sales(start_day, end_day):
+        """
+        Totals per reporting day with payment method breakdown, newest first
+
+        Returns:
+            list: [{'date', 'total_sales', 'transaction_count', 'cash', 'card', 'mobile'}]
+        """
+        totals = ReportService._aggregate(
+            'daily', (), start_day, end_day,
+            ReportService._sales_sums(SalesDailyRollup.day, SalesDailyRollup.payment_method)
+        )
+
+        # Organize by date
+        daily_data = {}
+        for (day, payment_method), (total_cents, count) in totals.items():
+            date_str = day.isoformat()
+            if date_str not in daily_data:
+                daily_data[date_str] = {
+                    'date': date_str,
+                    'total_cents': 0,
+                    'transaction_count': 0,
+                    'cash': 0,
+                    'card': 0,
+                    'mobile': 0
+                }
+
+            daily_data[date_str]['total_cents'] += total_cents
+            daily_data[date_str]['transaction_count'] += count
+            daily_data[date_str][payment_method] = from_cents(total_cents)
+
+        for data in daily_data.values():
+            data['total_sales'] = from_cents(data.pop('total_cents'))
+
+        return sorted(daily_data.values(), key=lambda x: x['date'], reverse=True)
+
+    @staticmethod
+    @read_replica
+    def payment_methods(start_day, end_day):
+        """
+        Totals and share per payment method
+
+        Returns:
+            dict: {'report': {method: {'total', 'transaction_count', 'percentage'}},
+                   'total': number, 'total_transactions': int}
+        """
+        totals = ReportService._aggregate(
+            'payments', (), start_day, end_day,
+            ReportService._sales_sums(SalesDailyRollup.payment_method)
+        )
+
+        grand_total_cents = sum(total_cents for total_cents, _ in totals.values())
+        total_transactions = sum(count for _, count in totals.values())
+
+        report = {}
+        for (payment_method,), (total_cents, count) in totals.items():
+            percentage = (total_cents / grand_total_cents * 100) if grand_total_cents > 0 else 0
+
+            report[payment_method] = {
+                'total': from_cents(total_cents),
+                'transaction_count': count,
+                'percentage': round(percentage, 2)
+            }
+
+        return {
+            'report': report,
+            'total': from_cents(grand_total_cents),
+            'total_transactions': total_transactions
+        }
+
+    @staticmethod
+    @read_replica
+    def cashier_sales(start_day, end_day):
+        """
+        Per-cashier totals, payment breakdown and throughput, highest total first
+
+        Served from the hourly rollup (store-local hours), so active_hours is
+        the number of distinct local hours a cashier sold in, whatever the
+        timezone's offset. The derived ratios are computed from the merged sums.
+
+        Returns:
+            list: [{'cashier_id', 'cashier_name', 'total_sales', 'transaction_count',
+                    'cash', 'card', 'mobile', 'items_sold', 'active_hours',
+                    'transactions_per_hour', 'avg_basket', 'items_per_transaction'}]
+        """
+        payment_methods = ['cash', 'card', 'mobile']
+
+        def fetch(start_day, end_day):
+            results = db.session.query(
+                User.id,
+                User.username,
+                func.sum(SalesHourlyRollup.transaction_count),
+                func.sum(SalesHourlyRollup.total_cents),
+                *[
+                    func.sum(case(
+                        (SalesHourlyRollup.payment_method == method, SalesHourlyRollup.total_cents),
+                        else_=0
+                    ))
+                    for method in payment_methods
+                ],
+                func.sum(SalesHourlyRollup.item_count),
+                func.count(distinct(SalesHourlyRollup.hour_start))
+            ).select_from(
+                SalesHourlyRollup
+            ).join(
+                User, SalesHourlyRollup.user_id == User.id
+            ).filter(
+                SalesHourlyRollup.timezone == reporting_key(),
+                SalesHourlyRollup.hour_start >= day_start(start_day),
+                SalesHourlyRollup.hour_start < day_start(end_day + timedelta(days=1))
+            ).group_by(
+                User.id,
+                User.username
+            ).all()
+
+            return {
+                (row[0], row[1]): tuple(int(value or 0) for value in row[2:])
+                for row in results
+            }
+
+        totals = ReportService._aggregate('cashiers', (), start_day, end_day, fetch)
+
+        report = []
+        for (user_id, username), sums in totals.items():
+            count, total_cents, cash_cents, card_cents, mobile_cents, items_sold, active_hours = sums
+            report.append({
+                'cashier_id': user_id,
+                'cashier_name': username,
+                'total_sales': from_cents(total_cents),
+                'transaction_count': count,
+                'cash': from_cents(cash_cents),
+                'card': from_cents(card_cents),
+                'mobile': from_cents(mobile_cents),
+                'items_sold': items_sold,
+                'active_hours': active_hours,
+                'transactions_per_hour': round(count / active_hours, 2) if active_hours else 0,
+                'avg_basket': from_cents(total_cents // count) if count else 0,
+                'items_per_transaction': round(items_sold / count, 2) if count else 0
+            })
+
+        return sorted(report, key=lambda x: x['total_sales'], reverse=True)
+
+    @staticmethod
+    @read_replica
+    def product_performance(start_day, end_day, group_by='product', limit=20):
+        """
+        Top-N units and revenue from the variant rollup, grouped by a catalog dimension
+
+        Args:
+            group_by: 'product', 'variant', 'size', 'category' or 'brand'
+            limit: Top N rows by revenue
+
+        Returns:
+            list: [{'<group_by>_id', '<group_by>_name', 'units_sold', 'revenue'}]
+                  (variant rows also carry product_id, product_name and size_name)
+        """
+        if group_by not in ReportService.PERFORMANCE_DIMENSIONS:
+            raise ValueError(f'Invalid group_by. Must be one of {ReportService.PERFORMANCE_DIMENSIONS}')
+
+        dimensions = {
+            'product': [Product.id, Product.name],
+            'variant': [ProductVariant.id, Product.name, ProductVariant.product_id, Size.name],
+            'size': [Size.id, Size.name],
+            'category': [Category.id, Category.name],
+            'brand': [Brand.id, Brand.name]
+        }
+        columns = dimensions[group_by]
+
+        def fetch(start_day, end_day):
+            query = db.session.query(
+                *columns,
+                func.sum(SalesVariantDailyRollup.units),
+                func.sum(SalesVariantDailyRollup.revenue_cents)
+            ).select_from(
+                SalesVariantDailyRollup
+            ).join(
+                ProductVariant, SalesVariantDailyRollup.variant_id == ProductVariant.id
+            ).join(
+                Product, ProductVariant.product_id == Product.id
+            )
+
+            if group_by in ['variant', 'size']:
+                query = query.join(Size, ProductVariant.size_id == Size.id)
+            elif group_by == 'category':
+                query = query.join(Category, Product.category_id == Category.id)
+            elif group_by == 'brand':
+                query = query.join(Brand, Product.brand_id == Brand.id)
+
+            results = query.filter(
+                SalesVariantDailyRollup.timezone == reporting_key(),
+                SalesVariantDailyRollup.day >= start_day,
+                SalesVariantDailyRollup.day <= end_day
+            ).group_by(
+                *columns
+            ).all()
+
+            return {
+                tuple(row[:-2]): (int(row[-2]), int(row[-1]))
+                for row in results
+            }
+
+        # The full per-group sums are cached; the top-N cut happens after merging
+        totals = ReportService._aggregate(
+            'products', (group_by,), start_day, end_day, fetch
+        )
+        top = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+
+        report = []
+        for key, (units, revenue_cents) in top:
+            data = {
+                f'{group_by}_id': key[0],
+                f'{group_by}_name': key[1],
+                'units_sold': units,
+                'revenue': from_cents(revenue_cents)
+            }
+            if group_by == 'variant':
+                data['variant_name'] = f'{key[1]} ({key[3]})'
+                data['product_id'] = key[2]
+                data['product_name'] = key[1]
+                data['size_name'] = key[3]
+            report.append(data)
+
+        return report
+
+    @staticmethod
+    @read_replica
+    def sales_heatmap(start_day, end_day, interval_hours=None):
+        """
+        Weekday x hour-of-day matrices from the hourly rollup, for till staffing
+
+        Hours are store-local. Every matrix is dense (7 rows, Monday first, by
+        24 columns), with zeros where nothing was sold. With interval_hours,
+        a dense series of consecutive buckets of that many hours starting at
+        the first hour of reporting day start_day is returned as well.
+
+        Args:
+            interval_hours: Optional bucket width for the series (1-168)
+
+        Returns:
+            dict: {'weekdays': [...], 'hours': [0..23],
+                   'transactions': [[int]], 'revenue': [[number]], 'items': [[int]],
+                   'series': [{'start', 'transactions', 'revenue', 'items'}] (with interval_hours)}
+        """
+        if interval_hours is not None and not 1 <= interval_hours <= ReportService.MAX_INTERVAL_HOURS:
+            raise ValueError(f'interval must be between 1 and {ReportService.MAX_INTERVAL_HOURS} hours')
+
+        def fetch(start_day, end_day):
+            results = db.session.query(
+                SalesHourlyRollup.hour_start,
+                func.sum(SalesHourlyRollup.transaction_count),
+                func.sum(SalesHourlyRollup.total_cents),
+                func.sum(SalesHourlyRollup.item_count)
+            ).filter(
+                SalesHourlyRollup.timezone == reporting_key(),
+                SalesHourlyRollup.hour_start >= day_start(start_day),
+                SalesHourlyRollup.hour_start < day_start(end_day + timedelta(days=1))
+            ).group_by(
+                SalesHourlyRollup.hour_start
+            ).all()
+
+            return {
+                (row[0],): (int(row[1]), int(row[2]), int(row[3]))
+                for row in results
+            }
+
+        totals = ReportService._aggregate('heatmap', (), start_day, end_day, fetch)
+
+        transactions = [[0] * 24 for _ in range(7)]
+        revenue_cents = [[0] * 24 for _ in range(7)]
+        items = [[0] * 24 for _ in range(7)]
+
+        for (hour_start,), (count, total_cents, item_count) in totals.items():
+            weekday, hour = hour_start.weekday(), hour_start.hour
+            transactions[weekday][hour] += count
+            revenue_cents[weekday][hour] += total_cents
+            items[weekday][hour] += item_count
+
+        report = {
+            'weekdays': ReportService.WEEKDAYS,
+            'hours': list(range(24)),
+            'transactions': transactions,
+            'revenue': [[from_cents(cents) for cents in row] for row in revenue_cents],
+            'items': items
+        }
+
+        if interval_hours:
+            origin = day_start(start_day)
+            span_hours = ((end_day - start_day).days + 1) * 24
+            bucket_count = -(-span_hours // interval_hours)
+            buckets = [[0, 0, 0] for _ in range(bucket_count)]
+
+            for (hour_start,), sums in totals.items():
+                index = int((hour_start - origin).total_seconds() // 3600) // interval_hours
+                buckets[index] = [a + b for a, b in zip(buckets[index], sums)]
+
+            report['series'] = [{
+                'start': (origin + timedelta(hours=index * interval_hours)).isoformat(),
+                'transactions': count,
+                'revenue': from_cents(total_cents),
+                'items': item_count
+            } for index, (count, total_cents, item_count) in enumerate(buckets)]
+
+        return report
@@ -0,0 +1,330 @@
+# app/services/rollup_service.py
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.sale import Sale, SaleItem
+from app.models.sales_rollup import SalesDailyRollup, SalesVariantDailyRollup, SalesHourlyRollup, SalesRollupState
+from app.utils.bulk import dialect_insert
+from app.utils.report_cache import report_cache
+from app.utils.reporting import reporting_day, day_bounds, reporting_key, local_hour, day_start, today
+
+
+class RollupMissingError(Exception):
+    """Sales exist for a window the rollups have no rows for (they were never built for it)"""
+
+
+class RollupService:
+    
+    # First key of the PostgreSQL advisory lock taken per reporting day
+    LOCK_NAMESPACE = 0x524f4c4c
+    
+    @staticmethod
+    def _lock_day(day, shared=False):
+        """
+        Transaction-scoped lock on a reporting day's rollup rows (PostgreSQL)
+        
+        Sales take it shared, so they never wait for each other; a rebuild
+        takes it exclusively, so no sale of that day commits between the
+        rebuild's delete and insert. SQLite serializes writers anyway.
+        """
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return
+        
+        fn = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+        db.session.execute(select(fn(RollupService.LOCK_NAMESPACE, day.toordinal())))
+    
+    @staticmethod
+    def require_rollups(start_day, end_day):
+        """
+        Raise if sales exist in start_day..end_day but the daily rollup has no rows for it
+        
+        Called when a report over the rollups comes back empty, to tell a
+        quiet window from one that was never backfilled.
+        
+        Raises:
+            RollupMissingError: With the command that backfills the window
+        """
+        start, end = day_bounds(start_day, end_day)
+        rolled_up, exists = db.session.execute(select(
+            select(SalesDailyRollup.id).where(
+                SalesDailyRollup.timezone == reporting_key(),
+                SalesDailyRollup.day >= start_day,
+                SalesDailyRollup.day <= end_day
+            ).exists(),
+            select(Sale.id).where(
+                Sale.created_at >= start,
+                Sale.created_at < end
+            ).exists()
+        )).one()
+        
+        if exists and not rolled_up:
+            days = (today() - start_day).days + 1
+            current_app.logger.error(
+                'Sales rollups for %s are missing %s to %s', reporting_key(), start_day, end_day
+            )
+            raise RollupMissingError(
+                f'Sales rollups have not been built for {start_day} to {end_day} ({reporting_key()}); '
+                f'run: flask rollups rebuild --days {days}'
+            )
+    
+    @staticmethod
+    def record_sale(sale, sale_items):
+        """
+        Add a sale to the rollups (call inside the sale's transaction, after flush)
+        
+        Increments the (day, timezone, payment method, cashier) row, the
+        matching store-local hour row and one (day, timezone, variant) row per
+        variant with INSERT ... ON CONFLICT DO UPDATE, so concurrent tills
+        never race on them.
+        """
+        day = reporting_day(sale.created_at)
+        timezone = reporting_key()
+        
+        RollupService._lock_day(day, shared=True)
+        
+        stmt = dialect_insert(SalesDailyRollup).values(
+            day=day,
+            timezone=timezone,
+            payment_method=sale.payment_method,
+            user_id=sale.user_id,
+            total_cents=sale.total_amount_cents,
+            transaction_count=1,
+            updated_at=sale.created_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'timezone', 'payment_method', 'user_id'],
+            set_={
+                'total_cents': SalesDailyRollup.total_cents + stmt.excluded.total_cents,
+                'transaction_count': SalesDailyRollup.transaction_count + stmt.excluded.transaction_count,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+        
+        stmt = dialect_insert(SalesHourlyRollup).values(
+            hour_start=local_hour(sale.created_at),
+            timezone=timezone,
+            payment_method=sale.payment_method,
+            user_id=sale.user_id,
+            total_cents=sale.total_amount_cents,
+            transaction_count=1,
+            item_count=sum(item.quantity for item in sale_items),
+            updated_at=sale.created_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['hour_start', 'timezone', 'payment_method', 'user_id'],
+            set_={
+                'total_cents': SalesHourlyRollup.total_cents + stmt.excluded.total_cents,
+                'transaction_count': SalesHourlyRollup.transaction_count + stmt.excluded.transaction_count,
+                'item_count': SalesHourlyRollup.item_count + stmt.excluded.item_count,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+        
+        # One row per variant (a cart may list the same variant twice)
+        variants = {}
+        for item in sale_items:
+            units, revenue_cents = variants.get(item.variant_id, (0, 0))
+            variants[item.variant_id] = (
+                units + item.quantity,
+                revenue_cents + item.quantity * item.price_at_sale_cents
+            )
+        
+        stmt = dialect_insert(SalesVariantDailyRollup).values([{
+            'day': day,
+            'timezone': timezone,
+            'variant_id': variant_id,
+            'units': units,
+            'revenue_cents': revenue_cents,
+            'updated_at': sale.created_at
+        } for variant_id, (units, revenue_cents) in variants.items()])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'timezone', 'variant_id'],
+            set_={
+                'units': SalesVariantDailyRollup.units + stmt.excluded.units,
+                'revenue_cents': SalesVariantDailyRollup.revenue_cents + stmt.excluded.revenue_cents,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def generation():
+        """
+        Rollup generation for reporting_key(), bumped by every rebuild
+        
+        Read at most every REPORT_GENERATION_SYNC_INTERVAL seconds per process.
+        """
+        timezone = reporting_key()
+        return report_cache.generation(
+            timezone,
+            lambda: db.session.query(SalesRollupState.generation).filter_by(timezone=timezone).scalar() or 0,
+            current_app.config.get('REPORT_GENERATION_SYNC_INTERVAL', 5)
+        )
+    
+    @staticmethod
+    def _bump_generation(timezone):
+        stmt = dialect_insert(SalesRollupState).values(
+            timezone=timezone,
+            generation=1,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['timezone'],
+            set_={
+                'generation': SalesRollupState.generation + 1,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def rebuild_daily(start_day, end_day):
+        """
+        Recompute the daily and hourly rollups for reporting days start_day..end_day from sales
+        
+        Used to backfill history and after changing the store timezone or day cutoff.
+        Each day is aggregated with a created_at range predicate, under an
+        exclusive lock on that day (see _lock_day); days run oldest first, so
+        checkouts only wait on today's lock, for the end of the rebuild. Bumps
+        the rollup generation, which retires cached closed-day sums in every
+        process.
+        
+        Returns:
+            int: Number of rollup rows written
+        """
+        timezone = reporting_key()
+        
+        try:
+            written = 0
+            day = start_day
+            while day <= end_day:
+                RollupService._lock_day(day)
+                
+                for model in [SalesDailyRollup, SalesVariantDailyRollup]:
+                    db.session.query(model).filter(
+                        model.timezone == timezone,
+                        model.day == day
+                    ).delete(synchronize_session=False)
+                
+                db.session.query(SalesHourlyRollup).filter(
+                    SalesHourlyRollup.timezone == timezone,
+                    SalesHourlyRollup.hour_start >= day_start(day),
+                    SalesHourlyRollup.hour_start < day_start(day + timedelta(days=1))
+                ).delete(synchronize_session=False)
+                
+                start, end = day_bounds(day, day)
+                
+                results = db.session.query(
+                    Sale.payment_method,
+                    Sale.user_id,
+                    func.sum(Sale.total_amount_cents).label('total_cents'),
+                    func.count(Sale.id).label('count')
+                ).filter(
+                    Sale.created_at >= start,
+                    Sale.created_at < end
+                ).group_by(
+                    Sale.payment_method,
+                    Sale.user_id
+                ).all()
+                
+                rows = [{
+                    'day': day,
+                    'timezone': timezone,
+                    'payment_method': row.payment_method,
+                    'user_id': row.user_id,
+                    'total_cents': row.total_cents,
+                    'transaction_count': row.count
+                } for row in results]
+                
+                if rows:
+                    db.session.execute(SalesDailyRollup.__table__.insert(), rows)
+                    written += len(rows)
+                
+                results = db.session.query(
+                    SaleItem.variant_id,
+                    func.sum(SaleItem.quantity).label('units'),
+                    func.sum(SaleItem.quantity * SaleItem.price_at_sale_cents).label('revenue_cents')
+                ).join(
+                    Sale, SaleItem.sale_id == Sale.id
+                ).filter(
+                    Sale.created_at >= start,
+                    Sale.created_at < end
+                ).group_by(
+                    SaleItem.variant_id
+                ).all()
+                
+                rows = [{
+                    'day': day,
+                    'timezone': timezone,
+                    'variant_id': row.variant_id,
+                    'units': row.units,
+                    'revenue_cents': row.revenue_cents
+                } for row in results]
+                
+                if rows:
+                    db.session.execute(SalesVariantDailyRollup.__table__.insert(), rows)
+                    written += len(rows)
+                
+                # Hours are bucketed in Python to stay dialect-neutral
+                items = db.session.query(
+                    SaleItem.sale_id,
+                    func.sum(SaleItem.quantity).label('item_count')
+                ).join(
+                    Sale, SaleItem.sale_id == Sale.id
+                ).filter(
+                    Sale.created_at >= start,
+                    Sale.created_at < end
+                ).group_by(
+                    SaleItem.sale_id
+                ).subquery()
+                
+                results = db.session.query(
+                    Sale.created_at,
+                    Sale.payment_method,
+                    Sale.user_id,
+                    Sale.total_amount_cents,
+                    items.c.item_count
+                ).join(
+                    items, items.c.sale_id == Sale.id
+                ).filter(
+                    Sale.created_at >= start,
+                    Sale.created_at < end
+                )
+                
+                hours = {}
+                for row in results:
+                    key = (local_hour(row.created_at), row.payment_method, row.user_id)
+                    total_cents, count, item_count = hours.get(key, (0, 0, 0))
+                    hours[key] = (
+                        total_cents + row.total_amount_cents,
+                        count + 1,
+                        item_count + int(row.item_count)
+                    )
+                
+                rows = [{
+                    'hour_start': hour,
+                    'timezone': timezone,
+                    'payment_method': payment_method,
+                    'user_id': user_id,
+                    'total_cents': total_cents,
+                    'transaction_count': count,
+                    'item_count': item_count
+                } for (hour, payment_method, user_id), (total_cents, count, item_count) in hours.items()]
+                
+                if rows:
+                    db.session.execute(SalesHourlyRollup.__table__.insert(), rows)
+                    written += len(rows)
+                
+                day += timedelta(days=1)
+            
+            RollupService._bump_generation(timezone)
+            db.session.commit()
+            report_cache.clear()
+            return written
+            
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f'Rollup rebuild failed: {str(e)}')
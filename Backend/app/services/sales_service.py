@@ -1,8 +1,17 @@
 # app/services/sales_service.py
 from app.extensions import db
 from app.models.sale import Sale, SaleItem
+from app.models.product import Product
 from app.models.product_variant import ProductVariant
 from app.models.stock_movement import StockMovement
+from app.services.rollup_service import RollupService
+from app.utils.money import to_cents, from_cents
+from app.utils.pricing_cache import pricing_table
+from app.utils.report_cache import report_cache
+from app.utils.db_routing import read_replica
+from app.utils.serializers import RowSchema
+from app.models.user import User
+from sqlalchemy import func, select
 
 
 class SalesService:
@@ -30,52 +39,68 @@ class SalesService:
         if not items_data or len(items_data) == 0:
             raise ValueError('Sale must have at least one item')
         
+        # Reject bad lines before taking any row locks
+        for item_data in items_data:
+            variant_id = item_data.get('variant_id')
+            quantity = item_data.get('quantity')
+            price = item_data.get('price')
+            
+            if not variant_id or not quantity or quantity <= 0:
+                raise ValueError('Invalid item data: variant_id and quantity required')
+            
+            if not price or price <= 0:
+                raise ValueError('Invalid price for item')
+            
+            pricing_table.check(variant_id, price)
+        
         try:
             # BEGIN TRANSACTION
             sale_items = []
-            total_amount = 0
+            total_amount_cents = 0
             
             for item_data in items_data:
                 variant_id = item_data.get('variant_id')
                 quantity = item_data.get('quantity')
-                price = item_data.get('price')
+                price_cents = to_cents(item_data.get('price'))
                 
-                if not variant_id or not quantity or quantity <= 0:
-                    raise ValueError('Invalid item data: variant_id and quantity required')
+                # Lock the variant row (prevents race conditions), reading its product's pricing in the same query
+                row = db.session.query(
+                    ProductVariant,
+                    Product.name,
+                    Product.is_active,
+                    Product.min_price_cents,
+                    Product.max_price_cents
+                ).join(
+                    Product, ProductVariant.product_id == Product.id
+                ).filter(
+                    ProductVariant.id == variant_id
+                ).with_for_update(of=ProductVariant).first()
                 
-                if not price or price <= 0:
-                    raise ValueError('Invalid price for item')
+                if not row:
+                    raise ValueError(f'Product variant {variant_id} not found')
                 
-                # Lock the variant row (prevents race conditions)
-                variant = db.session.query(ProductVariant).filter_by(
-                    id=variant_id
-                ).with_for_update().first()
+                variant, product_name, is_active, min_price_cents, max_price_cents = row
                 
-                if not variant:
-                    raise ValueError(f'Product variant {variant_id} not found')
+                # Check if product is active
+                if not is_active:
+                    raise ValueError(f'Product {product_name} is not active')
+                
+                # Validate price is within range
+                if not min_price_cents <= price_cents <= max_price_cents:
+                    raise ValueError(
+                        f'Price {item_data.get("price")} is outside allowed range '
+                        f'({from_cents(min_price_cents)} - {from_cents(max_price_cents)})'
+                    )
                 
                 # Check stock availability
                 if variant.quantity < quantity:
-                    product_name = variant.product.name if variant.product else 'Unknown'
                     size_name = variant.size.name if variant.size else 'Unknown'
                     raise ValueError(
                         f'Insufficient stock for {product_name} ({size_name}). '
                         f'Available: {variant.quantity}, Requested: {quantity}'
                     )
                 
-                # Check if product is active
-                if not variant.product.is_active:
-                    raise ValueError(f'Product {variant.product.name} is not active')
-                
-                # Validate price is within range
-                if price < float(variant.product.min_price) or price > float(variant.product.max_price):
-                    raise ValueError(
-                        f'Price {price} is outside allowed range '
-                        f'({variant.product.min_price} - {variant.product.max_price})'
-                    )
-                
-                subtotal = price * quantity
-                total_amount += subtotal
+                total_amount_cents += price_cents * quantity
                 
                 # Deduct inventory
                 variant.quantity -= quantity
@@ -84,7 +109,7 @@ class SalesService:
                 sale_item = SaleItem(
                     variant_id=variant_id,
                     quantity=quantity,
-                    price_at_sale=price
+                    price_at_sale_cents=price_cents
                 )
                 sale_items.append(sale_item)
                 
@@ -99,7 +124,7 @@ class SalesService:
             
             # Create the sale
             sale = Sale(
-                total_amount=total_amount,
+                total_amount_cents=total_amount_cents,
                 payment_method=payment_method,
                 user_id=user_id
             )
@@ -116,8 +141,12 @@ class SalesService:
                 if isinstance(movement, StockMovement) and not movement.reference_id:
                     movement.reference_id = sale.id
             
+            # Roll the sale into the daily report totals
+            RollupService.record_sale(sale, sale_items)
+            
             # COMMIT TRANSACTION
             db.session.commit()
+            report_cache.invalidate_open()
             
             return sale
             
@@ -132,8 +161,32 @@ class SalesService:
         return db.session.query(Sale).filter_by(id=sale_id).first()
     
     @staticmethod
+    @read_replica
     def get_all_sales(limit=100, offset=0):
         """Get all sales with pagination"""
         return db.session.query(Sale).order_by(
             Sale.created_at.desc()
-        ).limit(limit).offset(offset).all()
\ No newline at end of file
+        ).limit(limit).offset(offset).all()
+    
+    @staticmethod
+    @read_replica
+    def get_sale_rows(limit=100, offset=0):
+        """get_all_sales() shaped like Sale.to_dict(), in one query"""
+        item_count = select(func.count(SaleItem.id)).where(
+            SaleItem.sale_id == Sale.id
+        ).scalar_subquery()
+        
+        schema = RowSchema(
+            id=Sale.id,
+            total_amount=(Sale.total_amount_cents, from_cents),
+            payment_method=Sale.payment_method,
+            user_id=Sale.user_id,
+            cashier=User.username,
+            created_at=Sale.created_at,
+            item_count=item_count
+        )
+        
+        return schema.all(lambda stmt: stmt.select_from(Sale)
+            .outerjoin(User, Sale.user_id == User.id)
+            .order_by(Sale.created_at.desc())
+            .limit(limit).offset(offset))
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Terminal Service
+"""
+import hashlib
+import secrets
+from app.extensions import db
+from app.models.terminal import Terminal
+from app.utils.identity_cache import identity_cache
+
+
+class TerminalService:
+    
+    @staticmethod
+    def _key_hash(key):
+        # Keys are 256-bit random tokens, so a plain SHA-256 is enough
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def register_terminal(name, created_by=None):
+        """
+        Register a till (admin only)
+        
+        Returns:
+            tuple: (Terminal, key) - the key is only ever returned here
+        
+        Raises:
+            ValueError: If the name is missing or taken
+        """
+        if not name or not name.strip():
+            raise ValueError('Terminal name is required')
+        
+        name = name.strip()
+        if db.session.query(Terminal).filter_by(name=name).first():
+            raise ValueError('Terminal name already exists')
+        
+        key = secrets.token_urlsafe(32)
+        terminal = Terminal(
+            name=name,
+            key_hash=TerminalService._key_hash(key),
+            created_by=created_by
+        )
+        
+        db.session.add(terminal)
+        db.session.commit()
+        
+        return terminal, key
+    
+    @staticmethod
+    def get_all_terminals():
+        return db.session.query(Terminal).order_by(Terminal.name).all()
+    
+    @staticmethod
+    def deactivate_terminal(terminal_id):
+        """Revoke a till's key and the PIN tokens issued on it"""
+        terminal = db.session.query(Terminal).filter_by(id=terminal_id).first()
+        if not terminal:
+            raise ValueError('Terminal not found')
+        
+        terminal.is_active = False
+        db.session.commit()
+        identity_cache.invalidate()
+        return True
+    
+    @staticmethod
+    def resolve(key):
+        """Active terminal for a key, or None"""
+        if not key:
+            return None
+        
+        return db.session.query(Terminal).filter_by(
+            key_hash=TerminalService._key_hash(key),
+            is_active=True
+        ).first()
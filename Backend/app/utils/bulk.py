@@ -0,0 +1,30 @@
+"""
+Bulk Statement Helpers
+"""
+from app.extensions import db
+
+
+def dialect_insert(model):
+    """
+    Build an INSERT for the bound dialect that supports ON CONFLICT
+
+    PostgreSQL and SQLite both expose on_conflict_do_update() and
+    .excluded on their dialect-specific insert constructs.
+
+    Usage:
+        stmt = dialect_insert(Product).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sku'],
+            set_={'name': stmt.excluded.name}
+        )
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'Upserts are not supported on {dialect}')
+
+    return insert(model)
@@ -0,0 +1,175 @@
+"""
+Connection Pool and Statement Timeouts
+"""
+import inspect
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+_statement_timeout = ContextVar('statement_timeout', default=None)
+
+# conn.info key: statement_timeout (ms) in force for the connection's current transaction
+_APPLIED = 'statement_timeout_ms'
+
+
+def _is_postgres(url):
+    return make_url(url).get_backend_name() == 'postgresql'
+
+
+def engine_options(url, config):
+    """
+    create_engine() options for a database URL from the DB_* settings
+
+    Only PostgreSQL gets pool sizing; SQLite (tests, local runs) keeps the
+    driver defaults Flask-SQLAlchemy picks for it.
+
+    In DB_PGBOUNCER mode (transaction pooling) no startup parameters are
+    sent and the default statement timeout is set per transaction instead,
+    since session state does not survive between transactions.
+    """
+    if not _is_postgres(url):
+        return {}
+
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+    if config['DB_PGBOUNCER']:
+        # psycopg 3 prepares repeated statements server-side; pgbouncer cannot route them.
+        # psycopg2 never does.
+        if make_url(url).get_driver_name() == 'psycopg':
+            options['connect_args'] = {'prepare_threshold': None}
+    elif config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {
+            'options': f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"
+        }
+
+    return options
+
+
+def configure_pool(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS and the bind options from the DB_* settings (before db.init_app)"""
+    config = app.config
+
+    options = engine_options(config['SQLALCHEMY_DATABASE_URI'], config)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = {}
+    for key, value in (config.get('SQLALCHEMY_BINDS') or {}).items():
+        if isinstance(value, dict):
+            binds[key] = {**engine_options(value['url'], config), **value}
+        else:
+            binds[key] = {'url': value, **engine_options(value, config)}
+    config['SQLALCHEMY_BINDS'] = binds
+
+
+def install_timeouts(app, engines):
+    """
+    Apply per-route statement timeouts (see statement_timeout) on PostgreSQL engines
+
+    The timeout is set with SET LOCAL on the first statement of a transaction
+    that needs a value other than the one already in force, so it is safe
+    under transaction pooling. Without pgbouncer the default is a connection
+    startup parameter and ordinary requests cost nothing. Behind pgbouncer
+    the server's own setting (assumed to be PostgreSQL's default, no
+    timeout) is in force, so only a non-zero DB_STATEMENT_TIMEOUT_MS costs
+    a SET LOCAL per transaction.
+    """
+    default = app.config['DB_STATEMENT_TIMEOUT_MS'] or 0
+    baseline = 0 if app.config['DB_PGBOUNCER'] else default
+
+    for engine in engines:
+        if engine.dialect.name != 'postgresql':
+            continue
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _apply_timeout(conn, cursor, statement, parameters, context, executemany):
+            wanted = _statement_timeout.get()
+            wanted = default if wanted is None else wanted
+            if conn.info.get(_APPLIED, baseline) == wanted:
+                return
+
+            with conn.connection.dbapi_connection.cursor() as setter:
+                setter.execute(f'SET LOCAL statement_timeout = {int(wanted)}')
+            conn.info[_APPLIED] = wanted
+
+        @event.listens_for(engine, 'commit')
+        @event.listens_for(engine, 'rollback')
+        def _transaction_ended(conn):
+            conn.info.pop(_APPLIED, None)
+
+        @event.listens_for(engine.pool, 'checkin')
+        def _checked_in(dbapi_connection, connection_record):
+            connection_record.info.pop(_APPLIED, None)
+
+
+def statement_timeout(config_key):
+    """
+    Run a function's queries under the statement timeout in config[config_key] (ms, 0 = none)
+
+    Usage:
+        @report_bp.route('/query', methods=['POST'])
+        @statement_timeout('REPORT_STATEMENT_TIMEOUT_MS')
+        def analytics_query():
+            ...
+
+    Generator functions (streamed responses) get the timeout while each
+    chunk is produced.
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @wraps(fn)
+            def generator(*args, **kwargs):
+                gen = fn(*args, **kwargs)
+                while True:
+                    token = _statement_timeout.set(current_app.config.get(config_key))
+                    try:
+                        chunk = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        _statement_timeout.reset(token)
+                    yield chunk
+            return generator
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _statement_timeout.set(current_app.config.get(config_key))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _statement_timeout.reset(token)
+        return wrapper
+    return decorator
+
+
+def pool_stats(engines):
+    """
+    Checkout counts per engine
+
+    Args:
+        engines: {bind name: Engine}
+
+    Returns:
+        dict: {bind name: {"pool", "status", "size", "checked_out", "checked_in", "overflow"}}
+    """
+    stats = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        entry = {'pool': type(pool).__name__, 'status': pool.status()}
+        if hasattr(pool, 'checkedout'):
+            entry.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow()
+            })
+        stats[name or 'primary'] = entry
+    return stats
@@ -0,0 +1,122 @@
+"""
+Read Replica Routing
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received.
+# NULL on a server that is not in recovery (replica URL pointing at a primary).
+PG_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaHealth:
+    """Per-process replication lag check, cached for REPLICA_LAG_CHECK_INTERVAL seconds"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._checked_at = None
+        self._healthy = False
+
+    def healthy(self, engine):
+        interval = current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', 5)
+
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < interval:
+                return self._healthy
+
+            self._healthy = self._check(engine)
+            self._checked_at = time.monotonic()
+            return self._healthy
+
+    def reset(self):
+        with self._lock:
+            self._checked_at = None
+
+    @staticmethod
+    def _check(engine):
+        if engine.dialect.name != 'postgresql':
+            return True
+
+        max_lag = current_app.config.get('REPLICA_MAX_LAG_SECONDS', 5)
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(PG_LAG_SQL).scalar() or 0)
+        except Exception as e:
+            current_app.logger.warning('Read replica unavailable, using primary: %s', e)
+            return False
+
+        if lag > max_lag:
+            current_app.logger.warning('Read replica is %.1fs behind, using primary', lag)
+            return False
+
+        return True
+
+
+replica_health = ReplicaHealth()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads made under @read_replica to the replica bind
+
+    Only SELECT statements are routed. Falls back to the primary when no
+    replica is configured, the replica is lagging or unreachable, or this
+    session has already written (so a request always reads its own writes).
+    Flushes and Core INSERT/UPDATE/DELETE always go to the primary, and the
+    latter count as writes too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _use_replica.get() and not self._flushing:
+            if clause is None or not getattr(clause, 'is_select', False):
+                if getattr(clause, 'is_dml', False):
+                    self.info['wrote'] = True
+            elif not self.info.get('wrote'):
+                engine = current_app.extensions['sqlalchemy'].engines.get(REPLICA_BIND)
+                if engine is not None and replica_health.healthy(engine):
+                    return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+
+def read_replica(fn):
+    """
+    Run a read-only service method against the replica when it is healthy
+
+    Usage:
+        @staticmethod
+        @read_replica
+        def get_all_sales(...):
+            ...
+
+    Never use on methods that write, or whose results must reflect a write
+    made by a previous request a moment ago.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
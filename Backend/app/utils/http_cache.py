@@ -0,0 +1,154 @@
+"""
+Conditional GET and Response Compression
+"""
+import gzip
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import func, select
+from app.extensions import db
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/plain',
+    'text/html'
+}
+
+
+def table_versions(models):
+    """
+    Cheap change fingerprint of each model's table, in one query
+
+    Tables with updated_at: (row count, latest updated_at), which catches
+    inserts, edits and deletes. Append-only tables (sales, stock movements,
+    users): latest created_at. Every max() is read from the end of an index
+    on its column, and count() from an index-only scan, so a poll never
+    scans the tables themselves.
+    """
+    columns = []
+    for model in models:
+        if hasattr(model, 'updated_at'):
+            columns.append(select(func.count()).select_from(model).scalar_subquery())
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        else:
+            columns.append(select(func.max(model.created_at)).scalar_subquery())
+    return tuple(db.session.execute(select(*columns)).one())
+
+
+def _settled(versions):
+    """
+    True once the newest change is older than HTTP_CACHE_SETTLE_SECONDS
+
+    Timestamps are taken at flush, not commit, so a transaction that
+    flushed earlier can still commit after a later one has been
+    fingerprinted, leaving count and max unchanged. Until the tables have
+    been quiet for longer than any writing transaction runs, the tag is not
+    trusted.
+    """
+    stamps = [value for value in versions if isinstance(value, datetime)]
+    if not stamps:
+        return True
+    settle = current_app.config.get('HTTP_CACHE_SETTLE_SECONDS', 30)
+    return datetime.utcnow() - max(stamps) >= timedelta(seconds=settle)
+
+
+def conditional(*models):
+    """
+    Weak ETag for a GET list endpoint from the versions of the tables it reads
+
+    The fingerprint is checked before the view runs, so an unchanged poll
+    costs one small query and returns 304 with no body. The tag also covers
+    the path and query string. While the tables are still settling (see
+    _settled) the view runs as usual and only the body ETag applies.
+
+    Usage:
+        @inventory_bp.route('', methods=['GET'])
+        @jwt_required()
+        @read_replica
+        @conditional(ProductVariant, Product, Category, Brand, Size)
+        def get_inventory():
+            ...
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = table_versions(models)
+            if not _settled(versions):
+                return fn(*args, **kwargs)
+
+            digest = hashlib.sha1(repr((request.full_path, versions)).encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(digest):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(digest, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _add_body_etag(response):
+    """Weak ETag from the body for GETs that have none, answering If-None-Match with 304"""
+    if (request.method != 'GET' or response.status_code != 200 or response.is_streamed
+            or response.direct_passthrough or 'ETag' in response.headers):
+        return response
+
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest(), weak=True)
+    response.headers.setdefault('Cache-Control', 'private, no-cache')
+    return response.make_conditional(request)
+
+
+def _compress(response):
+    config = current_app.config
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        data = brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_http_cache(app):
+    """Register body ETags and compression (ETags are computed on the uncompressed body)"""
+    if app.config.get('COMPRESS_ENABLED', True):
+        app.after_request(_compress)
+    # after_request functions run in reverse order of registration
+    app.after_request(_add_body_etag)
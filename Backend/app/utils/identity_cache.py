@@ -0,0 +1,77 @@
+"""
+Token Identity Cache
+"""
+import threading
+import time
+from flask import current_app
+from app.extensions import db
+from app.models.user import User
+from app.models.terminal import Terminal
+
+
+class IdentityCache:
+    """
+    Per-process map of user id -> (auth_epoch, is_active), and the set of
+    active terminal ids
+
+    Lets every authenticated request check that its token is still current
+    without loading the user or, for a PIN token, its terminal: both are
+    reloaded (the staff and till tables are small) at most every
+    IDENTITY_CACHE_TTL seconds, and immediately in this process after
+    invalidate(). Other processes pick up a change within the TTL.
+    """
+
+    # Minimum seconds between reloads triggered by an unknown user id
+    MISS_RELOAD_INTERVAL = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}
+        self._terminals = set()
+        self._loaded_at = None
+
+    def _load(self):
+        rows = db.session.query(User.id, User.auth_epoch, User.is_active).all()
+        self._users = {row.id: (row.auth_epoch, row.is_active) for row in rows}
+        self._terminals = {row.id for row in db.session.query(Terminal.id).filter_by(is_active=True)}
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self, missing):
+        """Reload when stale, or when an id may have been created in another process since the last load"""
+        age = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+        if age is None or age >= current_app.config.get('IDENTITY_CACHE_TTL', 30):
+            self._load()
+        elif missing() and age >= self.MISS_RELOAD_INTERVAL:
+            self._load()
+
+    def get(self, user_id):
+        """(auth_epoch, is_active) for user_id, or None if the user does not exist"""
+        with self._lock:
+            self._refresh(lambda: user_id not in self._users)
+            return self._users.get(user_id)
+
+    def terminal_active(self, terminal_id):
+        """True if the terminal exists and has not been deactivated"""
+        with self._lock:
+            self._refresh(lambda: terminal_id not in self._terminals)
+            return terminal_id in self._terminals
+
+    def is_current(self, user_id, epoch, terminal_id=None):
+        """
+        True if the user exists, is active and the token's epoch matches, and
+        the terminal a PIN token was issued on (if any) is still active
+        """
+        try:
+            entry = self.get(int(user_id))
+        except (TypeError, ValueError):
+            return False
+        if entry is None or not entry[1] or entry[0] != (epoch or 0):
+            return False
+        return terminal_id is None or self.terminal_active(terminal_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+identity_cache = IdentityCache()
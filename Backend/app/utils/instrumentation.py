@@ -0,0 +1,214 @@
+"""
+Request Instrumentation and Metrics
+"""
+import hmac
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from app.utils.db_pool import pool_stats
+
+# Request duration histogram buckets (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RequestStats:
+    """Cost of the current request, kept on flask.g"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.shapes = Counter()
+        self.repeated = set()
+
+
+class MetricsRegistry:
+    """
+    Per-process request metrics in Prometheus text format
+
+    Labelled by Flask endpoint (blueprint.function), never by raw path, so
+    the number of series stays fixed. Each app worker keeps its own
+    counters; scrape every worker or sum them in the collector.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._requests = Counter()  # (method, endpoint, status)
+        self._buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))  # (method, endpoint)
+        self._duration_sum = Counter()
+        self._duration_count = Counter()
+        self._db_seconds = Counter()  # endpoint
+        self._queries = Counter()
+        self._rows = Counter()
+        self._n_plus_one = Counter()
+
+    def observe(self, method, endpoint, status, duration, stats):
+        with self._lock:
+            self._requests[(method, endpoint, status)] += 1
+            buckets = self._buckets[(method, endpoint)]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            self._duration_sum[(method, endpoint)] += duration
+            self._duration_count[(method, endpoint)] += 1
+            self._db_seconds[endpoint] += stats.db_time
+            self._queries[endpoint] += stats.queries
+            self._rows[endpoint] += stats.rows
+            if stats.repeated:
+                self._n_plus_one[endpoint] += 1
+
+    @staticmethod
+    def _labels(**labels):
+        pairs = ','.join(
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+            for k, v in labels.items()
+        )
+        return '{' + pairs + '}'
+
+    def render(self, engines=None):
+        """Prometheus text exposition of everything recorded in this process"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        with self._lock:
+            metric('pos_http_requests_total', 'counter', 'Requests handled.', [
+                f'pos_http_requests_total{self._labels(method=m, endpoint=e, status=s)} {n}'
+                for (m, e, s), n in sorted(self._requests.items())
+            ])
+
+            samples = []
+            for (m, e), buckets in sorted(self._buckets.items()):
+                for bound, n in zip(DURATION_BUCKETS, buckets):
+                    samples.append(
+                        f'pos_http_request_duration_seconds_bucket{self._labels(method=m, endpoint=e, le=bound)} {n}'
+                    )
+                count = self._duration_count[(m, e)]
+                samples.append(
+                    f'pos_http_request_duration_seconds_bucket{self._labels(method=m, endpoint=e, le="+Inf")} {count}'
+                )
+                samples.append(
+                    f'pos_http_request_duration_seconds_sum{self._labels(method=m, endpoint=e)} '
+                    f'{self._duration_sum[(m, e)]:.6f}'
+                )
+                samples.append(f'pos_http_request_duration_seconds_count{self._labels(method=m, endpoint=e)} {count}')
+            metric('pos_http_request_duration_seconds', 'histogram', 'Request wall time.', samples)
+
+            for name, help_text, values, fmt in (
+                ('pos_db_query_seconds_total', 'Time spent in database statements.', self._db_seconds, '{:.6f}'),
+                ('pos_db_queries_total', 'Database statements executed.', self._queries, '{}'),
+                ('pos_db_rows_total', 'Rows returned or affected, where the driver reports them.', self._rows, '{}'),
+                ('pos_db_n_plus_one_total', 'Requests that repeated one statement more than PERF_N_PLUS_ONE_THRESHOLD times.',
+                 self._n_plus_one, '{}')
+            ):
+                metric(name, 'counter', help_text, [
+                    f'{name}{self._labels(endpoint=e)} {fmt.format(v)}'
+                    for e, v in sorted(values.items())
+                ])
+
+        if engines:
+            samples = []
+            for engine, stats in pool_stats(engines).items():
+                if 'checked_out' in stats:
+                    samples.append(f'pos_db_pool_checked_out{self._labels(engine=engine)} {stats["checked_out"]}')
+            metric('pos_db_pool_checked_out', 'gauge', 'Connections checked out of the pool.', samples)
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def _stats():
+    if has_request_context():
+        return g.get('_request_stats')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _stats() is not None:
+        conn.info['perf_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    started = conn.info.pop('perf_started', None)
+    if stats is None or started is None:
+        return
+
+    stats.db_time += time.perf_counter() - started
+    stats.queries += 1
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    stats.shapes[shape] += 1
+    if stats.shapes[shape] > current_app.config.get('PERF_N_PLUS_ONE_THRESHOLD', 10):
+        stats.repeated.add(shape)
+
+
+def _start_request():
+    g._request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.pop('_request_stats', None)
+    if stats is None:
+        return response
+
+    duration = time.perf_counter() - stats.started
+    endpoint = request.endpoint or 'unmatched'
+
+    if stats.repeated:
+        for shape in stats.repeated:
+            current_app.logger.warning(
+                'Possible N+1 in %s: statement ran %s times: %s',
+                endpoint, stats.shapes[shape], shape[:200]
+            )
+
+    metrics.observe(request.method, endpoint, response.status_code, duration, stats)
+
+    if current_app.config.get('PERF_SERVER_TIMING', True):
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows"'
+        )
+
+    return response
+
+
+def init_instrumentation(app, db):
+    """Register the request hooks, engine listeners and GET /metrics on app"""
+    if not app.config.get('PERF_INSTRUMENTATION', True):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        token = app.config.get('METRICS_TOKEN')
+        presented = request.headers.get('Authorization', '').encode()
+        if token and not hmac.compare_digest(presented, f'Bearer {token}'.encode()):
+            return {'error': 'Invalid metrics token'}, 401
+
+        g.pop('_request_stats', None)  # scrapes are not recorded
+        return Response(metrics.render(db.engines), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,136 @@
+"""
+Non-blocking Application Logging
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+from flask.logging import default_handler
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request and exception"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key in ('method', 'path', 'remote_addr'):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class _RequestContextHandler(QueueHandler):
+    """
+    Queue handler that captures request details on the calling thread
+
+    The message arguments and traceback are rendered to text here (they may
+    reference objects that change once the caller moves on); the output
+    line itself is formatted on the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+            record.remote_addr = request.remote_addr
+        return record
+
+
+class LogQueue:
+    """
+    Process-wide log queue drained by a single writer thread
+
+    Request threads only enqueue records; formatting the output line and the
+    write to stderr happen on the listener thread, so a slow or blocked log
+    sink never stalls a request. Restarted in forked children (gunicorn
+    --preload), where the parent's thread does not exist.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listener = None
+        self._formatter = None
+        self.handler = _RequestContextHandler(queue.Queue(-1))
+
+    def _start(self):
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(self._formatter)
+        self._listener = QueueListener(self.handler.queue, output)
+        self._listener.start()
+
+    def install(self, formatter, level):
+        """Start the writer (once) and make the queue the root logger's handler"""
+        with self._lock:
+            self._formatter = formatter
+            self.handler.setLevel(level)
+            if self._listener is None:
+                self._start()
+            else:
+                for output in self._listener.handlers:
+                    output.setFormatter(formatter)
+
+        root = logging.getLogger()
+        if self.handler not in root.handlers:
+            root.addHandler(self.handler)
+
+    def stop(self):
+        """Flush queued records and stop the writer"""
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self._listener is not None:
+            self._start()
+
+
+log_queue = LogQueue()
+atexit.register(log_queue.stop)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=log_queue._after_fork)
+
+
+def configure_logging(app):
+    """Route the app's and libraries' logs through the queue at LOG_LEVEL"""
+    level = logging.getLevelName(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    log_queue.install(formatter, level)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(level)
@@ -0,0 +1,48 @@
+"""
+Money Helpers
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.ext.hybrid import hybrid_property
+
+CENT = Decimal('0.01')
+
+
+def to_cents(amount):
+    """
+    Convert a money amount (int, float, str or Decimal) to integer cents
+
+    Floats go through str() so 10.1 becomes 1010, not 1009.
+    """
+    if isinstance(amount, bool):
+        raise ValueError('Invalid money amount')
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Convert integer cents to a float for JSON responses"""
+    return cents / 100 if cents is not None else None
+
+
+def money_property(cents_attr):
+    """
+    Decimal view over an integer-cents column
+
+    Compatibility layer for code that still reads or assigns amounts:
+    reading returns a Decimal, assigning accepts int/float/str/Decimal and
+    stores cents, and in SQL it renders as cents / 100.
+
+    Usage:
+        min_price_cents = db.Column(db.BigInteger, nullable=False)
+        min_price = money_property('min_price_cents')
+    """
+    def fget(self):
+        cents = getattr(self, cents_attr)
+        return (Decimal(cents) / 100).quantize(CENT) if cents is not None else None
+
+    def fset(self, value):
+        setattr(self, cents_attr, to_cents(value) if value is not None else None)
+
+    def expr(cls):
+        return getattr(cls, cents_attr) / 100.0
+
+    return hybrid_property(fget, fset, expr=expr)
@@ -0,0 +1,148 @@
+"""
+Password Hashing
+"""
+import os
+import random
+import threading
+import time
+import bcrypt
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: hashing is not capped
+    fcntl = None
+
+
+class HasherBusyError(Exception):
+    """Too many password hashes are already running; the client should retry shortly"""
+
+
+class PasswordTooLongError(ValueError):
+    """bcrypt only uses the first 72 bytes of a password and refuses longer ones"""
+
+
+class SlotFiles:
+    """
+    A host-wide counting semaphore made of lock files
+
+    Holding an exclusive flock on one of `count` files in `directory` is
+    holding a slot. Every open() is its own lock owner, so threads of one
+    worker and separate worker processes compete alike, and the kernel
+    frees the slot if its holder dies.
+    """
+
+    def __init__(self, directory, name, count):
+        self.paths = [os.path.join(directory, f'{name}-{i}.lock') for i in range(max(count, 0))]
+
+    def try_acquire(self):
+        """An open fd holding a free slot, or None if all are taken"""
+        for path in random.sample(self.paths, len(self.paths)):
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def release(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing with a host-wide cap shared by every worker
+
+    At most PASSWORD_HASH_CONCURRENCY hashes run at once across all worker
+    processes on the host, and at most PASSWORD_HASH_MAX_QUEUE more callers
+    wait (up to PASSWORD_HASH_QUEUE_TIMEOUT seconds) for one of them. Any
+    other caller gets HasherBusyError (503) straight away, so a login burst
+    can tie up at most concurrency + queue sync workers and the rest keep
+    serving checkout. Slots are lock files under PASSWORD_HASH_LOCK_DIR
+    (default <instance>/password-slots), which every worker of one
+    deployment must share. Without fcntl (Windows) hashing is not capped.
+    """
+
+    MAX_BYTES = 72
+    POLL_INTERVAL = 0.02  # seconds between slot checks while queued
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._directories = set()
+
+    def _config(self, key, default):
+        return current_app.config.get(key, default)
+
+    def _slots(self, name, count):
+        directory = self._config('PASSWORD_HASH_LOCK_DIR', None) or os.path.join(
+            current_app.instance_path, 'password-slots'
+        )
+        with self._lock:
+            if directory not in self._directories:
+                os.makedirs(directory, exist_ok=True)
+                self._directories.add(directory)
+        return SlotFiles(directory, name, count)
+
+    def _acquire(self):
+        running = self._slots('hash', max(self._config('PASSWORD_HASH_CONCURRENCY', 2), 1))
+        slot = running.try_acquire()
+        if slot is not None:
+            return slot
+
+        queued = self._slots('queue', self._config('PASSWORD_HASH_MAX_QUEUE', 4)).try_acquire()
+        if queued is None:
+            raise HasherBusyError('Too many logins in progress, please retry')
+
+        try:
+            deadline = time.monotonic() + self._config('PASSWORD_HASH_QUEUE_TIMEOUT', 2)
+            while slot is None:
+                if time.monotonic() >= deadline:
+                    raise HasherBusyError('Too many logins in progress, please retry')
+                time.sleep(self.POLL_INTERVAL)
+                slot = running.try_acquire()
+            return slot
+        finally:
+            SlotFiles.release(queued)
+
+    def _run(self, fn, *args):
+        if fcntl is None:
+            return fn(*args)
+
+        slot = self._acquire()
+        try:
+            return fn(*args)
+        finally:
+            SlotFiles.release(slot)
+
+    def _encode(self, password):
+        encoded = password.encode('utf-8')
+        if len(encoded) > self.MAX_BYTES:
+            raise PasswordTooLongError(f'Password must be at most {self.MAX_BYTES} bytes')
+        return encoded
+
+    @property
+    def rounds(self):
+        """Configured bcrypt cost (log2 rounds)"""
+        return self._config('BCRYPT_LOG_ROUNDS', 12)
+
+    def hash(self, password):
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        salt = bcrypt.gensalt(rounds=self.rounds, prefix=self._config('BCRYPT_HASH_PREFIX', '2b').encode('ascii'))
+        return self._run(bcrypt.hashpw, self._encode(password), salt).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        return self._run(bcrypt.checkpw, self._encode(password), pw_hash.encode('utf-8'))
+
+    def needs_rehash(self, pw_hash):
+        """True if pw_hash was made with a different cost than configured"""
+        try:
+            return int(pw_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,143 @@
+"""
+Per-worker Variant Pricing Table
+"""
+import threading
+import time
+from array import array
+from flask import current_app
+from app.extensions import db
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.utils.money import to_cents
+
+
+class PricingTable:
+    """
+    In-memory variant id -> (product active, min cents, max cents)
+
+    Values live in flat arrays indexed directly by variant id, so a lookup
+    is three array reads with no ORM objects involved. Checkout uses it only
+    to reject bad lines before taking any row locks, after confirming the
+    rejection against the product row; the locked rows are always validated
+    as well, since the table can lag edits made in other workers. It is loaded lazily with a single query, dropped by
+    invalidate() whenever products change in this worker, and reloaded after
+    PRICING_CACHE_TTL seconds by one request while the others keep using
+    the old table.
+    """
+
+    UNKNOWN = -1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        """Drop the table; the next lookup reloads it"""
+        self._table = None
+
+    def check(self, variant_id, price):
+        """
+        Reject a cart line early if it is invalid
+
+        The table can lag edits made in other workers, so it is only trusted
+        to let lines through: a line it would reject is re-checked against
+        its product row (one indexed read, no lock) and the table entry is
+        refreshed. Variants the table does not know yet pass; they are
+        validated against the locked rows like every other line.
+
+        Raises:
+            ValueError: If the product is inactive or the price is out of range
+        """
+        if not isinstance(variant_id, int):
+            return
+
+        table = self._get_table()
+        if table is None:
+            return
+
+        active, min_cents, max_cents = table
+
+        if not 0 <= variant_id < len(min_cents) or min_cents[variant_id] == self.UNKNOWN:
+            return
+
+        price_cents = to_cents(price)
+        if self._error(variant_id, price, price_cents, active[variant_id], min_cents[variant_id], max_cents[variant_id]) is None:
+            return
+
+        row = db.session.query(
+            Product.is_active,
+            Product.min_price_cents,
+            Product.max_price_cents
+        ).join(
+            ProductVariant, ProductVariant.product_id == Product.id
+        ).filter(
+            ProductVariant.id == variant_id
+        ).first()
+        if row is None:
+            return
+
+        active[variant_id] = 1 if row.is_active else 0
+        min_cents[variant_id] = row.min_price_cents
+        max_cents[variant_id] = row.max_price_cents
+
+        error = self._error(variant_id, price, price_cents, row.is_active, row.min_price_cents, row.max_price_cents)
+        if error is not None:
+            raise ValueError(error)
+
+    @staticmethod
+    def _error(variant_id, price, price_cents, active, min_cents, max_cents):
+        if not active:
+            return f'Product for variant {variant_id} is not active'
+
+        if price_cents < min_cents or price_cents > max_cents:
+            return (
+                f'Price {price} is outside allowed range '
+                f'({min_cents / 100:.2f} - {max_cents / 100:.2f})'
+            )
+
+        return None
+
+    def _get_table(self):
+        table = self._table
+        ttl = current_app.config.get('PRICING_CACHE_TTL', 60)
+
+        if table is not None and time.monotonic() - self._loaded_at < ttl:
+            return table
+
+        # One request reloads; the others carry on with what there is
+        if not self._lock.acquire(blocking=False):
+            return table
+
+        try:
+            self._table = self._load()
+            self._loaded_at = time.monotonic()
+            return self._table
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _load():
+        rows = db.session.query(
+            ProductVariant.id,
+            Product.is_active,
+            Product.min_price_cents,
+            Product.max_price_cents
+        ).join(
+            Product, ProductVariant.product_id == Product.id
+        ).all()
+
+        size = max((row.id for row in rows), default=-1) + 1
+        active = array('b', bytes(size))
+        min_cents = array('q', [PricingTable.UNKNOWN]) * size
+        max_cents = array('q', [PricingTable.UNKNOWN]) * size
+
+        for row in rows:
+            active[row.id] = 1 if row.is_active else 0
+            min_cents[row.id] = row.min_price_cents
+            max_cents[row.id] = row.max_price_cents
+
+        return active, min_cents, max_cents
+
+
+pricing_table = PricingTable()
@@ -0,0 +1,87 @@
+"""
+Report Result Cache
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReportCache:
+    """
+    Size-bounded LRU cache with optional per-entry TTL
+
+    Entries stored with open_bucket=True hold data for the current reporting
+    day; invalidate_open() drops just those when a new sale lands. Closed
+    days are keyed on the rollup generation (see generation()), so a rebuild
+    in any process retires them.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+
+    def get_or_compute(self, key, compute, ttl=None, open_bucket=False):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        Args:
+            ttl: Seconds before the entry expires (None keeps it until evicted)
+            open_bucket: Entry covers the current day and is dropped by invalidate_open()
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (value, now + ttl if ttl is not None else None, open_bucket)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def generation(self, key, read, ttl):
+        """
+        Shared version number for key, calling read() at most every ttl seconds
+
+        Args:
+            read: Loads the current value (e.g. from the database)
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._generations.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        value = read()
+
+        with self._lock:
+            self._generations[key] = (value, now + ttl)
+
+        return value
+
+    def invalidate_open(self):
+        """Drop entries covering the current day"""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[2]]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+report_cache = ReportCache()
@@ -0,0 +1,121 @@
+"""
+Materialized Report Store
+"""
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from flask import current_app
+from app.utils.reporting import reporting_key
+
+
+class ReportStore:
+    """
+    Pre-rendered report bodies on local disk
+
+    One file per (report, parameters, reporting-day window, format), under a
+    directory per reporting_key() so blobs cut with another timezone or
+    cutoff are never served. Besides the rendered JSON and CSV bodies, the
+    per-group sums of a window's closed days are kept in 'sums' files for
+    the report service to merge with the live open day. Writes go through a
+    temp file and os.replace, so readers never see a partial blob.
+    """
+
+    FORMATS = ['json', 'csv']
+    SUMS = 'sums'
+
+    @staticmethod
+    def _root():
+        root = current_app.config.get('REPORT_STORE_DIR') or os.path.join(
+            current_app.instance_path, 'reports'
+        )
+        return os.path.join(root, ReportStore._safe(reporting_key()))
+
+    @staticmethod
+    def _safe(value):
+        return re.sub(r'[^A-Za-z0-9@=._-]', '_', str(value))
+
+    def path(self, name, params, start_day, end_day, fmt):
+        suffix = ''.join(f'_{self._safe(k)}={self._safe(v)}' for k, v in params)
+        filename = f'{start_day.isoformat()}_{end_day.isoformat()}{suffix}.{fmt}'
+        return os.path.join(self._root(), self._safe(name), filename)
+
+    def get(self, name, params, start_day, end_day, fmt):
+        """Stored blob as bytes, or None"""
+        try:
+            with open(self.path(name, params, start_day, end_day, fmt), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name, params, start_day, end_day, fmt, data):
+        path = self.path(name, params, start_day, end_day, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data.encode('utf-8') if isinstance(data, str) else data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def get_sums(self, name, params, start_day, end_day):
+        """Stored {group key: [sum, ...]} for a window, or None"""
+        blob = self.get(name, params, start_day, end_day, self.SUMS)
+        if blob is None:
+            return None
+
+        return {
+            tuple(key): sums
+            for key, sums in json.loads(blob, object_hook=self._decode)
+        }
+
+    def put_sums(self, name, params, start_day, end_day, sums):
+        """Store per-group sums; keys may hold dates and datetimes"""
+        data = json.dumps([[list(key), list(values)] for key, values in sums.items()], default=self._encode)
+        self.put(name, params, start_day, end_day, self.SUMS, data)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, datetime):
+            return {'datetime': value.isoformat()}
+        if isinstance(value, date):
+            return {'date': value.isoformat()}
+        raise TypeError(f'Cannot store {type(value).__name__} in report sums')
+
+    @staticmethod
+    def _decode(obj):
+        if 'datetime' in obj:
+            return datetime.fromisoformat(obj['datetime'])
+        if 'date' in obj:
+            return date.fromisoformat(obj['date'])
+        return obj
+
+    def prune(self, before_day):
+        """Delete blobs whose window ends before before_day; returns the number removed"""
+        removed = 0
+        root = self._root()
+        if not os.path.isdir(root):
+            return 0
+
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                try:
+                    end_day = date.fromisoformat(filename.split('_')[1][:10])
+                except (IndexError, ValueError):
+                    continue
+                if end_day < before_day:
+                    os.remove(os.path.join(directory, filename))
+                    removed += 1
+
+        return removed
+
+    def clear(self):
+        """Delete every blob for the current reporting_key()"""
+        return self.prune(date.max)
+
+
+report_store = ReportStore()
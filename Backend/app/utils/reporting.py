@@ -0,0 +1,103 @@
+"""
+Reporting Day Helpers
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from flask import current_app
+
+
+def store_timezone_name():
+    """Configured store timezone name"""
+    return current_app.config.get('STORE_TIMEZONE', 'UTC')
+
+
+def store_timezone():
+    return ZoneInfo(store_timezone_name())
+
+
+def day_cutoff_hour():
+    """Store-local hour at which a reporting day starts (0 = midnight)"""
+    hour = int(current_app.config.get('REPORTING_DAY_CUTOFF_HOUR', 0))
+    if not 0 <= hour <= 23:
+        raise ValueError('REPORTING_DAY_CUTOFF_HOUR must be between 0 and 23')
+    return hour
+
+
+def day_start(day):
+    """Naive store-local timestamp at which reporting day `day` starts"""
+    return datetime.combine(day, time(day_cutoff_hour()))
+
+
+def reporting_key():
+    """
+    Timezone and cutoff the rollups were bucketed with (part of every rollup key)
+
+    e.g. 'Africa/Nairobi', or 'Africa/Nairobi@04' with a 04:00 cutoff, so
+    rows bucketed under another configuration are never mixed in.
+    """
+    hour = day_cutoff_hour()
+    name = store_timezone_name()
+    return f'{name}@{hour:02d}' if hour else name
+
+
+def to_local(utc_dt):
+    """Convert a naive UTC timestamp (as stored) to store-local time"""
+    return utc_dt.replace(tzinfo=timezone.utc).astimezone(store_timezone())
+
+
+def to_utc(local_dt):
+    """Convert a naive store-local timestamp to naive UTC (as stored)"""
+    return local_dt.replace(tzinfo=store_timezone()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def reporting_day(utc_dt):
+    """Reporting day a naive UTC timestamp belongs to (trading before the cutoff counts for the previous day)"""
+    return (to_local(utc_dt) - timedelta(hours=day_cutoff_hour())).date()
+
+
+def today():
+    """Current reporting day"""
+    return reporting_day(datetime.utcnow())
+
+
+def day_bounds(start_day, end_day):
+    """
+    Naive UTC [start, end) covering reporting days start_day..end_day inclusive
+
+    Use as a range predicate on created_at so the index can be used:
+        Sale.created_at >= start, Sale.created_at < end
+    """
+    return to_utc(day_start(start_day)), to_utc(day_start(end_day + timedelta(days=1)))
+
+
+def window(days):
+    """(start_day, end_day) for the last `days` reporting days including today"""
+    end_day = today()
+    return end_day - timedelta(days=max(days, 1) - 1), end_day
+
+
+def resolve_range(days, start=None, end=None):
+    """
+    (start_day, end_day) from explicit ISO dates, falling back to a days window
+
+    Raises:
+        ValueError: If a date is malformed or start is after end
+    """
+    if not start and not end:
+        return window(days)
+
+    try:
+        end_day = date.fromisoformat(end) if end else today()
+        start_day = date.fromisoformat(start) if start else end_day - timedelta(days=max(days, 1) - 1)
+    except ValueError:
+        raise ValueError('start and end must be dates in YYYY-MM-DD format')
+
+    if start_day > end_day:
+        raise ValueError('start must not be after end')
+
+    return start_day, end_day
+
+
+def local_hour(utc_dt):
+    """Naive store-local start of the hour a naive UTC timestamp falls in"""
+    return to_local(utc_dt).replace(minute=0, second=0, microsecond=0, tzinfo=None)
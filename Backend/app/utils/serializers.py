@@ -0,0 +1,150 @@
+"""
+Schema-driven Row Serializers
+"""
+from collections import defaultdict
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.size import Size
+from app.utils.money import from_cents
+
+
+class RowSchema:
+    """
+    Response shape declared as output key -> SQL column
+
+    The schema selects exactly its columns and builds each output dict
+    straight from the row tuple, without loading ORM objects, so list
+    endpoints cost one query and no per-row lazy loads. Values go out as
+    the driver returns them (the JSON provider encodes datetimes).
+
+    A field is a column, a (column, converter) pair, or a nested RowSchema
+    for a to-one relation. A nested schema with `present` set renders as
+    None when that column is NULL (outer join found nothing).
+
+    Usage:
+        SIZE = RowSchema(id=Size.id, name=Size.name, present=Size.id)
+        rows = SIZE.all(lambda stmt: stmt.where(Size.is_active == True))
+    """
+
+    def __init__(self, present=None, **fields):
+        self.present = present
+        self.fields = fields
+        self.columns, self._build = self._compile()
+
+    def _compile(self, offset=0):
+        columns = []
+        present_index = None
+        if self.present is not None:
+            present_index = offset
+            columns.append(self.present)
+
+        plan = []
+        for key, spec in self.fields.items():
+            index = offset + len(columns)
+            if isinstance(spec, RowSchema):
+                sub_columns, sub_build = spec._compile(index)
+                columns.extend(sub_columns)
+                plan.append((key, None, sub_build))
+            else:
+                column, converter = spec if isinstance(spec, tuple) else (spec, None)
+                columns.append(column)
+                plan.append((key, index, converter))
+
+        def build(row):
+            if present_index is not None and row[present_index] is None:
+                return None
+            data = {}
+            for key, index, extra in plan:
+                if index is None:
+                    data[key] = extra(row)
+                elif extra is None:
+                    data[key] = row[index]
+                else:
+                    value = row[index]
+                    data[key] = extra(value) if value is not None else None
+            return data
+
+        return columns, build
+
+    def select(self):
+        return select(*self.columns)
+
+    def all(self, refine=None):
+        """
+        Run the schema's select and return one dict per row
+
+        Args:
+            refine: Function taking the select and returning it with FROM,
+                    joins, filters and ordering applied
+        """
+        stmt = self.select()
+        if refine is not None:
+            stmt = refine(stmt)
+        build = self._build
+        return [build(row) for row in db.session.execute(stmt)]
+
+
+def group_rows(rows, key):
+    """{rows[i][key]: [rows with that key, in order]}"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[key]].append(row)
+    return groups
+
+
+def lookup_schema(model):
+    """Shape of Category/Brand/Size.to_dict()"""
+    return RowSchema(
+        present=model.id,
+        id=model.id,
+        name=model.name,
+        description=model.description,
+        is_active=model.is_active,
+        created_at=model.created_at
+    )
+
+
+CATEGORY = lookup_schema(Category)
+BRAND = lookup_schema(Brand)
+SIZE = lookup_schema(Size)
+
+
+def product_fields():
+    """Fields of Product.to_dict() without stock and variants (join Category and Brand)"""
+    return dict(
+        id=Product.id,
+        sku=Product.sku,
+        name=Product.name,
+        min_price=(Product.min_price_cents, from_cents),
+        max_price=(Product.max_price_cents, from_cents),
+        category_id=Product.category_id,
+        category=CATEGORY,
+        brand_id=Product.brand_id,
+        brand=BRAND,
+        is_active=Product.is_active,
+        created_at=Product.created_at,
+        updated_at=Product.updated_at
+    )
+
+
+def variant_fields():
+    """Fields of ProductVariant.to_dict() (join Product and Size)"""
+    return dict(
+        id=ProductVariant.id,
+        product_id=ProductVariant.product_id,
+        size_id=ProductVariant.size_id,
+        size=SIZE,
+        quantity=ProductVariant.quantity,
+        sku_suffix=ProductVariant.sku_suffix,
+        full_sku=Product.sku + func.coalesce(ProductVariant.sku_suffix, ''),
+        created_at=ProductVariant.created_at,
+        updated_at=ProductVariant.updated_at
+    )
+
+
+PRODUCT = RowSchema(**product_fields())
+VARIANT = RowSchema(**variant_fields())
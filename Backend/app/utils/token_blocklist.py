@@ -0,0 +1,176 @@
+"""
+JWT Revocation List
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (no false negatives, no removal)"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class TokenBlocklist:
+    """
+    Per-process view of the revoked_tokens table
+
+    A bloom filter of revoked jtis answers the common case (token not
+    revoked) in memory. Only a filter hit is confirmed against the table,
+    and the answer is kept in a small LRU. Tokens revoked by other
+    processes are picked up with one indexed query at most every
+    TOKEN_BLOCKLIST_SYNC_INTERVAL seconds, for rows revoked since the last
+    sync minus TOKEN_BLOCKLIST_SYNC_LOOKBACK seconds: revoked_at is set at
+    insert, so a row can commit after a later one has already been read,
+    and ids are no cursor either. The filter is rebuilt
+    from unexpired rows every TOKEN_BLOCKLIST_REBUILD_INTERVAL seconds, or
+    sooner once it fills up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_through = None
+        self._synced_at = None
+        self._built_at = None
+        self._confirmed = OrderedDict()
+
+    def _config(self, key, default):
+        return current_app.config.get(key, default)
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self._config('TOKEN_BLOCKLIST_SYNC_INTERVAL', 5):
+            return
+
+        rebuild = (
+            self._filter is None
+            or self._filter.count > self._filter.capacity
+            or now - self._built_at >= self._config('TOKEN_BLOCKLIST_REBUILD_INTERVAL', 600)
+        )
+
+        started = datetime.utcnow()
+        query = db.session.query(RevokedToken.jti)
+        if rebuild:
+            rows = query.filter(RevokedToken.expires_at > started).all()
+            capacity = max(self._config('TOKEN_BLOCKLIST_CAPACITY', 100000), 2 * len(rows))
+            self._filter = BloomFilter(capacity, self._config('TOKEN_BLOCKLIST_ERROR_RATE', 0.001))
+            self._confirmed.clear()
+            self._built_at = now
+        else:
+            lookback = timedelta(seconds=self._config('TOKEN_BLOCKLIST_SYNC_LOOKBACK', 60))
+            rows = query.filter(RevokedToken.revoked_at > self._synced_through - lookback).all()
+
+        for row in rows:
+            # The lookback re-reads recent rows; count each jti once
+            if row.jti not in self._filter:
+                self._filter.add(row.jti)
+            if self._confirmed.get(row.jti) is not True:
+                self._confirmed.pop(row.jti, None)
+        self._synced_through = started
+        self._synced_at = now
+
+    def _remember(self, jti, revoked):
+        self._confirmed[jti] = revoked
+        self._confirmed.move_to_end(jti)
+        while len(self._confirmed) > self._config('TOKEN_BLOCKLIST_LRU_SIZE', 4096):
+            self._confirmed.popitem(last=False)
+
+    def is_revoked(self, jti):
+        """True if the token with this jti has been revoked"""
+        if not jti:
+            return False
+
+        with self._lock:
+            self._sync()
+            if jti not in self._filter:
+                return False
+            if jti in self._confirmed:
+                self._confirmed.move_to_end(jti)
+                return self._confirmed[jti]
+
+        revoked = db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+        with self._lock:
+            self._remember(jti, revoked)
+        return revoked
+
+    def revoke(self, jwt_payload):
+        """
+        Persist a token's revocation and apply it in this process at once
+
+        Args:
+            jwt_payload: Decoded token (needs jti, type, sub and exp)
+        """
+        jti = jwt_payload['jti']
+        expires_at = datetime.utcfromtimestamp(jwt_payload['exp']) if jwt_payload.get('exp') else datetime.max
+
+        try:
+            db.session.add(RevokedToken(
+                jti=jti,
+                token_type=jwt_payload.get('type', 'access'),
+                user_id=int(jwt_payload['sub']) if jwt_payload.get('sub') is not None else None,
+                expires_at=expires_at
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Already revoked
+            db.session.rollback()
+
+        with self._lock:
+            self._sync()
+            self._filter.add(jti)
+            self._remember(jti, True)
+
+    def prune(self):
+        """Delete rows for tokens that have expired anyway; returns the number removed"""
+        removed = db.session.query(RevokedToken).filter(
+            RevokedToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        self.invalidate()
+        return removed
+
+    def invalidate(self):
+        """
+        Rebuild the filter from the table on the next check
+
+        prune() calls it because a bloom filter cannot forget the jtis it
+        deleted; the rebuild reads all unexpired rows. Tests call it to start
+        from a cold filter.
+        """
+        with self._lock:
+            self._synced_at = None
+            self._filter = None
+
+
+token_blocklist = TokenBlocklist()
@@ -0,0 +1,36 @@
+"""Add sales_variant_daily_rollup table
+
+Revision ID: 2f7c9e4a1b65
+Revises: 8d24e6b1f3a0
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f7c9e4a1b65'
+down_revision = '8d24e6b1f3a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_variant_daily_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('variant_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue_cents', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['variant_id'], ['product_variants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'timezone', 'variant_id', name='unique_sales_variant_daily_rollup')
+    )
+    # Backfill with: flask rollups rebuild --days <n>
+
+
+def downgrade():
+    op.drop_table('sales_variant_daily_rollup')
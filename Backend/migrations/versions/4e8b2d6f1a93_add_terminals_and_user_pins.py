@@ -0,0 +1,47 @@
+"""Add terminals table and user PIN columns
+
+Revision ID: 4e8b2d6f1a93
+Revises: 9c4e1a7b3d28
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8b2d6f1a93'
+down_revision = '9c4e1a7b3d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('terminals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=80), nullable=False),
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    with op.batch_alter_table('terminals', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_terminals_key_hash'), ['key_hash'], unique=True)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pin_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('pin_failed_attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('pin_failed_attempts')
+        batch_op.drop_column('pin_hash')
+
+    with op.batch_alter_table('terminals', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_terminals_key_hash'))
+
+    op.drop_table('terminals')
@@ -0,0 +1,49 @@
+"""Store money amounts as integer cents
+
+Revision ID: 5b1f0d9a7c42
+Revises: c3ea86279162
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0d9a7c42'
+down_revision = 'c3ea86279162'
+branch_labels = None
+depends_on = None
+
+
+# (table, old Numeric column, new cents column)
+MONEY_COLUMNS = [
+    ('products', 'min_price', 'min_price_cents'),
+    ('products', 'max_price', 'max_price_cents'),
+    ('sales', 'total_amount', 'total_amount_cents'),
+    ('sale_items', 'price_at_sale', 'price_at_sale_cents'),
+]
+
+
+def upgrade():
+    for table, old, new in MONEY_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(new, sa.BigInteger(), nullable=True))
+
+        op.execute(f'UPDATE {table} SET {new} = ROUND({old} * 100)')
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(new, existing_type=sa.BigInteger(), nullable=False)
+            batch_op.drop_column(old)
+
+
+def downgrade():
+    for table, old, new in MONEY_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(old, sa.Numeric(precision=10, scale=2), nullable=True))
+
+        op.execute(f'UPDATE {table} SET {old} = {new} / 100.0')
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(old, existing_type=sa.Numeric(precision=10, scale=2), nullable=False)
+            batch_op.drop_column(new)
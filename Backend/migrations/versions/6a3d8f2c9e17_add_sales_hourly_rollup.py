@@ -0,0 +1,38 @@
+"""Add sales_hourly_rollup table
+
+Revision ID: 6a3d8f2c9e17
+Revises: 2f7c9e4a1b65
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a3d8f2c9e17'
+down_revision = '2f7c9e4a1b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_hourly_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hour_start', sa.DateTime(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('payment_method', sa.String(length=20), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_cents', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hour_start', 'timezone', 'payment_method', 'user_id', name='unique_sales_hourly_rollup')
+    )
+    # Backfill with: flask rollups rebuild --days <n>
+
+
+def downgrade():
+    op.drop_table('sales_hourly_rollup')
@@ -0,0 +1,37 @@
+"""Add sales_daily_rollup table
+
+Revision ID: 8d24e6b1f3a0
+Revises: 5b1f0d9a7c42
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d24e6b1f3a0'
+down_revision = '5b1f0d9a7c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('payment_method', sa.String(length=20), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_cents', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'timezone', 'payment_method', 'user_id', name='unique_sales_daily_rollup')
+    )
+    # Backfill with: flask rollups rebuild --days <n>
+
+
+def downgrade():
+    op.drop_table('sales_daily_rollup')
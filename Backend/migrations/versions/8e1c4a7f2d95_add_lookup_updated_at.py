@@ -0,0 +1,28 @@
+"""Add updated_at to categories, brands and sizes
+
+Revision ID: 8e1c4a7f2d95
+Revises: 3d9a6e2f8b74
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1c4a7f2d95'
+down_revision = '3d9a6e2f8b74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('categories', 'brands', 'sizes'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in ('sizes', 'brands', 'categories'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,56 @@
+"""Add basket affinity tables
+
+Revision ID: 9c4e1a7b3d28
+Revises: 6a3d8f2c9e17
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e1a7b3d28'
+down_revision = '6a3d8f2c9e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('basket_item_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(length=10), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('basket_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('level', 'item_id', name='unique_basket_item_count')
+    )
+    op.create_table('basket_pair_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(length=10), nullable=False),
+    sa.Column('item_a', sa.Integer(), nullable=False),
+    sa.Column('item_b', sa.Integer(), nullable=False),
+    sa.Column('basket_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('level', 'item_a', 'item_b', name='unique_basket_pair_count')
+    )
+    op.create_index('ix_basket_pair_counts_level_item_b', 'basket_pair_counts', ['level', 'item_b'], unique=False)
+    op.create_table('basket_affinity_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('first_day', sa.Date(), nullable=False),
+    sa.Column('processed_through', sa.Date(), nullable=False),
+    sa.Column('basket_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Backfill with: flask rollups affinity
+
+
+def downgrade():
+    op.drop_table('basket_affinity_state')
+    op.drop_index('ix_basket_pair_counts_level_item_b', table_name='basket_pair_counts')
+    op.drop_table('basket_pair_counts')
+    op.drop_table('basket_item_counts')
@@ -0,0 +1,31 @@
+"""Add sales_rollup_state table
+
+Revision ID: b5d2f8e3c714
+Revises: 8e1c4a7f2d95
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d2f8e3c714'
+down_revision = '8e1c4a7f2d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_rollup_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('timezone')
+    )
+
+
+def downgrade():
+    op.drop_table('sales_rollup_state')
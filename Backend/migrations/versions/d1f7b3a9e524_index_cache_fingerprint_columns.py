@@ -0,0 +1,37 @@
+"""Index the columns behind list ETag fingerprints
+
+Revision ID: d1f7b3a9e524
+Revises: c8a4e1d6b392
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f7b3a9e524'
+down_revision = 'c8a4e1d6b392'
+branch_labels = None
+depends_on = None
+
+FINGERPRINT_COLUMNS = (
+    ('products', 'updated_at'),
+    ('product_variants', 'updated_at'),
+    ('categories', 'updated_at'),
+    ('brands', 'updated_at'),
+    ('sizes', 'updated_at'),
+    ('users', 'created_at'),
+)
+
+
+def upgrade():
+    for table, column in FINGERPRINT_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(batch_op.f(f'ix_{table}_{column}'), [column], unique=False)
+
+
+def downgrade():
+    for table, column in reversed(FINGERPRINT_COLUMNS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_{column}'))
@@ -0,0 +1,137 @@
+"""
+Query budgets for every route
+
+Each entry is the request the budget test sends against the seeded
+database (see conftest.seed_database) and the most statements it may
+issue. Paths are formatted with the Seed's attributes; a callable json
+body is called with the Seed.
+
+scales=True also checks the count does not grow when more products, sales
+and stock movements are added. n_plus_one marks a route that currently
+does grow; that check is expected to fail until the route is fixed (it is
+a strict xfail, so fixing the route forces removing the flag).
+
+When a change legitimately needs more queries, raise the budget in the
+same commit and say why in the message. Routes behind
+http_cache.conditional spend one extra statement on the table fingerprint.
+Reports over closed days spend one on the rollup generation, and
+one more when a bucket comes back empty (RollupService.require_rollups).
+"""
+from tests.conftest import PASSWORD, PIN
+
+
+class Route:
+    def __init__(self, method, path, budget, status=200, json=None, data=None,
+                 auth='admin', headers=None, scales=False, n_plus_one=False):
+        self.method = method
+        self.path = path
+        self.budget = budget
+        self.status = status
+        self.json = json
+        self.data = data
+        self.auth = auth
+        self.headers = headers or {}
+        self.scales = scales
+        self.n_plus_one = n_plus_one
+
+    def send(self, client, seed):
+        headers = {k: seed.format(v) for k, v in self.headers.items()}
+        if self.auth:
+            headers.update(getattr(seed, self.auth))
+
+        return client.open(
+            seed.format(self.path),
+            method=self.method,
+            headers=headers,
+            json=self.json(seed) if callable(self.json) else self.json,
+            data=self.data
+        )
+
+
+IMPORT_CSV = (
+    'sku,name,min_price,max_price,category_id,brand_id,size_id,quantity,sku_suffix\n'
+    'IMP1,Imported 1,10,20,,,1,5,\n'
+    'IMP1,Imported 1,10,20,,,2,5,-M\n'
+    'IMP2,Imported 2,10,20,,,1,5,\n'
+)
+
+BUDGETS = {
+    # Auth
+    'auth.login': Route('POST', '/api/auth/login', 1, auth=None,
+                        json={'username': 'admin', 'password': PASSWORD}),
+    'auth.logout': Route('POST', '/api/auth/logout', 1),
+    'auth.get_current_user': Route('GET', '/api/auth/me', 1),
+    'auth.set_pin': Route('POST', '/api/auth/pin', 2, json={'pin': '9876'}),
+    'auth.register': Route('POST', '/api/auth/register', 4, status=201,
+                           json={'username': 'new', 'email': 'new@example.com', 'password': PASSWORD}),
+    'auth.switch_user': Route('POST', '/api/auth/switch', 2, auth=None,
+                              headers={'X-Terminal-Key': '{terminal_key}'},
+                              json={'username': 'cashier', 'pin': PIN}),
+    'auth.register_terminal': Route('POST', '/api/auth/terminals', 3, status=201, json={'name': 'Till 2'}),
+    'auth.get_terminals': Route('GET', '/api/auth/terminals', 1),
+    'auth.deactivate_terminal': Route('DELETE', '/api/auth/terminals/{terminal_id}', 2),
+    'auth.get_users': Route('GET', '/api/auth/users', 1),
+    'auth.update_user': Route('PUT', '/api/auth/users/{spare_user_id}', 3, json={'role': 'admin'}),
+    'auth.delete_user': Route('DELETE', '/api/auth/users/{spare_user_id}', 4),
+    'auth.clear_pin': Route('DELETE', '/api/auth/users/{cashier_id}/pin', 2),
+
+    # Catalog lookups
+    'brands.get_brands': Route('GET', '/api/brands', 1),
+    'brands.create_brand': Route('POST', '/api/brands', 3, status=201, json={'name': 'Nova'}),
+    'brands.update_brand': Route('PUT', '/api/brands/{spare_brand_id}', 4, json={'name': 'Renamed'}),
+    'brands.delete_brand': Route('DELETE', '/api/brands/{spare_brand_id}', 2),
+    'categories.get_categories': Route('GET', '/api/categories', 1),
+    'categories.create_category': Route('POST', '/api/categories', 3, status=201, json={'name': 'Shoes'}),
+    'categories.update_category': Route('PUT', '/api/categories/{spare_category_id}', 4, json={'name': 'Renamed'}),
+    'categories.delete_category': Route('DELETE', '/api/categories/{spare_category_id}', 2),
+    'sizes.get_sizes': Route('GET', '/api/sizes', 1),
+    'sizes.create_size': Route('POST', '/api/sizes', 3, status=201, json={'name': 'XXL'}),
+    'sizes.update_size': Route('PUT', '/api/sizes/{spare_size_id}', 4, json={'name': 'XS'}),
+    'sizes.delete_size': Route('DELETE', '/api/sizes/{spare_size_id}', 2),
+
+    # Products
+    'products.get_products': Route('GET', '/api/products', 3, scales=True),
+    'products.search_products': Route('GET', '/api/products/search?q=Product', 3, scales=True),
+    'products.get_product': Route('GET', '/api/products/{product_id}', 6),
+    'products.create_product': Route('POST', '/api/products', 12, status=201, json=lambda seed: {
+        'sku': 'NEW1', 'name': 'New', 'min_price': 10, 'max_price': 20,
+        'category_id': seed.categories[0], 'brand_id': seed.brands[0],
+        'variants': [{'size_id': seed.sizes[0], 'quantity': 5}, {'size_id': seed.sizes[1], 'quantity': 5}]
+    }),
+    'products.update_product': Route('PUT', '/api/products/{product_id}', 8,
+                                     json={'name': 'Renamed', 'max_price': 25}),
+    'products.delete_product': Route('DELETE', '/api/products/{product_id}', 2),
+    'products.import_products': Route('POST', '/api/products/import?format=csv', 7, data=IMPORT_CSV),
+    'exports.export_dataset': Route('GET', '/api/exports/variants', 1, scales=True),
+
+    # Inventory
+    'inventory.get_inventory': Route('GET', '/api/inventory', 2, scales=True),
+    'inventory.get_stock_movements': Route('GET', '/api/inventory/movements', 2, scales=True),
+    'inventory.adjust_inventory': Route('POST', '/api/inventory/adjust', 8, json=lambda seed: {
+        'variant_id': seed.variant_id, 'change': 3, 'reason': 'restock'
+    }),
+
+    # Sales
+    'sales.create_sale': Route('POST', '/api/sales', 14, status=201, auth='cashier', json=lambda seed: {
+        'items': [{'variant_id': seed.variant_id, 'quantity': 1, 'price': 15}],
+        'payment_method': 'cash'
+    }),
+    'sales.get_sales': Route('GET', '/api/sales', 2, scales=True),
+    'sales.get_sale': Route('GET', '/api/sales/{sale_id}', 8),
+
+    # Reports
+    'reports.daily_sales_report': Route('GET', '/api/reports/daily', 4, scales=True),
+    'reports.product_performance_report': Route('GET', '/api/reports/products', 4, scales=True),
+    'reports.payment_method_report': Route('GET', '/api/reports/payments', 4, scales=True),
+    'reports.cashier_sales_report': Route('GET', '/api/reports/cashiers', 4, scales=True),
+    'reports.sales_heatmap_report': Route('GET', '/api/reports/heatmap', 4, scales=True),
+    'reports.basket_affinity_report': Route('GET', '/api/reports/affinity?product_id={product_id}&min_count=1', 2,
+                                            scales=True),
+    'reports.analytics_query': Route('POST', '/api/reports/query', 2, scales=True, json={
+        'group_by': ['category'], 'metrics': ['revenue', 'units', 'basket_value']
+    }),
+
+    # System
+    'system.get_pool_stats': Route('GET', '/api/system/pool', 0),
+    'prometheus_metrics': Route('GET', '/metrics', 0, auth=None),
+}
@@ -0,0 +1,256 @@
+"""
+Test fixtures: an app on a throwaway database, seeded data and query counting
+
+Runs against in-memory SQLite by default; set TEST_DATABASE_URL to run
+against PostgreSQL (tables are created and dropped for every test).
+"""
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+os.environ.setdefault('APP_CONFIG', 'development')
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.extensions import db as _db
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.brand_service import BrandService
+from app.services.category_service import CategoryService
+from app.services.inventory_service import InventoryService
+from app.services.product_service import ProductService
+from app.services.sales_service import SalesService
+from app.services.size_service import SizeService
+from app.services.terminal_service import TerminalService
+from app.utils.db_routing import replica_health
+from app.utils.identity_cache import identity_cache
+from app.utils.pricing_cache import pricing_table
+from app.utils.report_cache import report_cache
+from app.utils.token_blocklist import token_blocklist
+
+PASSWORD = 'password123'
+PIN = '4321'
+
+
+class TestConfig(DevelopmentConfig):
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+    SQLALCHEMY_BINDS = {}
+    SQLALCHEMY_ECHO = False
+    LOG_LEVEL = 'WARNING'
+    BCRYPT_LOG_ROUNDS = 4
+    # Keep per-process caches warm for the whole test, so counts only cover the route
+    IDENTITY_CACHE_TTL = 3600
+    TOKEN_BLOCKLIST_SYNC_INTERVAL = 3600
+    PRICING_CACHE_TTL = 3600
+    # No stored closed-day report sums unless a test turns them on
+    REPORT_MATERIALIZE_TRAILING_DAYS = []
+
+
+def _reset_process_caches():
+    identity_cache.invalidate()
+    token_blocklist.invalidate()
+    pricing_table.invalidate()
+    report_cache.clear()
+    replica_health.reset()
+
+
+@pytest.fixture
+def app(tmp_path):
+    class Config(TestConfig):
+        REPORT_STORE_DIR = str(tmp_path / 'reports')
+        PASSWORD_HASH_LOCK_DIR = str(tmp_path / 'password-slots')
+
+    app = create_app(Config)
+
+    with app.app_context():
+        _db.create_all()
+        _reset_process_caches()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+    _reset_process_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class Seed:
+    """Ids, tokens and keys of the seeded rows"""
+
+    def __init__(self, client):
+        self.client = client
+        self.products = []
+        self.variants = []
+        self.sales = []
+
+    def login(self, username):
+        response = self.client.post('/api/auth/login', json={'username': username, 'password': PASSWORD})
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    def format(self, template):
+        return template.format(**vars(self))
+
+    def add_products(self, count):
+        """Add `count` products with two variants each, and one sale and one stock adjustment per product"""
+        start = len(self.products)
+        for i in range(start, start + count):
+            product = ProductService.create_product(
+                sku=f'SKU{i:04d}',
+                name=f'Product {i}',
+                min_price=10,
+                max_price=20,
+                category_id=self.categories[i % 2],
+                brand_id=self.brands[i % 2],
+                variants_data=[
+                    {'size_id': self.sizes[0], 'quantity': 100},
+                    {'size_id': self.sizes[1], 'quantity': 100, 'sku_suffix': '-M'}
+                ]
+            )
+            variants = [v.id for v in product.variants]
+            self.products.append(product.id)
+            self.variants.extend(variants)
+
+            sale = SalesService.create_sale(
+                self.cashier_id,
+                [{'variant_id': variants[0], 'quantity': 1, 'price': 15},
+                 {'variant_id': variants[1], 'quantity': 2, 'price': 12}],
+                ['cash', 'card', 'mobile'][i % 3]
+            )
+            self.sales.append(sale.id)
+
+            InventoryService.adjust_variant_inventory(variants[0], 5, 'restock', self.admin_id)
+
+        self.product_id = self.products[0]
+        self.variant_id = self.variants[0]
+        self.sale_id = self.sales[0]
+        _db.session.remove()
+
+
+def seed_database(client, products=3):
+    """
+    Users, a terminal, catalog lookups, products, sales and stock movements
+
+    Every seeded id is an attribute of the returned Seed, so request
+    templates can use e.g. '/api/products/{product_id}'.
+    """
+    seed = Seed(client)
+
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.password = PASSWORD
+    _db.session.add(admin)
+    _db.session.commit()
+    seed.admin_id = admin.id
+
+    seed.cashier_id = AuthService.create_user('cashier', 'cashier@example.com', PASSWORD, role='cashier', created_by_admin=True).id
+    seed.spare_user_id = AuthService.create_user('spare', 'spare@example.com', PASSWORD, role='cashier', created_by_admin=True).id
+    AuthService.set_pin(seed.cashier_id, PIN)
+
+    terminal, seed.terminal_key = TerminalService.register_terminal('Till 1', created_by=seed.admin_id)
+    seed.terminal_id = terminal.id
+
+    seed.categories = [CategoryService.create_category(name).id for name in ('Tops', 'Bottoms')]
+    seed.brands = [BrandService.create_brand(name).id for name in ('Acme', 'Zenith')]
+    seed.sizes = [SizeService.create_size(name).id for name in ('S', 'M', 'L')]
+    seed.spare_category_id = CategoryService.create_category('Spare').id
+    seed.spare_brand_id = BrandService.create_brand('Spare').id
+    seed.spare_size_id = SizeService.create_size('XL').id
+
+    seed.add_products(products)
+
+    seed.admin = seed.login('admin')
+    seed.cashier = seed.login('cashier')
+
+    # Warm the per-process identity, revocation and pricing caches
+    client.get('/api/auth/me', headers=seed.admin)
+    return seed
+
+
+@pytest.fixture
+def seed(client):
+    return seed_database(client)
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __str__(self):
+        return '\n'.join(f'{i + 1}. {s}' for i, s in enumerate(self.statements))
+
+
+def fresh_request_state():
+    """
+    Start the next request like a new one in production
+
+    Test requests share the fixture's app context, so without this they
+    would reuse one session (and its identity map) and the report cache.
+    """
+    _db.session.remove()
+    report_cache.clear()
+
+
+@contextmanager
+def count_queries():
+    """Record every statement sent to any engine of the current app"""
+    log = QueryLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(' '.join(statement.split()))
+
+    engines = list(_db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', record)
+    try:
+        yield log
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', record)
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    assert_max_queries(budget, call) runs call() and fails if it issued more than budget statements
+
+    Returns whatever call() returned.
+    """
+    def check(budget, call):
+        fresh_request_state()
+        with count_queries() as log:
+            result = call()
+            # Drain streamed bodies inside the count
+            if hasattr(result, 'get_data'):
+                result.get_data()
+        assert log.count <= budget, (
+            f'{log.count} queries, budget is {budget}:\n{log}'
+        )
+        return result
+    return check
+
+
+@pytest.fixture
+def assert_constant_queries():
+    """
+    assert_constant_queries(call, grow) checks the query count of call()
+    does not change after grow() adds more rows (catches per-row lazy loads)
+    """
+    def check(call, grow):
+        fresh_request_state()
+        with count_queries() as before:
+            call().get_data()
+        grow()
+        fresh_request_state()
+        with count_queries() as after:
+            call().get_data()
+        assert after.count == before.count, (
+            f'Query count grew with result size: {before.count} -> {after.count}\n{after}'
+        )
+    return check
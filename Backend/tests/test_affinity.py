@@ -0,0 +1,99 @@
+"""
+Basket affinity: day-by-day merging, resumption and the association measures
+"""
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db
+from app.models.basket_affinity import BasketAffinityState, BasketPairCount
+from app.models.sale import Sale
+from app.services.affinity_service import AffinityService
+from app.services.sales_service import SalesService
+from app.utils.reporting import today
+
+
+def _basket(seed, products, days_ago):
+    sale = SalesService.create_sale(seed.cashier_id, [
+        {'variant_id': seed.variants[2 * product], 'quantity': 1, 'price': 15} for product in products
+    ], 'cash')
+    db.session.query(Sale).filter_by(id=sale.id).update(
+        {'created_at': datetime.utcnow() - timedelta(days=days_ago)}
+    )
+    db.session.commit()
+
+
+@pytest.fixture
+def baskets(seed):
+    # Products 0 and 1 are bought together twice; today's seeded sales are still open
+    _basket(seed, [0, 1], 3)
+    _basket(seed, [0, 2], 3)
+    _basket(seed, [0, 1], 2)
+    _basket(seed, [1, 2], 1)
+    return seed
+
+
+def _counts():
+    return sorted(
+        (pair.level, pair.item_a, pair.item_b, pair.basket_count)
+        for pair in BasketPairCount.query
+    )
+
+
+def test_resuming_merges_each_day_once(baskets):
+    first_day = today() - timedelta(days=3)
+
+    assert AffinityService.process(start_day=first_day, through_day=first_day) == 1
+    assert AffinityService.process() == 2
+    assert AffinityService.process() == 0
+
+    resumed = _counts()
+    AffinityService.rebuild()
+
+    assert _counts() == resumed
+    assert BasketAffinityState.query.one().basket_count == 4
+
+
+def test_failed_day_is_retried_from_the_last_commit(baskets, monkeypatch):
+    merge_day = AffinityService._merge_day
+
+    def fail_on_yesterday(day, key):
+        if day == today() - timedelta(days=1):
+            raise RuntimeError('connection lost')
+        merge_day(day, key)
+
+    monkeypatch.setattr(AffinityService, '_merge_day', staticmethod(fail_on_yesterday))
+    with pytest.raises(Exception, match='connection lost'):
+        AffinityService.process(start_day=today() - timedelta(days=3))
+
+    assert BasketAffinityState.query.one().processed_through == today() - timedelta(days=2)
+
+    monkeypatch.setattr(AffinityService, '_merge_day', staticmethod(merge_day))
+    assert AffinityService.process() == 1
+
+    resumed = _counts()
+    AffinityService.rebuild()
+
+    assert _counts() == resumed
+
+
+def test_reporting_key_change_requires_a_rebuild(app, baskets):
+    AffinityService.process()
+    app.config['STORE_TIMEZONE'] = 'Asia/Kolkata'
+
+    with pytest.raises(ValueError, match='rebuild'):
+        AffinityService.process()
+
+
+def test_associations_report_support_confidence_and_lift(client, baskets):
+    AffinityService.process()
+    product, other = baskets.products[0], baskets.products[1]
+
+    report = client.get(
+        f'/api/reports/affinity?product_id={product}&min_count=1', headers=baskets.admin
+    ).get_json()
+
+    assert (report['baskets'], report['item_baskets']) == (4, 3)
+    top = report['associations'][0]
+    assert (top['item_id'], top['count']) == (other, 2)
+    assert top['support'] == 0.5
+    assert top['confidence'] == round(2 / 3, 4)
+    assert top['lift'] == round((2 / 3) / (3 / 4), 4)
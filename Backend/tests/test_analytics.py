@@ -0,0 +1,83 @@
+"""
+Ad-hoc analytics: the query grammar and pivots against the raw sales
+"""
+import pytest
+from app.models.sale import Sale
+
+
+def _query(client, seed, spec):
+    return client.post('/api/reports/query', json=spec, headers=seed.admin)
+
+
+@pytest.mark.parametrize('spec, error', [
+    ({'days': 7, 'select': '*'}, 'Unknown query fields'),
+    ({'days': '7'}, 'days must be an integer'),
+    ({'start': '2024-02-01', 'end': '2024-01-01'}, 'start must not be after end'),
+    ({'days': 10000}, 'Range cannot exceed'),
+    ({'group_by': ['category', 'brand', 'size', 'hour']}, 'at most 3'),
+    ({'group_by': ['colour']}, 'Invalid dimension colour'),
+    ({'group_by': ['brand', 'brand']}, 'must be unique'),
+    ({'metrics': ['profit']}, 'Invalid metric profit'),
+    ({'filters': {'day': [1]}}, 'Cannot filter on day'),
+    ({'filters': {'payment_method': ['cheque']}}, 'Invalid payment method'),
+    ({'filters': {'brand': ['Acme']}}, 'values must be integers'),
+    ({'filters': {'brand': []}}, 'must be a list of 1 to'),
+    ({'metrics': ['units'], 'order_by': 'revenue'}, 'order_by must be one of the requested metrics'),
+    ({'order': 'up'}, "order must be 'asc' or 'desc'"),
+    ({'limit': 0}, 'limit must be between 1 and'),
+    ([], 'Query must be a JSON object'),
+])
+def test_queries_outside_the_grammar_are_rejected(client, seed, spec, error):
+    response = _query(client, seed, spec)
+
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
+
+
+def test_payment_method_pivot_matches_the_sales(client, seed):
+    sales = Sale.query.all()
+
+    result = _query(client, seed, {
+        'days': 1, 'group_by': ['payment_method'], 'metrics': ['revenue', 'transactions']
+    }).get_json()
+
+    assert {row['payment_method']: (row['revenue'], row['transactions']) for row in result['rows']} == {
+        method: (
+            sum(sale.total_amount_cents for sale in sales if sale.payment_method == method) / 100,
+            sum(1 for sale in sales if sale.payment_method == method)
+        )
+        for method in {sale.payment_method for sale in sales}
+    }
+    assert result['summary']['transactions'] == len(sales)
+
+
+def test_filters_narrow_the_lines(client, seed):
+    sales = Sale.query.filter_by(payment_method='cash').all()
+
+    result = _query(client, seed, {'days': 1, 'filters': {'payment_method': ['cash']}}).get_json()
+
+    assert result['summary']['transactions'] == len(sales)
+    assert result['summary']['units'] == sum(item.quantity for sale in sales for item in sale.items)
+
+
+def test_too_many_lines_is_a_client_error(app, client, seed):
+    app.config['ANALYTICS_MAX_ROWS'] = 1
+
+    response = _query(client, seed, {'days': 1})
+
+    assert response.status_code == 400
+    assert 'narrow the range' in response.get_json()['error']
+
+
+def test_results_do_not_depend_on_the_batch_size(app, client, seed):
+    spec = {
+        'days': 1, 'group_by': ['product', 'hour'],
+        'metrics': ['revenue', 'units', 'transactions', 'avg_price', 'price_position', 'basket_value', 'basket_size']
+    }
+    whole = _query(client, seed, spec).get_json()
+
+    # One line per fetch: every sale's lines arrive over several fetches
+    app.config['ANALYTICS_BATCH_SIZE'] = 1
+
+    assert _query(client, seed, spec).get_json() == whole
+    assert whole['summary']['basket']['size_distribution'] == {'3': len(seed.sales)}
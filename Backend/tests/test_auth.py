@@ -0,0 +1,161 @@
+"""
+Password handling, PIN quick-switch and token revocation
+"""
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.passwords import SlotFiles
+from app.utils.token_blocklist import token_blocklist
+from tests.conftest import PASSWORD, PIN
+
+LONG_PASSWORD = 'x' * 73
+
+
+def test_login_with_an_over_long_password_is_a_bad_request(client, seed):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': LONG_PASSWORD})
+
+    assert response.status_code == 400
+    assert '72 bytes' in response.get_json()['error']
+
+
+def test_register_with_an_over_long_password_is_a_bad_request(client, seed):
+    response = client.post('/api/auth/register', headers=seed.admin, json={
+        'username': 'long', 'email': 'long@example.com', 'password': LONG_PASSWORD
+    })
+
+    assert response.status_code == 400
+
+
+def test_password_change_with_an_over_long_password_is_a_bad_request(client, seed):
+    response = client.put(f'/api/auth/users/{seed.spare_user_id}', headers=seed.admin,
+                          json={'password': LONG_PASSWORD})
+
+    assert response.status_code == 400
+
+
+def test_login_rehashes_when_the_cost_changes(app, client, seed):
+    app.config['BCRYPT_LOG_ROUNDS'] = 5
+
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': PASSWORD})
+
+    assert response.status_code == 200
+    assert User.query.filter_by(username='admin').one().password_hash.split('$')[2] == '05'
+
+
+def _hold_hash_slots(app):
+    # Another worker process (or thread) busy hashing
+    slots = SlotFiles(app.config['PASSWORD_HASH_LOCK_DIR'], 'hash', app.config['PASSWORD_HASH_CONCURRENCY'])
+    return [slots.try_acquire() for _ in slots.paths]
+
+
+def _login(client):
+    return client.post('/api/auth/login', json={'username': 'admin', 'password': PASSWORD})
+
+
+def test_login_is_refused_when_every_hash_slot_and_the_queue_are_taken(app, client, seed):
+    app.config.update(PASSWORD_HASH_CONCURRENCY=2, PASSWORD_HASH_MAX_QUEUE=0)
+    held = _hold_hash_slots(app)
+
+    response = _login(client)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    for fd in held:
+        SlotFiles.release(fd)
+    assert _login(client).status_code == 200
+
+
+def test_queued_login_gives_up_after_the_timeout(app, client, seed):
+    app.config.update(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_MAX_QUEUE=1, PASSWORD_HASH_QUEUE_TIMEOUT=0.05)
+    held = _hold_hash_slots(app)
+
+    assert _login(client).status_code == 503
+
+    SlotFiles.release(held[0])
+    assert _login(client).status_code == 200
+
+
+def test_me_returns_the_full_user_by_default(client, seed):
+    user = client.get('/api/auth/me', headers=seed.admin).get_json()['user']
+
+    assert set(user) >= {'id', 'username', 'email', 'role', 'is_active', 'created_at', 'has_pin'}
+
+
+def test_me_from_claims_skips_the_database(client, seed, assert_max_queries):
+    response = assert_max_queries(0, lambda: client.get('/api/auth/me?claims=true', headers=seed.admin))
+
+    assert response.get_json()['user'] == {'id': seed.admin_id, 'username': 'admin', 'role': 'admin'}
+
+
+def _switch(client, seed, pin=PIN, username='cashier'):
+    return client.post('/api/auth/switch', headers={'X-Terminal-Key': seed.terminal_key},
+                       json={'username': username, 'pin': pin})
+
+
+def test_pin_switch_issues_a_cashier_token_bound_to_the_terminal(client, seed):
+    response = _switch(client, seed)
+    token = response.get_json()['access_token']
+
+    assert response.status_code == 200
+    assert client.get('/api/inventory', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+
+def test_deactivating_the_terminal_voids_its_pin_tokens(client, seed):
+    headers = {'Authorization': f"Bearer {_switch(client, seed).get_json()['access_token']}"}
+
+    client.delete(f'/api/auth/terminals/{seed.terminal_id}', headers=seed.admin)
+
+    assert client.get('/api/inventory', headers=headers).status_code == 401
+    assert _switch(client, seed).status_code == 401
+
+
+def test_admin_switched_in_by_pin_gets_cashier_rights(client, seed):
+    AuthService.set_pin(seed.admin_id, PIN)
+    headers = {'Authorization': f"Bearer {_switch(client, seed, username='admin').get_json()['access_token']}"}
+
+    assert client.get('/api/auth/users', headers=headers).status_code == 403
+
+
+def test_pin_locks_after_too_many_wrong_attempts(app, client, seed):
+    app.config['PIN_MAX_ATTEMPTS'] = 3
+    for _ in range(3):
+        assert _switch(client, seed, pin='0000').status_code == 401
+
+    response = _switch(client, seed)
+
+    assert response.status_code == 401
+    assert 'locked' in response.get_json()['error']
+
+    # A password login unlocks it
+    client.post('/api/auth/login', json={'username': 'cashier', 'password': PASSWORD})
+    assert _switch(client, seed).status_code == 200
+
+
+def test_logout_revokes_the_token(client, seed):
+    headers = seed.login('cashier')
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/inventory', headers=headers).status_code == 401
+    assert client.get('/api/inventory', headers=seed.cashier).status_code == 200
+
+
+def test_revocation_committed_late_by_another_process_is_seen(app, seed):
+    app.config['TOKEN_BLOCKLIST_SYNC_INTERVAL'] = 0
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    db.session.add(RevokedToken(id=100, jti='early-jti', token_type='access', expires_at=expires_at))
+    db.session.commit()
+    assert not token_blocklist.is_revoked('late-jti')
+
+    # Another process flushed this row (lower id, earlier revoked_at) before
+    # our last sync but committed after it
+    db.session.add(RevokedToken(
+        id=50, jti='late-jti', token_type='access', user_id=seed.cashier_id,
+        expires_at=expires_at,
+        revoked_at=datetime.utcnow() - timedelta(seconds=5)
+    ))
+    db.session.commit()
+
+    assert token_blocklist.is_revoked('late-jti')
@@ -0,0 +1,27 @@
+"""
+Config profile selection
+"""
+import pytest
+from app.config import DevelopmentConfig, ProductionConfig, config_for
+
+
+@pytest.fixture
+def no_profile_env(monkeypatch):
+    monkeypatch.delenv('APP_CONFIG', raising=False)
+    monkeypatch.delenv('FLASK_ENV', raising=False)
+
+
+def test_unset_environment_selects_production(no_profile_env):
+    assert config_for() is ProductionConfig
+
+
+def test_app_config_wins_over_flask_env(no_profile_env, monkeypatch):
+    monkeypatch.setenv('FLASK_ENV', 'production')
+    monkeypatch.setenv('APP_CONFIG', 'Development')
+
+    assert config_for() is DevelopmentConfig
+
+
+def test_unknown_profile_is_rejected(no_profile_env):
+    with pytest.raises(ValueError, match='testing'):
+        config_for('testing')
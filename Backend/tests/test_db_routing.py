@@ -0,0 +1,131 @@
+"""
+Read replica routing: reads go to a healthy replica, everything else to the primary
+"""
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import insert, select, text, update
+from app import create_app
+from app.extensions import db
+from app.models.size import Size
+from app.utils.db_routing import ReplicaHealth, read_replica, replica_health, REPLICA_BIND
+from tests.conftest import TestConfig
+
+
+class FakePostgres:
+    """Engine stand-in answering the lag query with `lag` seconds (or failing)"""
+
+    dialect = SimpleNamespace(name='postgresql')
+
+    def __init__(self, lag=0.0, error=None):
+        self.lag = lag
+        self.error = error
+        self.checks = 0
+
+    def connect(self):
+        self.checks += 1
+        if self.error:
+            raise self.error
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        return SimpleNamespace(scalar=lambda: self.lag)
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    class Config(TestConfig):
+        SQLALCHEMY_BINDS = {REPLICA_BIND: f'sqlite:///{tmp_path / "replica.db"}'}
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        replica_health.reset()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    replica_health.reset()
+    # init_app registered an (empty) metadata for the bind on the shared extension
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+@read_replica
+def _read_bind(clause=None):
+    return db.session.get_bind(clause=clause if clause is not None else select(Size.id))
+
+
+def test_reads_go_to_a_healthy_replica(replica_app):
+    engines = db.engines
+
+    assert _read_bind() is engines[REPLICA_BIND]
+    assert db.session.get_bind() is engines[None]
+
+
+def test_a_session_that_wrote_reads_from_the_primary(replica_app):
+    db.session.add(Size(name='XXL'))
+    db.session.flush()
+
+    assert _read_bind() is db.engines[None]
+
+
+def test_core_writes_under_read_replica_go_to_the_primary(replica_app):
+    primary = db.engines[None]
+
+    assert _read_bind(update(Size).values(name='XL')) is primary
+    assert _read_bind(text('SELECT 1')) is primary
+
+    # ...and the session then reads its own write
+    assert _read_bind(insert(Size).values(name='XXL')) is primary
+    assert _read_bind() is primary
+
+
+@read_replica
+def _rename_sizes():
+    db.session.execute(update(Size).values(name='Renamed'))
+    return db.session.execute(select(Size.name)).scalars().all()
+
+
+def test_core_write_inside_read_replica_lands_on_the_primary(replica_app):
+    db.session.add(Size(name='M'))
+    db.session.commit()
+    db.session.info.pop('wrote', None)
+
+    assert _rename_sizes() == ['Renamed']
+    db.session.commit()
+    assert db.session.execute(select(Size.name)).scalars().all() == ['Renamed']
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(replica_app, monkeypatch):
+    monkeypatch.setattr(ReplicaHealth, '_check', staticmethod(lambda engine: False))
+
+    assert _read_bind() is db.engines[None]
+
+
+@pytest.mark.parametrize('engine, healthy', [
+    (FakePostgres(lag=0.5), True),
+    (FakePostgres(lag=30), False),
+    (FakePostgres(error=OSError('connection refused')), False),
+])
+def test_lag_guard(app, engine, healthy):
+    app.config['REPLICA_MAX_LAG_SECONDS'] = 5
+
+    assert ReplicaHealth().healthy(engine) is healthy
+
+
+def test_lag_is_checked_once_per_interval(app):
+    app.config['REPLICA_LAG_CHECK_INTERVAL'] = 3600
+    health = ReplicaHealth()
+    engine = FakePostgres(lag=30)
+
+    assert not health.healthy(engine)
+    engine.lag = 0
+    assert not health.healthy(engine)
+    assert engine.checks == 1
+
+    health.reset()
+    assert health.healthy(engine)
@@ -0,0 +1,60 @@
+"""
+Streaming exports: one chunk per fetched batch, in every format
+"""
+import csv
+import io
+import json
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.services.export_service import ExportService
+
+
+def _export(client, seed, path):
+    return client.get(f'/api/exports/{path}', headers=seed.admin)
+
+
+def test_each_batch_is_one_chunk(seed):
+    variants = ProductVariant.query.count()
+
+    chunks = list(ExportService.stream('variants', 'ndjson', batch_size=2))
+
+    assert len(chunks) == -(-variants // 2)
+    assert all(chunk.count('\n') <= 2 for chunk in chunks)
+    assert sum(chunk.count('\n') for chunk in chunks) == variants
+
+
+def test_columnar_row_groups_cover_every_row(app, client, seed):
+    app.config['EXPORT_BATCH_SIZE'] = 3
+
+    body = _export(client, seed, 'variants?format=columnar').get_data(as_text=True)
+    groups = [json.loads(line) for line in body.splitlines()]
+
+    assert all(group['rows'] <= 3 for group in groups)
+    assert [variant_id for group in groups for variant_id in group['data']['variant_id']] == [
+        variant.id for variant in ProductVariant.query.order_by(ProductVariant.id)
+    ]
+
+
+def test_csv_has_one_header_and_a_row_per_product(app, client, seed):
+    app.config['EXPORT_BATCH_SIZE'] = 2
+
+    response = _export(client, seed, 'products')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert response.headers['Content-Disposition'] == 'attachment; filename=products.csv'
+    assert [int(row['id']) for row in rows] == [product.id for product in Product.query.order_by(Product.id)]
+    assert rows[0]['min_price'] == str(float(Product.query.order_by(Product.id).first().min_price))
+
+
+def test_stock_skips_inactive_products(client, seed):
+    client.delete(f'/api/products/{seed.product_id}', headers=seed.admin)
+
+    lines = _export(client, seed, 'stock?format=ndjson').get_data(as_text=True).splitlines()
+
+    assert lines
+    assert all(json.loads(line)['product_id'] != seed.product_id for line in lines)
+
+
+def test_unknown_dataset_or_format_is_rejected(client, seed):
+    assert _export(client, seed, 'sales').status_code == 400
+    assert _export(client, seed, 'products?format=parquet').status_code == 400
@@ -0,0 +1,105 @@
+"""
+Conditional GETs answer unchanged polls with 304, and large bodies are
+compressed for clients that accept it.
+"""
+import gzip
+from sqlalchemy import func, inspect, update
+from app.extensions import db
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.sale import Sale
+from app.models.size import Size
+from app.models.stock_movement import StockMovement
+from app.models.user import User
+from tests.conftest import fresh_request_state
+
+
+def _get(client, seed, path, **headers):
+    fresh_request_state()
+    return client.get(path, headers={**seed.admin, **headers})
+
+
+def test_unchanged_list_poll_returns_304(app, client, seed, assert_max_queries):
+    app.config['HTTP_CACHE_SETTLE_SECONDS'] = 0
+    first = _get(client, seed, '/api/inventory')
+    etag = first.headers['ETag']
+
+    assert first.status_code == 200
+    assert etag.startswith('W/')
+
+    second = assert_max_queries(1, lambda: _get(client, seed, '/api/inventory', **{'If-None-Match': etag}))
+
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_list_etag_changes_with_the_data(app, client, seed):
+    app.config['HTTP_CACHE_SETTLE_SECONDS'] = 0
+    etag = _get(client, seed, '/api/products').headers['ETag']
+
+    client.put(f'/api/brands/{seed.brands[0]}', json={'name': 'Renamed'}, headers=seed.admin)
+    response = _get(client, seed, '/api/products', **{'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_list_etag_covers_the_query_string(app, client, seed):
+    app.config['HTTP_CACHE_SETTLE_SECONDS'] = 0
+    etag = _get(client, seed, '/api/sales').headers['ETag']
+
+    response = _get(client, seed, '/api/sales?payment_method=cash', **{'If-None-Match': etag})
+
+    assert response.status_code == 200
+
+
+def test_late_commit_with_an_earlier_timestamp_is_not_hidden(client, seed):
+    # The seeded tables changed moments ago, so they are still settling
+    etag = _get(client, seed, '/api/inventory').headers['ETag']
+
+    # A transaction that flushed before the newest change commits only now
+    older = db.session.query(func.min(ProductVariant.updated_at)).scalar()
+    db.session.execute(
+        update(ProductVariant).where(ProductVariant.id == seed.variant_id).values(quantity=1, updated_at=older)
+    )
+    db.session.commit()
+
+    response = _get(client, seed, '/api/inventory', **{'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_other_gets_get_a_body_etag(client, seed):
+    first = _get(client, seed, f'/api/products/{seed.product_id}')
+    second = _get(client, seed, f'/api/products/{seed.product_id}', **{'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
+
+
+def test_large_bodies_are_gzipped(client, seed):
+    plain = _get(client, seed, '/api/products')
+    response = _get(client, seed, '/api/products', **{'Accept-Encoding': 'gzip'})
+
+    assert len(plain.get_data()) >= 1024
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+
+def test_small_bodies_are_not_compressed(client, seed):
+    response = _get(client, seed, '/api/brands', **{'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_fingerprint_columns_are_indexed(app):
+    """Each 304 check reads max() of these; without an index that is a table scan"""
+    inspector = inspect(db.engine)
+    for model in (Product, ProductVariant, Category, Brand, Size, StockMovement, Sale, User):
+        column = 'updated_at' if hasattr(model, 'updated_at') else 'created_at'
+        indexed = {tuple(index['column_names']) for index in inspector.get_indexes(model.__tablename__)}
+        assert (column,) in indexed, model.__tablename__
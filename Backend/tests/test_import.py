@@ -0,0 +1,94 @@
+"""
+Bulk product import: upserts, opening stock and per-row errors
+"""
+import json
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.stock_movement import StockMovement
+
+HEADER = 'sku,name,min_price,max_price,category_id,brand_id,size_id,quantity,sku_suffix\n'
+
+
+def _import(client, seed, body, fmt='csv'):
+    return client.post(
+        f'/api/products/import?format={fmt}', data=body.encode('utf-8'), headers=seed.admin
+    ).get_json()
+
+
+def _variants(sku):
+    product = Product.query.filter_by(sku=sku).one()
+    return {variant.size_id: variant.quantity for variant in product.variants}
+
+
+def _restocks(sku):
+    return StockMovement.query.join(ProductVariant).join(Product).filter(
+        Product.sku == sku, StockMovement.reason == 'restock'
+    ).count()
+
+
+def test_csv_rows_become_products_with_opening_stock(client, seed):
+    small, medium = seed.sizes[:2]
+
+    result = _import(client, seed, HEADER + (
+        f'IMP-1,Imported,10,20,{seed.categories[0]},,{small},4,-S\n'
+        f'IMP-1,Imported,10,20,{seed.categories[0]},,{medium},0,-M\n'
+    ))
+
+    assert result == {'processed': 1, 'products_upserted': 1, 'variants_upserted': 2, 'errors': []}
+    assert _variants('IMP-1') == {small: 4, medium: 0}
+    assert _restocks('IMP-1') == 1
+
+
+def test_reimport_updates_the_product_but_keeps_stock(client, seed):
+    small, medium = seed.sizes[:2]
+    _import(client, seed, HEADER + f'IMP-2,Before,10,20,,,{small},4,\n')
+
+    _import(client, seed, HEADER + (
+        f'IMP-2,After,12,25,,,{small},99,\n'
+        f'IMP-2,After,12,25,,,{medium},3,\n'
+    ))
+
+    product = Product.query.filter_by(sku='IMP-2').one()
+    assert (product.name, product.min_price_cents, product.max_price_cents) == ('After', 1200, 2500)
+    assert _variants('IMP-2') == {small: 4, medium: 3}
+    assert _restocks('IMP-2') == 2
+
+
+def test_bad_rows_are_reported_and_the_rest_imported(client, seed):
+    size = seed.sizes[0]
+
+    result = _import(client, seed, HEADER + (
+        f'IMP-3,Good,10,20,,,{size},1,\n'
+        f'IMP-4,Bad price,30,20,,,{size},1,\n'
+        f'IMP-5,Bad size,10,20,,,999,1,\n'
+        f'IMP-3,Duplicate,10,20,,,{size},1,\n'
+    ))
+
+    assert result['products_upserted'] == 1
+    assert [(error['line'], error['sku']) for error in result['errors']] == [
+        (3, 'IMP-4'), (4, 'IMP-5'), (5, 'IMP-3')
+    ]
+    assert 'Size 999 not found' in result['errors'][1]['error']
+    assert Product.query.filter(Product.sku.in_(['IMP-4', 'IMP-5'])).count() == 0
+
+
+def test_ndjson_lines_and_parse_errors(app, client, seed):
+    app.config['IMPORT_CHUNK_SIZE'] = 1
+    lines = [
+        json.dumps({'sku': 'IMP-6', 'name': 'Json', 'min_price': 5, 'max_price': 9,
+                    'variants': [{'size_id': seed.sizes[0], 'quantity': 2}]}),
+        '{not json',
+        json.dumps({'sku': 'IMP-7', 'name': 'Json 2', 'min_price': 5, 'max_price': 9})
+    ]
+
+    result = _import(client, seed, '\n'.join(lines), fmt='ndjson')
+
+    assert result['products_upserted'] == 2
+    assert [error['line'] for error in result['errors']] == [2]
+    assert _variants('IMP-6') == {seed.sizes[0]: 2}
+
+
+def test_unknown_format_is_rejected(client, seed):
+    response = client.post('/api/products/import?format=xlsx', data=b'', headers=seed.admin)
+
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+"""
+Request instrumentation: /metrics and Server-Timing, and what production allows
+"""
+import pytest
+from app import create_app
+from app.config import ProductionConfig
+
+
+class ProductionTestConfig(ProductionConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_BINDS = {}
+    SQLALCHEMY_ECHO = False
+    LOG_LEVEL = 'WARNING'
+    METRICS_TOKEN = 'scrape-me'
+
+
+def test_production_refuses_an_open_metrics_endpoint():
+    class Config(ProductionTestConfig):
+        METRICS_TOKEN = None
+
+    with pytest.raises(RuntimeError, match='METRICS_TOKEN'):
+        create_app(Config)
+
+
+def test_production_without_instrumentation_needs_no_token():
+    class Config(ProductionTestConfig):
+        METRICS_TOKEN = None
+        PERF_INSTRUMENTATION = False
+
+    client = create_app(Config).test_client()
+
+    assert client.get('/metrics').status_code == 404
+
+
+def test_production_metrics_need_the_token_and_skip_server_timing():
+    client = create_app(ProductionTestConfig).test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-m\u00e9'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'}).status_code == 200
+    assert 'Server-Timing' not in client.get('/missing').headers
+
+
+def test_development_sends_server_timing(client, seed):
+    response = client.get('/api/sizes', headers=seed.admin)
+
+    assert 'db;dur=' in response.headers['Server-Timing']
+
+
+def test_repeated_statements_are_logged(app, client, seed, caplog):
+    app.config['PERF_N_PLUS_ONE_THRESHOLD'] = 0
+
+    client.get('/api/sizes', headers=seed.admin)
+
+    record = next(record for record in caplog.records if record.msg.startswith('Possible N+1'))
+    assert record.args[0] == 'sizes.get_sizes'
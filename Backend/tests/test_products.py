@@ -0,0 +1,69 @@
+"""
+Product edits: variant diffs, their stock ledger and the product's updated_at
+"""
+from datetime import datetime
+from app.extensions import db
+from app.models.product import Product
+from app.models.product_variant import ProductVariant
+from app.models.stock_movement import StockMovement
+
+
+def _put_variants(client, seed, variants):
+    return client.put(f'/api/products/{seed.product_id}', json={'variants': variants}, headers=seed.admin)
+
+
+def _stored_variants(seed):
+    return {
+        variant.size_id: variant.quantity
+        for variant in ProductVariant.query.filter_by(product_id=seed.product_id)
+    }
+
+
+def _unchanged_variants(seed):
+    return [
+        {'size_id': variant.size_id, 'quantity': variant.quantity, 'sku_suffix': variant.sku_suffix}
+        for variant in ProductVariant.query.filter_by(product_id=seed.product_id)
+    ]
+
+
+def test_removing_a_variant_with_history_is_rejected(client, seed):
+    before = _stored_variants(seed)
+
+    response = _put_variants(client, seed, [{'size_id': seed.sizes[1], 'quantity': 100}])
+
+    assert response.status_code == 400
+    assert f'size_id {seed.sizes[0]}' in response.get_json()['error']
+    assert _stored_variants(seed) == before
+
+
+def test_unused_variant_can_be_removed(client, seed):
+    current = _unchanged_variants(seed)
+    _put_variants(client, seed, current + [{'size_id': seed.sizes[2], 'quantity': 0}])
+
+    response = _put_variants(client, seed, current)
+
+    assert response.status_code == 200
+    assert seed.sizes[2] not in _stored_variants(seed)
+
+
+def test_variant_changes_are_ledgered_and_bump_the_product(client, seed):
+    product = db.session.get(Product, seed.product_id)
+    product.updated_at = datetime(2020, 1, 1)
+    db.session.commit()
+    variants = _unchanged_variants(seed)
+    movements = StockMovement.query.count()
+
+    response = _put_variants(client, seed, [{**variant, 'quantity': variant['quantity'] + 5} for variant in variants])
+
+    assert response.status_code == 200
+    assert StockMovement.query.count() == movements + len(variants)
+    assert db.session.get(Product, seed.product_id).updated_at > datetime(2020, 1, 1)
+
+
+def test_unchanged_variants_write_nothing(client, seed):
+    product = db.session.get(Product, seed.product_id)
+    product.updated_at = datetime(2020, 1, 1)
+    db.session.commit()
+    _put_variants(client, seed, _unchanged_variants(seed))
+
+    assert db.session.get(Product, seed.product_id).updated_at == datetime(2020, 1, 1)
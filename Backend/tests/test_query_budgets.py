@@ -0,0 +1,41 @@
+"""
+Every route stays within its query budget, and list routes do not issue
+per-row queries. Budgets live in tests/budgets.py.
+"""
+import pytest
+from tests.budgets import BUDGETS
+
+
+def _params(scaling=False):
+    params = []
+    for endpoint, route in sorted(BUDGETS.items()):
+        if scaling and not route.scales:
+            continue
+        marks = []
+        if scaling and route.n_plus_one:
+            marks.append(pytest.mark.xfail(strict=True, reason='known per-row queries'))
+        params.append(pytest.param(endpoint, id=endpoint, marks=marks))
+    return params
+
+
+def test_every_route_has_a_budget(app):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != 'static'}
+
+    assert sorted(endpoints - set(BUDGETS)) == [], 'Add these routes to tests/budgets.py'
+    assert sorted(set(BUDGETS) - endpoints) == [], 'Remove these from tests/budgets.py'
+
+
+@pytest.mark.parametrize('endpoint', _params())
+def test_route_within_budget(client, seed, assert_max_queries, endpoint):
+    route = BUDGETS[endpoint]
+
+    response = assert_max_queries(route.budget, lambda: route.send(client, seed))
+
+    assert response.status_code == route.status, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('endpoint', _params(scaling=True))
+def test_route_queries_do_not_grow_with_rows(client, seed, assert_constant_queries, endpoint):
+    route = BUDGETS[endpoint]
+
+    assert_constant_queries(lambda: route.send(client, seed), lambda: seed.add_products(3))
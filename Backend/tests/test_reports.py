@@ -0,0 +1,196 @@
+"""
+Report aggregation over closed and open reporting-day buckets
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app.extensions import db
+from app.models.sale import Sale
+from app.models.sales_rollup import SalesDailyRollup, SalesVariantDailyRollup, SalesHourlyRollup
+from app.services.materialize_service import MaterializeService
+from app.services.report_service import ReportService
+from app.services.rollup_service import RollupService
+from app.utils.db_pool import _statement_timeout
+from app.utils.report_cache import report_cache
+from app.utils.report_store import report_store
+from app.utils.reporting import local_hour, reporting_key, today
+
+
+def _closed_day_rollup(seed, day, total_cents=1000):
+    db.session.add(SalesDailyRollup(
+        day=day, timezone=reporting_key(), payment_method='cash',
+        user_id=seed.cashier_id, total_cents=total_cents, transaction_count=1
+    ))
+    db.session.commit()
+
+
+def test_open_bucket_cache_key_keeps_the_reporting_key(seed):
+    yesterday = today() - timedelta(days=1)
+    _closed_day_rollup(seed, yesterday)
+    report_cache.clear()
+
+    report = ReportService.daily_sales(yesterday, today())
+
+    assert {row['date'] for row in report} == {yesterday.isoformat(), today().isoformat()}
+    keys = list(report_cache._entries)
+    assert [(key[3], key[4]) for key in keys] == [(yesterday, yesterday), (today(), today())]
+    assert all(key[2] == reporting_key() for key in keys)
+
+
+def test_closed_and_open_buckets_are_merged(seed):
+    yesterday = today() - timedelta(days=1)
+    _closed_day_rollup(seed, yesterday, total_cents=2500)
+    open_only = ReportService.payment_methods(today(), today())
+
+    report = ReportService.payment_methods(yesterday, today())
+
+    assert report['total_transactions'] == open_only['total_transactions'] + 1
+    assert report['report']['cash']['total'] == open_only['report']['cash']['total'] + 25
+
+
+def test_rebuild_in_another_process_retires_cached_closed_days(app, seed):
+    app.config['REPORT_GENERATION_SYNC_INTERVAL'] = 0
+    yesterday = today() - timedelta(days=1)
+    _closed_day_rollup(seed, yesterday, total_cents=1000)
+
+    assert ReportService.daily_sales(yesterday, yesterday)[0]['total_sales'] == 10
+
+    # Another process rebuilds: the rows change and the generation is bumped,
+    # but this process's cache is not cleared
+    SalesDailyRollup.query.filter_by(day=yesterday).update({'total_cents': 5000})
+    RollupService._bump_generation(reporting_key())
+    db.session.commit()
+
+    assert ReportService.daily_sales(yesterday, yesterday)[0]['total_sales'] == 50
+
+
+def _expected_cashier_totals():
+    sales = Sale.query.all()
+    return {
+        'transaction_count': len(sales),
+        'total_sales': sum(sale.total_amount_cents for sale in sales) / 100,
+        'items_sold': sum(item.quantity for sale in sales for item in sale.items),
+        'active_hours': len({local_hour(sale.created_at) for sale in sales})
+    }
+
+
+def test_cashier_report_from_the_hourly_rollup(seed):
+    row, = ReportService.cashier_sales(today(), today())
+
+    assert row['cashier_name'] == 'cashier'
+    assert {key: row[key] for key in _expected_cashier_totals()} == _expected_cashier_totals()
+
+
+def test_cashier_active_hours_in_a_half_hour_offset_timezone(app, seed):
+    app.config['STORE_TIMEZONE'] = 'Asia/Kolkata'
+    RollupService.rebuild_daily(today(), today())
+
+    row, = ReportService.cashier_sales(today(), today())
+
+    assert row['active_hours'] == _expected_cashier_totals()['active_hours']
+
+
+def test_report_over_sales_without_rollups_fails_loudly(client, seed):
+    for model in (SalesDailyRollup, SalesVariantDailyRollup, SalesHourlyRollup):
+        model.query.delete()
+    db.session.commit()
+    report_cache.clear()
+
+    response = client.get('/api/reports/daily?days=1', headers=seed.admin)
+
+    assert response.status_code == 503
+    assert 'flask rollups rebuild --days 1' in response.get_json()['error']
+
+    RollupService.rebuild_daily(today(), today())
+    response = client.get('/api/reports/daily?days=1', headers=seed.admin)
+
+    assert response.status_code == 200
+    assert response.get_json()['report'][0]['transaction_count'] == len(seed.sales)
+
+
+def test_quiet_window_without_rollups_is_empty(seed):
+    last_week = today() - timedelta(days=7)
+
+    assert ReportService.daily_sales(last_week, last_week) == []
+
+
+def test_closed_window_blob_is_served_as_is(client, seed):
+    yesterday = today() - timedelta(days=1)
+    _closed_day_rollup(seed, yesterday, total_cents=2500)
+    MaterializeService.materialize()
+
+    response = client.get(f'/api/reports/daily?start={yesterday}&end={yesterday}&format=csv', headers=seed.admin)
+
+    assert response.headers['X-Report-Source'] == 'materialized'
+    assert '25.0' in response.get_data(as_text=True)
+
+
+def test_default_window_merges_stored_closed_days_with_today(app, client, seed):
+    app.config['REPORT_MATERIALIZE_TRAILING_DAYS'] = [7]
+    app.config['REPORT_GENERATION_SYNC_INTERVAL'] = 0
+    yesterday = today() - timedelta(days=1)
+    _closed_day_rollup(seed, yesterday, total_cents=2500)
+    MaterializeService.materialize()
+    live_today = ReportService.daily_sales(today(), today())
+
+    # Changed behind the store's back: the stored sums are what is served
+    SalesDailyRollup.query.filter_by(day=yesterday).update({'total_cents': 9900})
+    db.session.commit()
+    report_cache.clear()
+
+    report = client.get('/api/reports/daily?days=7', headers=seed.admin).get_json()['report']
+
+    assert report == live_today + [{
+        'date': yesterday.isoformat(), 'total_sales': 25.0, 'transaction_count': 1,
+        'cash': 25.0, 'card': 0, 'mobile': 0
+    }]
+
+    # A rebuild retires the stored sums along with the cached ones
+    RollupService._bump_generation(reporting_key())
+    db.session.commit()
+
+    report = client.get('/api/reports/daily?days=7', headers=seed.admin).get_json()['report']
+
+    assert report[-1]['total_sales'] == 99
+
+
+def test_other_windows_are_not_stored(app, seed):
+    app.config['REPORT_MATERIALIZE_TRAILING_DAYS'] = [7]
+    _closed_day_rollup(seed, today() - timedelta(days=1))
+
+    ReportService.daily_sales(today() - timedelta(days=5), today())
+
+    assert not report_store.clear()
+
+
+def test_stored_sums_keep_date_keys(app):
+    day = today()
+    sums = {(day, 'cash'): (1000, 2), (datetime(2024, 5, 1, 13),): (1, 2, 3)}
+
+    report_store.put_sums('test', (('params', ''),), day, day, sums)
+
+    assert report_store.get_sums('test', (('params', ''),), day, day) == {
+        key: list(values) for key, values in sums.items()
+    }
+
+
+@pytest.mark.parametrize('path', [
+    '/api/reports/daily', '/api/reports/products', '/api/reports/payments',
+    '/api/reports/cashiers', '/api/reports/heatmap', '/api/reports/affinity?product_id=1'
+])
+def test_report_queries_run_under_the_report_timeout(app, client, seed, path):
+    app.config['REPORT_STATEMENT_TIMEOUT_MS'] = 60000
+    report_cache.clear()
+    timeouts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'rollup' in statement or 'basket' in statement:
+            timeouts.append(_statement_timeout.get())
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert client.get(path, headers=seed.admin).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert timeouts and set(timeouts) == {60000}
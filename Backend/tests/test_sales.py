@@ -0,0 +1,68 @@
+"""
+Checkout validation against the locked rows
+"""
+import pytest
+from app.extensions import db
+from app.models.product import Product
+from app.services.sales_service import SalesService
+from app.utils.pricing_cache import pricing_table
+
+
+def _sell(seed, price=15):
+    return SalesService.create_sale(
+        seed.cashier_id,
+        [{'variant_id': seed.variant_id, 'quantity': 1, 'price': price}],
+        'cash'
+    )
+
+
+def _edit_in_another_worker(seed, **values):
+    # Another worker's edit does not invalidate this worker's pricing table
+    db.session.query(Product).filter_by(id=seed.product_id).update(values)
+    db.session.commit()
+
+
+def test_price_range_narrowed_elsewhere_is_enforced(seed):
+    _sell(seed)
+    assert pricing_table._table is not None
+
+    _edit_in_another_worker(seed, max_price_cents=1200)
+
+    with pytest.raises(Exception, match='outside allowed range'):
+        _sell(seed, price=15)
+
+
+def test_product_deactivated_elsewhere_cannot_be_sold(seed):
+    _sell(seed)
+
+    _edit_in_another_worker(seed, is_active=False)
+
+    with pytest.raises(Exception, match='not active'):
+        _sell(seed)
+
+
+def test_price_range_widened_elsewhere_is_accepted(seed):
+    _sell(seed)
+
+    _edit_in_another_worker(seed, max_price_cents=3000)
+
+    assert _sell(seed, price=25).total_amount_cents == 2500
+
+
+def test_product_reactivated_elsewhere_can_be_sold(seed):
+    _edit_in_another_worker(seed, is_active=False)
+    pricing_table.invalidate()  # reloaded here while the product was inactive
+    with pytest.raises(ValueError, match='not active'):
+        _sell(seed)
+
+    _edit_in_another_worker(seed, is_active=True)
+
+    assert _sell(seed).id
+
+
+def test_pricing_table_rejects_before_locking(seed, assert_max_queries):
+    _sell(seed)
+
+    # One unlocked read of the product row confirms the rejection
+    with pytest.raises(ValueError, match='outside allowed range'):
+        assert_max_queries(1, lambda: _sell(seed, price=99))
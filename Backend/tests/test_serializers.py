@@ -0,0 +1,53 @@
+"""
+List responses built from schema rows match the models' to_dict() output
+"""
+import json
+from flask import current_app
+from app.services.inventory_service import InventoryService
+from app.services.product_service import ProductService
+from app.services.sales_service import SalesService
+
+
+def _as_sent(body):
+    """The JSON the client receives (rows carry datetimes the provider formats)"""
+    return json.loads(current_app.json.dumps(body))
+
+
+def test_product_rows_match_to_dict(seed):
+    ProductService.create_product(sku='BARE', name='No lookups', min_price=5, max_price=9, variants_data=[])
+
+    expected = [p.to_dict(include_variants=True) for p in ProductService.get_all_products(active_only=True)]
+
+    assert _as_sent(ProductService.get_all_product_rows(active_only=True)) == _as_sent(expected)
+
+
+def test_search_rows_match_to_dict(seed):
+    expected = [p.to_dict(include_variants=True) for p in ProductService.search_products('Product', active_only=False)]
+
+    assert _as_sent(ProductService.search_product_rows('Product', active_only=False)) == _as_sent(expected)
+
+
+def test_inventory_rows_match_to_dict(seed):
+    expected = [{
+        'variant_id': variant.id,
+        'product': variant.product.to_dict(include_variants=False) if variant.product else None,
+        'size': variant.size.to_dict() if variant.size else None,
+        'quantity': variant.quantity,
+        'full_sku': variant.to_dict()['full_sku'],
+        'updated_at': variant.updated_at.isoformat() if variant.updated_at else None
+    } for variant in InventoryService.get_all_inventory(active_products_only=True)]
+
+    assert _as_sent(InventoryService.get_inventory_rows(active_products_only=True)) == _as_sent(expected)
+
+
+def test_stock_movement_rows_match_to_dict(seed):
+    for kwargs in ({}, {'variant_id': seed.variant_id}, {'product_id': seed.product_id}):
+        expected = [m.to_dict() for m in InventoryService.get_stock_movements(**kwargs)]
+
+        assert _as_sent(InventoryService.get_stock_movement_rows(**kwargs)) == _as_sent(expected)
+
+
+def test_sale_rows_match_to_dict(seed):
+    expected = [sale.to_dict() for sale in SalesService.get_all_sales(limit=100, offset=0)]
+
+    assert _as_sent(SalesService.get_sale_rows(limit=100, offset=0)) == _as_sent(expected)